@@ -1,36 +1,76 @@
-from typing import Dict, List, Optional
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from services.evidence import EvidenceGatherer, ProviderEvidence
 from services.npi_service import NPIService
 from services.web_scraper import WebScraper
 from app.models import Provider, ValidationResult
+from app.persistence import provider_status
 from app import db
+import re
 import time
 
+# Format checks (compiled once; the columnar audit in app/quality_audit.py uses the same patterns)
+PHONE_SEPARATORS = re.compile(r'[\s\-\(\)\.]')
+PHONE_PATTERN = re.compile(r'^\+?1?\d{10}$')
+EMAIL_PATTERN = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+ZIP_PATTERN = re.compile(r'^\d{5}(-\d{4})?$')
+
+# Fields counted by the data completeness check
+REQUIRED_FIELDS = ['first_name', 'last_name', 'phone', 'address_line1', 'city', 'state', 'zip_code']
+
 class DataValidationAgent:
     """
     Agent responsible for validating provider contact information
     """
     
-    def __init__(self, npi_api_key: Optional[str] = None):
-        self.npi_service = NPIService(npi_api_key)
-        self.web_scraper = WebScraper()
+    def __init__(self, npi_api_key: Optional[str] = None, npi_service: Optional[NPIService] = None,
+                 web_scraper: Optional[WebScraper] = None, max_concurrency: int = 10,
+                 timeout: float = 300, evidence_gatherer: Optional[EvidenceGatherer] = None):
+        self.npi_service = npi_service or NPIService(npi_api_key)
+        self.web_scraper = web_scraper or WebScraper()
+        # Shared with the enrichment agent so each source is fetched once per provider
+        self.evidence = evidence_gatherer or EvidenceGatherer(self.npi_service, self.web_scraper, max_concurrency, timeout)
+    
+    def validate_providers(self, providers: Iterable[Provider], max_concurrency: Optional[int] = None,
+                           timeout: Optional[float] = None) -> Iterator[Tuple[Provider, Dict]]:
+        """Validate many providers with their lookups overlapped, yielding (provider, validation_results)
+        
+        Evidence comes from EvidenceGatherer.gather_many (max_concurrency providers' lookups in
+        flight, each cut off after timeout seconds) and each provider is checked as soon as its
+        own evidence is in, so results arrive in completion order but match validate_provider_contact.
+        """
+        for provider, evidence in self.evidence.gather_many(providers, max_concurrency, timeout):
+            yield provider, self.validate_from_evidence(evidence)
+    
+    def validate_provider_contact(self, provider: Provider, npi_validation: Optional[Dict] = None,
+                                  scraped_data: Optional[Dict] = None) -> Dict:
+        """Validate provider contact information
+        
+        npi_validation and scraped_data, if already fetched, skip the registry call and
+        the website download. Batches use validate_providers.
+        """
+        return self.validate_from_evidence(self.evidence.gather(provider, npi_validation, scraped_data))
     
-    def validate_provider_contact(self, provider: Provider) -> Dict:
-        """Validate provider contact information"""
+    def validate_from_evidence(self, evidence: ProviderEvidence) -> Dict:
+        """Validate provider contact information against gathered evidence (no external calls)"""
+        provider = evidence.provider
         results = {
-            'provider_id': provider.id,
+            'provider_id': evidence.provider_id,
             'validations': [],
             'overall_confidence': 0.0,
-            'discrepancies': []
+            'discrepancies': [],
+            'unavailable_sources': []
         }
         
-        provider_data = provider.to_dict()
+        provider_data = evidence.provider_data
         has_external_validation = False
         
         # 1. Validate against NPI registry
+        npi_validation = evidence.npi_validation
         try:
-            npi_validation = self.npi_service.validate_provider(provider_data)
-            
-            if npi_validation.get('valid'):
+            if npi_validation.get('unavailable'):
+                # Registry outage or throttling - not evidence against the provider
+                results['unavailable_sources'].append('npi')
+            elif npi_validation.get('valid'):
                 has_external_validation = True
                 npi_data = npi_validation.get('npi_data', {})
                 
@@ -60,12 +100,11 @@ class DataValidationAgent:
             pass
         
         # 2. Web scraping validation (if practice name or website available)
-        if provider.practice_name:
-            # Try to construct website URL (simplified)
-            website_url = self._construct_website_url(provider)
+        scraped_data = evidence.scraped_data
+        if provider.practice_name and scraped_data is not None:
+            website_url = scraped_data.get('website_url')
             if website_url:
                 try:
-                    scraped_data = self.web_scraper.scrape_provider_website(website_url, provider.full_name)
                     web_validation = self.web_scraper.validate_contact_info(provider_data, scraped_data)
                     
                     # Add web scraping validations
@@ -113,6 +152,11 @@ class DataValidationAgent:
             if v['status'] == 'discrepancy'
         ]
         
+        # Lookups that timed out while gathering evidence
+        for source in evidence.unavailable_sources:
+            if source not in results['unavailable_sources']:
+                results['unavailable_sources'].append(source)
+        
         return results
     
     def _validate_data_quality(self, provider: Provider) -> List[Dict]:
@@ -121,15 +165,7 @@ class DataValidationAgent:
         confidence_scores = []
         
         # Check required fields completeness
-        required_fields = {
-            'first_name': provider.first_name,
-            'last_name': provider.last_name,
-            'phone': provider.phone,
-            'address_line1': provider.address_line1,
-            'city': provider.city,
-            'state': provider.state,
-            'zip_code': provider.zip_code
-        }
+        required_fields = {name: getattr(provider, name) for name in REQUIRED_FIELDS}
         
         present_count = sum(1 for v in required_fields.values() if v)
         total_count = len(required_fields)
@@ -196,23 +232,19 @@ class DataValidationAgent:
     
     def _validate_phone_format(self, phone: str) -> bool:
         """Validate phone number format"""
-        import re
         # Remove common separators
-        cleaned = re.sub(r'[\s\-\(\)\.]', '', phone)
+        cleaned = PHONE_SEPARATORS.sub('', phone)
         # Check if it's 10 or 11 digits
-        return bool(re.match(r'^\+?1?\d{10}$', cleaned))
+        return bool(PHONE_PATTERN.match(cleaned))
     
     def _validate_email_format(self, email: str) -> bool:
         """Validate email format"""
-        import re
-        pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-        return bool(re.match(pattern, email))
+        return bool(EMAIL_PATTERN.match(email))
     
     def _validate_zip_format(self, zip_code: str) -> bool:
         """Validate zip code format"""
-        import re
         # US zip code: 5 digits or 5+4 format
-        return bool(re.match(r'^\d{5}(-\d{4})?$', zip_code))
+        return bool(ZIP_PATTERN.match(zip_code))
     
     def _validate_field(self, provider: Provider, field_name: str, 
                        original_value: Optional[str], validated_value: Optional[str],
@@ -313,13 +345,11 @@ class DataValidationAgent:
         return value.strip().upper().replace('-', '').replace(' ', '').replace('(', '').replace(')', '')
     
     def _construct_website_url(self, provider: Provider) -> Optional[str]:
-        """Construct potential website URL (simplified - in production would use search)"""
-        # This is a placeholder - in production, would use Google search API
-        # or other methods to find provider websites
-        return None
+        """Construct potential website URL (see EvidenceGatherer.find_website_url)"""
+        return self.evidence.find_website_url(provider)
     
     def save_validation_results(self, provider: Provider, validation_results: Dict):
-        """Save validation results to database"""
+        """Save validation results to database (batches use app.persistence.ValidationResultWriter)"""
         for validation in validation_results.get('validations', []):
             result = ValidationResult(
                 provider_id=provider.id,
@@ -335,39 +365,7 @@ class DataValidationAgent:
             db.session.add(result)
         
         # Update provider status based on validation results
-        overall_confidence = validation_results.get('overall_confidence', 0.0)
-        discrepancies = validation_results.get('discrepancies', [])
-        validations = validation_results.get('validations', [])
-        
-        # Always update status if we have validation results (which we should now)
-        if validations:
-            # Check if there are format issues or major discrepancies
-            has_format_issues = any(
-                v.get('status') == 'needs_review' and 'format' in v.get('field_name', '')
-                for v in validations
-            )
-            
-            # Check completeness
-            completeness_validation = next(
-                (v for v in validations if v.get('field_name') == 'data_completeness'),
-                None
-            )
-            is_complete = completeness_validation and completeness_validation.get('status') == 'validated'
-            
-            # Determine status based on confidence and data quality
-            if overall_confidence >= 0.75 and not has_format_issues and is_complete:
-                provider.status = 'validated'
-            elif overall_confidence >= 0.6 and not has_format_issues:
-                # Good data quality, mark as validated
-                provider.status = 'validated'
-            elif discrepancies or has_format_issues or overall_confidence < 0.5:
-                provider.status = 'needs_review'
-            else:
-                # Medium confidence, good enough to validate
-                provider.status = 'validated'
-        else:
-            # No validations performed (shouldn't happen now), keep as pending
-            provider.status = 'pending'
+        provider.status = provider_status(validation_results)
         
         db.session.commit()
 
@@ -31,8 +31,8 @@ class DirectoryManagementAgent:
         return batch
     
     def update_batch_progress(self, batch_id: int, processed: int, validated: int, 
-                            needs_review: int, average_confidence: float):
-        """Update batch processing progress"""
+                            needs_review: int, average_confidence: float, commit: bool = True):
+        """Update batch processing progress (commit=False leaves it to the caller's transaction)"""
         batch = ValidationBatch.query.get(batch_id)
         if batch:
             batch.processed_providers = processed
@@ -46,7 +46,8 @@ class DirectoryManagementAgent:
                 if batch.started_at:
                     batch.processing_time_seconds = (batch.completed_at - batch.started_at).total_seconds()
             
-            db.session.commit()
+            if commit:
+                db.session.commit()
     
     def generate_validation_report(self, batch_id: int) -> Dict:
         """Generate validation report for a batch"""
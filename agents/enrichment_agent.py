@@ -1,4 +1,5 @@
 from typing import Dict, List, Optional
+from services.evidence import EvidenceGatherer, ProviderEvidence
 from services.npi_service import NPIService
 from services.web_scraper import WebScraper
 from app.models import Provider
@@ -10,46 +11,56 @@ class InformationEnrichmentAgent:
     Agent responsible for enriching provider information from public sources
     """
     
-    def __init__(self, npi_api_key: Optional[str] = None):
-        self.npi_service = NPIService(npi_api_key)
-        self.web_scraper = WebScraper()
+    def __init__(self, npi_api_key: Optional[str] = None, npi_service: Optional[NPIService] = None,
+                 web_scraper: Optional[WebScraper] = None, evidence_gatherer: Optional[EvidenceGatherer] = None):
+        self.npi_service = npi_service or NPIService(npi_api_key)
+        self.web_scraper = web_scraper or WebScraper()
+        # Shared with the validation agent so each source is fetched once per provider
+        self.evidence = evidence_gatherer or EvidenceGatherer(self.npi_service, self.web_scraper)
     
-    def enrich_provider_info(self, provider: Provider) -> Dict:
-        """Enrich provider information from multiple sources"""
+    def enrich_provider_info(self, provider: Provider, npi_validation: Optional[Dict] = None,
+                             scraped_data: Optional[Dict] = None) -> Dict:
+        """Enrich provider information from multiple sources
+        
+        npi_validation may be the registry validation already run for this provider,
+        in which case its matched record is reused instead of searching again.
+        scraped_data may be the already-scraped practice website for this provider.
+        """
+        enrichment_results = self.enrich_from_evidence(self.evidence.gather(provider, npi_validation, scraped_data))
+        self.apply_enrichment(provider, enrichment_results)
+        return enrichment_results
+    
+    def enrich_from_evidence(self, evidence: ProviderEvidence) -> Dict:
+        """Work out enrichment from gathered evidence (no external calls, provider left unchanged)
+        
+        The field changes are returned under 'updates'; apply_enrichment sets them on the provider.
+        """
         enrichment_results = {
-            'provider_id': provider.id,
+            'provider_id': evidence.provider_id,
             'enriched_fields': [],
             'new_information': {},
-            'confidence_scores': {}
+            'confidence_scores': {},
+            'unavailable_sources': [],
+            'updates': {}
         }
         
-        provider_data = provider.to_dict()
+        # Provider values as enriched so far; later sources only fill what earlier ones left empty
+        provider = dict(evidence.provider._asdict())
         
         # 1. Enrich from NPI registry
         npi_data = None
-        if provider.npi:
-            npi_result = self.npi_service.search_by_npi(provider.npi)
-            if npi_result:
-                npi_data = self.npi_service.extract_provider_info(npi_result)
-        else:
-            # Try to find by name
-            matches = self.npi_service.search_by_name(
-                provider.first_name,
-                provider.last_name,
-                provider.state
-            )
-            if matches:
-                npi_data = self.npi_service.extract_provider_info(matches[0])
+        npi_validation = evidence.npi_validation
+        if npi_validation.get('unavailable'):
+            enrichment_results['unavailable_sources'].append('npi')
+        elif npi_validation.get('valid'):
+            npi_data = npi_validation.get('npi_data')
         
         if npi_data:
             enrichment_results = self._merge_npi_data(provider, npi_data, enrichment_results)
         
         # 2. Enrich from web scraping
-        if provider.practice_name:
-            website_url = self._find_provider_website(provider)
-            if website_url:
-                scraped_data = self.web_scraper.scrape_provider_website(website_url, provider.full_name)
-                enrichment_results = self._merge_scraped_data(provider, scraped_data, enrichment_results)
+        if evidence.scraped_data is not None:
+            enrichment_results = self._merge_scraped_data(provider, evidence.scraped_data, enrichment_results)
         
         # 3. Enrich specialties and taxonomies
         if npi_data and npi_data.get('taxonomies'):
@@ -57,11 +68,20 @@ class InformationEnrichmentAgent:
         
         return enrichment_results
     
-    def _merge_npi_data(self, provider: Provider, npi_data: Dict, results: Dict) -> Dict:
+    def apply_enrichment(self, provider: Provider, enrichment_results: Dict):
+        """Set the field changes worked out by enrich_from_evidence on the provider"""
+        for field, value in enrichment_results.get('updates', {}).items():
+            setattr(provider, field, list(value) if isinstance(value, tuple) else value)
+    
+    def _update(self, provider: Dict, results: Dict, field: str, value):
+        provider[field] = value
+        results['updates'][field] = value
+    
+    def _merge_npi_data(self, provider: Dict, npi_data: Dict, results: Dict) -> Dict:
         """Merge NPI data into provider record"""
         # Update NPI if missing
-        if not provider.npi and npi_data.get('npi'):
-            provider.npi = npi_data['npi']
+        if not provider['npi'] and npi_data.get('npi'):
+            self._update(provider, results, 'npi', npi_data['npi'])
             results['enriched_fields'].append('npi')
             results['new_information']['npi'] = npi_data['npi']
             results['confidence_scores']['npi'] = 0.95
@@ -69,87 +89,84 @@ class InformationEnrichmentAgent:
         # Update address if missing or incomplete
         npi_address = npi_data.get('address', {})
         if npi_address:
-            if not provider.address_line1 and npi_address.get('line1'):
-                provider.address_line1 = npi_address['line1']
+            if not provider['address_line1'] and npi_address.get('line1'):
+                self._update(provider, results, 'address_line1', npi_address['line1'])
                 results['enriched_fields'].append('address_line1')
                 results['new_information']['address_line1'] = npi_address['line1']
                 results['confidence_scores']['address'] = 0.9
             
-            if not provider.city and npi_address.get('city'):
-                provider.city = npi_address['city']
+            if not provider['city'] and npi_address.get('city'):
+                self._update(provider, results, 'city', npi_address['city'])
                 results['enriched_fields'].append('city')
             
-            if not provider.state and npi_address.get('state'):
-                provider.state = npi_address['state']
+            if not provider['state'] and npi_address.get('state'):
+                self._update(provider, results, 'state', npi_address['state'])
                 results['enriched_fields'].append('state')
             
-            if not provider.zip_code and npi_address.get('zip_code'):
-                provider.zip_code = npi_address['zip_code']
+            if not provider['zip_code'] and npi_address.get('zip_code'):
+                self._update(provider, results, 'zip_code', npi_address['zip_code'])
                 results['enriched_fields'].append('zip_code')
             
-            if not provider.phone and npi_address.get('phone'):
-                provider.phone = npi_address['phone']
+            if not provider['phone'] and npi_address.get('phone'):
+                self._update(provider, results, 'phone', npi_address['phone'])
                 results['enriched_fields'].append('phone')
                 results['new_information']['phone'] = npi_address['phone']
                 results['confidence_scores']['phone'] = 0.85
         
         # Update name components if missing
-        if not provider.middle_name and npi_data.get('middle_name'):
-            provider.middle_name = npi_data['middle_name']
+        if not provider['middle_name'] and npi_data.get('middle_name'):
+            self._update(provider, results, 'middle_name', npi_data['middle_name'])
             results['enriched_fields'].append('middle_name')
         
         return results
     
-    def _merge_scraped_data(self, provider: Provider, scraped_data: Dict, results: Dict) -> Dict:
+    def _merge_scraped_data(self, provider: Dict, scraped_data: Dict, results: Dict) -> Dict:
         """Merge scraped web data into provider record"""
-        if not provider.phone and scraped_data.get('phone'):
-            provider.phone = scraped_data['phone']
+        if not provider['phone'] and scraped_data.get('phone'):
+            self._update(provider, results, 'phone', scraped_data['phone'])
             results['enriched_fields'].append('phone')
             results['new_information']['phone'] = scraped_data['phone']
             results['confidence_scores']['phone'] = 0.7
         
-        if not provider.email and scraped_data.get('email'):
-            provider.email = scraped_data['email']
+        if not provider['email'] and scraped_data.get('email'):
+            self._update(provider, results, 'email', scraped_data['email'])
             results['enriched_fields'].append('email')
             results['new_information']['email'] = scraped_data['email']
             results['confidence_scores']['email'] = 0.7
         
         if scraped_data.get('specialties'):
-            current_specialty = provider.specialty or ''
+            current_specialty = provider['specialty'] or ''
             new_specialties = [s for s in scraped_data['specialties'] if s not in current_specialty]
             if new_specialties:
-                if provider.specialty:
-                    provider.specialty = f"{provider.specialty}, {', '.join(new_specialties)}"
+                if provider['specialty']:
+                    self._update(provider, results, 'specialty', f"{provider['specialty']}, {', '.join(new_specialties)}")
                 else:
-                    provider.specialty = ', '.join(new_specialties)
+                    self._update(provider, results, 'specialty', ', '.join(new_specialties))
                 results['enriched_fields'].append('specialty')
-                results['new_information']['specialty'] = provider.specialty
+                results['new_information']['specialty'] = provider['specialty']
                 results['confidence_scores']['specialty'] = 0.6
         
         return results
     
-    def _enrich_specialties(self, provider: Provider, taxonomies: List[str], results: Dict) -> Dict:
+    def _enrich_specialties(self, provider: Dict, taxonomies: List[str], results: Dict) -> Dict:
         """Enrich specialties from taxonomies"""
         if taxonomies:
             # Use primary taxonomy if specialty is missing
-            if not provider.specialty and taxonomies:
-                provider.specialty = taxonomies[0]
+            if not provider['specialty'] and taxonomies:
+                self._update(provider, results, 'specialty', taxonomies[0])
                 results['enriched_fields'].append('specialty')
                 results['new_information']['specialty'] = taxonomies[0]
                 results['confidence_scores']['specialty'] = 0.9
             
             # Store all taxonomies as additional info
             if len(taxonomies) > 1:
-                if not provider.affiliations:
-                    provider.affiliations = []
-                provider.affiliations.extend(taxonomies[1:])
+                self._update(provider, results, 'affiliations', list(provider['affiliations'] or []) + list(taxonomies[1:]))
         
         return results
     
     def _find_provider_website(self, provider: Provider) -> Optional[str]:
-        """Find provider website (simplified - would use search API in production)"""
-        # Placeholder - in production would use Google Search API
-        return None
+        """Find provider website (see EvidenceGatherer.find_website_url)"""
+        return self.evidence.find_website_url(provider)
     
     def save_enrichment_results(self, provider: Provider, enrichment_results: Dict):
         """Save enriched data to provider record"""
@@ -1,9 +1,24 @@
 from typing import Dict, List, Optional
 from app.models import Provider, ValidationResult
+from app.persistence import load_validations
 from app import db
-from sqlalchemy import func
+from sqlalchemy import and_, case, func, or_, select
 import statistics
 
+LOW_CONFIDENCE = 0.6  # validations below this score are flagged, and so are providers whose mean is below it
+CONFIDENCE_TOLERANCE = 1e-9  # slack at the status thresholds; SQL AVG and statistics.mean can differ in the last bit
+UNVALIDATED_CONFIDENCE = 0.5  # confidence and quality score reported for providers with no validations
+# Fields whose absence lowers the quality score (0.1 each)
+SCORED_FIELDS = ('phone', 'address_line1', 'city', 'state')
+# Fields whose absence is reported as an issue
+ISSUE_FIELDS = (
+    ('phone', 'Missing phone number'),
+    ('email', 'Missing email address'),
+    ('address_line1', 'Missing address'),
+    ('npi', 'Missing NPI number'),
+    ('license_number', 'Missing license number')
+)
+
 class QualityAssuranceAgent:
     """
     Agent responsible for quality assurance, discrepancy detection, and confidence scoring
@@ -12,24 +27,28 @@ class QualityAssuranceAgent:
     def __init__(self, confidence_threshold: float = 0.80):
         self.confidence_threshold = confidence_threshold
     
-    def assess_provider_quality(self, provider: Provider) -> Dict:
-        """Assess overall quality of provider data"""
+    def assess_provider_quality(self, provider: Provider,
+                                validations: Optional[List[ValidationResult]] = None) -> Dict:
+        """Assess overall quality of provider data (validations are queried unless already loaded)"""
         # Get all validation results for this provider
-        validations = ValidationResult.query.filter_by(provider_id=provider.id).all()
+        if validations is None:
+            validations = ValidationResult.query.filter_by(provider_id=provider.id).all()
         
         if not validations:
             return {
                 'provider_id': provider.id,
-                'overall_confidence': 0.5,
-                'quality_score': 0.5,
+                'overall_confidence': UNVALIDATED_CONFIDENCE,
+                'quality_score': UNVALIDATED_CONFIDENCE,
                 'status': 'needs_validation',
                 'issues': ['No validation data available'],
-                'recommendations': ['Run validation process']
+                'recommendations': ['Run validation process'],
+                'discrepancy_count': 0,
+                'validation_count': 0
             }
         
         # Calculate overall confidence
         confidence_scores = [v.confidence_score for v in validations]
-        overall_confidence = statistics.mean(confidence_scores) if confidence_scores else 0.5
+        overall_confidence = statistics.mean(confidence_scores) if confidence_scores else UNVALIDATED_CONFIDENCE
         
         # Identify discrepancies
         discrepancies = [v for v in validations if v.status == 'discrepancy']
@@ -43,19 +62,11 @@ class QualityAssuranceAgent:
         # Generate recommendations
         recommendations = self._generate_recommendations(provider, issues, overall_confidence)
         
-        # Determine status
-        if overall_confidence >= self.confidence_threshold and not discrepancies:
-            status = 'validated'
-        elif discrepancies or overall_confidence < 0.6:
-            status = 'needs_review'
-        else:
-            status = 'needs_manual_verification'
-        
         return {
             'provider_id': provider.id,
             'overall_confidence': overall_confidence,
             'quality_score': quality_score,
-            'status': status,
+            'status': self._status(overall_confidence, len(discrepancies)),
             'issues': issues,
             'recommendations': recommendations,
             'discrepancy_count': len(discrepancies),
@@ -65,53 +76,39 @@ class QualityAssuranceAgent:
     def _calculate_quality_score(self, provider: Provider, validations: List[ValidationResult],
                                  overall_confidence: float) -> float:
         """Calculate comprehensive quality score"""
+        missing_count = sum(1 for field in SCORED_FIELDS if not getattr(provider, field))
+        low_confidence_count = sum(1 for v in validations if v.confidence_score < LOW_CONFIDENCE)
+        return self._quality_score(overall_confidence, missing_count, low_confidence_count)
+    
+    def _quality_score(self, overall_confidence: float, missing_count: int, low_confidence_count: int) -> float:
+        """Mean confidence less 0.1 per missing scored field and 0.05 per low-confidence validation, clamped to 0-1"""
         score = overall_confidence
-        
-        # Penalize missing critical fields
-        critical_fields = ['phone', 'address_line1', 'city', 'state', 'zip_code']
-        missing_fields = []
-        
-        if not provider.phone:
-            missing_fields.append('phone')
-        if not provider.address_line1:
-            missing_fields.append('address')
-        if not provider.city:
-            missing_fields.append('city')
-        if not provider.state:
-            missing_fields.append('state')
-        
-        # Reduce score for missing fields
-        score -= len(missing_fields) * 0.1
-        
-        # Penalize low confidence validations
-        low_confidence = [v for v in validations if v.confidence_score < 0.6]
-        score -= len(low_confidence) * 0.05
-        
+        score -= missing_count * 0.1
+        score -= low_confidence_count * 0.05
         return max(0.0, min(1.0, score))
     
+    def _status(self, overall_confidence: float, discrepancy_count: int) -> str:
+        """Provider status from its mean validation confidence and number of discrepancies"""
+        if overall_confidence >= self.confidence_threshold - CONFIDENCE_TOLERANCE and not discrepancy_count:
+            return 'validated'
+        if discrepancy_count or overall_confidence < LOW_CONFIDENCE - CONFIDENCE_TOLERANCE:
+            return 'needs_review'
+        return 'needs_manual_verification'
+    
     def _identify_issues(self, provider: Provider, validations: List[ValidationResult],
                         discrepancies: List[ValidationResult]) -> List[str]:
         """Identify data quality issues"""
         issues = []
         
         # Missing critical information
-        if not provider.phone:
-            issues.append('Missing phone number')
-        if not provider.email:
-            issues.append('Missing email address')
-        if not provider.address_line1:
-            issues.append('Missing address')
-        if not provider.npi:
-            issues.append('Missing NPI number')
-        if not provider.license_number:
-            issues.append('Missing license number')
+        issues.extend(issue for field, issue in ISSUE_FIELDS if not getattr(provider, field))
         
         # Discrepancies
         for disc in discrepancies:
             issues.append(f"Discrepancy in {disc.field_name}: {disc.discrepancy_reason}")
         
         # Low confidence validations
-        low_confidence = [v for v in validations if v.confidence_score < 0.6]
+        low_confidence = [v for v in validations if v.confidence_score < LOW_CONFIDENCE]
         if low_confidence:
             issues.append(f"{len(low_confidence)} fields with low confidence scores")
         
@@ -149,9 +146,10 @@ class QualityAssuranceAgent:
                                        limit: int = 50) -> List[Dict]:
         """Prioritize providers that need manual review"""
         prioritized = []
+        validations = load_validations(p.id for p in providers)
         
         for provider in providers:
-            assessment = self.assess_provider_quality(provider)
+            assessment = self.assess_provider_quality(provider, validations[provider.id])
             
             # Calculate priority score (higher = more urgent)
             priority_score = 0
@@ -182,27 +180,33 @@ class QualityAssuranceAgent:
     
     def generate_quality_report(self, providers: List[Provider]) -> Dict:
         """Generate overall quality assessment report"""
-        total_providers = len(providers)
-        
-        assessments = [self.assess_provider_quality(p) for p in providers]
-        
-        # Calculate statistics
-        confidence_scores = [a['overall_confidence'] for a in assessments]
-        quality_scores = [a['quality_score'] for a in assessments]
+        validations = load_validations(p.id for p in providers)
+        assessments = [self.assess_provider_quality(p, validations[p.id]) for p in providers]
         
         validated_count = sum(1 for a in assessments if a['status'] == 'validated')
         needs_review_count = sum(1 for a in assessments if a['status'] == 'needs_review')
         
-        total_discrepancies = sum(a['discrepancy_count'] for a in assessments)
-        total_issues = sum(len(a['issues']) for a in assessments)
-        
+        return self._report(
+            total_providers=len(assessments),
+            validated_count=validated_count,
+            needs_review_count=needs_review_count,
+            average_confidence=statistics.mean(a['overall_confidence'] for a in assessments) if assessments else 0,
+            average_quality_score=statistics.mean(a['quality_score'] for a in assessments) if assessments else 0,
+            total_discrepancies=sum(a['discrepancy_count'] for a in assessments),
+            total_issues=sum(len(a['issues']) for a in assessments)
+        )
+    
+    def _report(self, total_providers: int, validated_count: int, needs_review_count: int,
+                average_confidence: float, average_quality_score: float,
+                total_discrepancies: int, total_issues: int) -> Dict:
+        """Quality report dict from its totals"""
         return {
             'total_providers': total_providers,
             'validated_count': validated_count,
             'needs_review_count': needs_review_count,
             'validation_rate': (validated_count / total_providers * 100) if total_providers > 0 else 0,
-            'average_confidence': statistics.mean(confidence_scores) if confidence_scores else 0,
-            'average_quality_score': statistics.mean(quality_scores) if quality_scores else 0,
+            'average_confidence': average_confidence,
+            'average_quality_score': average_quality_score,
             'total_discrepancies': total_discrepancies,
             'total_issues': total_issues,
             'providers_by_status': {
@@ -211,4 +215,77 @@ class QualityAssuranceAgent:
                 'needs_validation': total_providers - validated_count - needs_review_count
             }
         }
-
+    
+    def generate_directory_report(self) -> Dict:
+        """Generate the generate_quality_report metrics for every provider in one aggregate SQL query
+        
+        A subquery groups each provider's validations into its validation, discrepancy and
+        low-confidence counts, mean confidence and missing-field counts; the outer query
+        derives each provider's status, quality score and issue count from those with the
+        same rules as assess_provider_quality and totals them, so a single row comes back
+        whatever the directory size. Averages are SQL AVGs and may differ from
+        generate_quality_report(Provider.query.all()) in the last bit of a float.
+        """
+        row = db.session.execute(self._report_query()).one()
+        return self._report(
+            total_providers=row.total_providers,
+            validated_count=row.validated_count or 0,
+            needs_review_count=row.needs_review_count or 0,
+            average_confidence=row.average_confidence or 0,
+            average_quality_score=row.average_quality_score or 0,
+            total_discrepancies=row.total_discrepancies or 0,
+            total_issues=row.total_issues or 0
+        )
+    
+    def _report_query(self):
+        """Report totals over providers left-joined to their validations, one row"""
+        providers = Provider.__table__
+        validations = ValidationResult.__table__
+        
+        def missing(*columns):
+            return sum(case((or_(column.is_(None), column == ''), 1), else_=0) for column in columns)
+        
+        per_provider = (
+            select(
+                func.count(validations.c.id).label('validations'),
+                func.avg(validations.c.confidence_score).label('confidence'),
+                func.sum(case((validations.c.status == 'discrepancy', 1), else_=0)).label('discrepancies'),
+                func.sum(case((validations.c.confidence_score < LOW_CONFIDENCE, 1), else_=0)).label('low_confidence'),
+                # Fields penalized by _calculate_quality_score and reported by _identify_issues
+                func.max(missing(*(providers.c[field] for field in SCORED_FIELDS))).label('missing_scored'),
+                func.max(missing(*(providers.c[field] for field, _ in ISSUE_FIELDS))).label('missing_issues')
+            )
+            .select_from(providers.outerjoin(validations, validations.c.provider_id == providers.c.id))
+            .group_by(providers.c.id)
+            .subquery()
+        )
+        p = per_provider.c
+        validated = p.validations > 0
+        
+        # As _status
+        status = case(
+            (~validated, 'needs_validation'),
+            (and_(p.confidence >= self.confidence_threshold - CONFIDENCE_TOLERANCE, p.discrepancies == 0), 'validated'),
+            (or_(p.discrepancies > 0, p.confidence < LOW_CONFIDENCE - CONFIDENCE_TOLERANCE), 'needs_review'),
+            else_='needs_manual_verification'
+        )
+        # As _quality_score, clamped to 0-1
+        score = p.confidence - p.missing_scored * 0.1 - p.low_confidence * 0.05
+        quality_score = case(
+            (~validated, UNVALIDATED_CONFIDENCE), (score < 0, 0.0), (score > 1, 1.0), else_=score
+        )
+        # As _identify_issues: one per missing field and per discrepancy, one for any low-confidence results
+        issue_count = case(
+            (~validated, 1),  # 'No validation data available'
+            else_=p.missing_issues + p.discrepancies + case((p.low_confidence > 0, 1), else_=0)
+        )
+        
+        return select(
+            func.count().label('total_providers'),
+            func.sum(case((status == 'validated', 1), else_=0)).label('validated_count'),
+            func.sum(case((status == 'needs_review', 1), else_=0)).label('needs_review_count'),
+            func.avg(case((validated, p.confidence), else_=UNVALIDATED_CONFIDENCE)).label('average_confidence'),
+            func.avg(quality_score).label('average_quality_score'),
+            func.sum(p.discrepancies).label('total_discrepancies'),
+            func.sum(issue_count).label('total_issues')
+        ).select_from(per_provider)
@@ -6,18 +6,22 @@ from config import Config
 db = SQLAlchemy()
 cors = CORS()
 
-def create_app(config_class=Config):
-    app = Flask(__name__)
+def create_app(config_class=Config, start_ingestion: bool = True):
+    app = Flask(__name__, instance_path=config_class.INSTANCE_PATH)
     app.config.from_object(config_class)
     
     db.init_app(app)
     cors.init_app(app)
     
-    from app.routes import bp as main_bp
+    from app.routes import bp as main_bp, ingestion_manager
     app.register_blueprint(main_bp)
     
     with app.app_context():
         db.create_all()
     
+    # Background extraction workers for bulk uploads and the watch folder
+    if start_ingestion:
+        ingestion_manager.start(app)
+    
     return app
 
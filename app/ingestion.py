@@ -0,0 +1,366 @@
+"""
+Background bulk ingestion of credentialing documents.
+
+Uploaded files (one request can carry hundreds) and files dropped into an
+optional watch folder are copied to unique names in a storage folder and
+recorded as IngestionJob rows. The request returns as soon as the rows are
+committed; a small pool of worker threads then runs each job through the
+shared PDFExtractor, stores the result on the job and, when asked to,
+stages the extracted record as a pending Provider.
+
+Jobs are claimed with a conditional UPDATE (queued -> processing), so a job
+is only ever processed once even when several app processes share the
+database. Jobs still queued when the app stopped are picked up again on the
+next start, as are jobs left processing by a crash or restart once they
+started more than stale_after seconds ago. Another live process may still
+be working on a younger one, so stale_after should be a few times the
+longest extraction. A job that raises anywhere between its claim and its
+final commit is rolled back and marked failed.
+"""
+import os
+import queue
+import shutil
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import func, or_
+from sqlalchemy.exc import IntegrityError
+from werkzeug.utils import secure_filename
+
+from app import db
+from app.models import IngestionJob, Provider
+
+IMAGE_EXTENSIONS = {'png', 'jpg', 'jpeg'}
+
+# Extracted fields copied onto a staged Provider
+STAGED_FIELDS = [
+    'npi', 'first_name', 'last_name', 'middle_name', 'specialty', 'practice_name',
+    'phone', 'email', 'address_line1', 'address_line2', 'city', 'state', 'zip_code',
+    'license_number', 'license_state', 'board_certifications', 'education'
+]
+
+
+def _extension(filename: str) -> str:
+    return filename.rsplit('.', 1)[-1].lower() if '.' in filename else ''
+
+
+def _provider_fields(data: Dict) -> Dict:
+    """Extracted values that fit the Provider columns; over-long strings (e.g. 'Texas' for state) are left for review"""
+    columns = Provider.__table__.columns
+    fields = {}
+    for name in STAGED_FIELDS:
+        value = data.get(name)
+        if value in (None, '', []):
+            continue
+        if isinstance(value, str):
+            value = value.strip()
+            length = getattr(columns[name].type, 'length', None)
+            if length and len(value) > length:
+                continue
+        fields[name] = value
+    return fields
+
+
+class IngestionManager:
+    """
+    Queues extraction jobs and processes them on background worker threads
+    """
+
+    def __init__(self, pdf_extractor, storage_folder: str, workers: int = 2,
+                 watch_folder: str = '', poll_interval: float = 5.0,
+                 allowed_extensions: Optional[Iterable[str]] = None,
+                 use_vlm: bool = True, auto_stage: bool = False, stale_after: float = 3600):
+        self.pdf_extractor = pdf_extractor
+        self.storage_folder = storage_folder
+        self.workers = max(1, int(workers))
+        self.watch_folder = watch_folder
+        self.poll_interval = poll_interval
+        self.allowed_extensions = set(allowed_extensions or {'pdf'} | IMAGE_EXTENSIONS)
+        # Defaults for watch-folder jobs and uploads that do not say otherwise
+        self.use_vlm = use_vlm
+        self.auto_stage = auto_stage
+        # Seconds after which a job still 'processing' at start is considered orphaned and requeued
+        self.stale_after = stale_after
+
+        self.app = None
+        self._queue = queue.Queue()
+        self._threads: List[threading.Thread] = []
+        self._stopping = threading.Event()
+        self._lock = threading.Lock()
+        # Watch-folder files seen on the previous scan: path -> (size, mtime)
+        self._pending_files: Dict[str, Tuple[int, float]] = {}
+
+    def start(self, app):
+        """Start the worker (and watch-folder) threads and requeue jobs left over from a previous run"""
+        with self._lock:
+            if self.app is not None:
+                return
+            self.app = app
+
+        os.makedirs(self.storage_folder, exist_ok=True)
+        with app.app_context():
+            leftover = self.recover_jobs()
+        for job_id in leftover:
+            self._queue.put(job_id)
+
+        for index in range(self.workers):
+            self._spawn(self._work, f'ingestion-worker-{index}')
+        if self.watch_folder:
+            os.makedirs(self.watch_folder, exist_ok=True)
+            self._spawn(self._watch, 'ingestion-watcher')
+
+    def recover_jobs(self) -> List[int]:
+        """Requeue jobs orphaned in 'processing' and return the ids of every queued job, oldest first"""
+        cutoff = datetime.utcnow() - timedelta(seconds=self.stale_after)
+        IngestionJob.query.filter(
+            IngestionJob.status == 'processing',
+            or_(IngestionJob.started_at.is_(None), IngestionJob.started_at <= cutoff)
+        ).update({'status': 'queued', 'started_at': None}, synchronize_session=False)
+        db.session.commit()
+        leftover = db.session.query(IngestionJob.id).filter_by(status='queued').order_by(IngestionJob.id).all()
+        return [job_id for (job_id,) in leftover]
+
+    def stop(self, timeout: Optional[float] = None):
+        """Stop the threads once their current job is finished"""
+        self._stopping.set()
+        for _ in range(self.workers):
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def _spawn(self, target, name: str):
+        thread = threading.Thread(target=target, name=name, daemon=True)
+        thread.start()
+        self._threads.append(thread)
+
+    def allowed(self, filename: str) -> bool:
+        """True for file types the extractor handles"""
+        return _extension(filename) in self.allowed_extensions
+
+    def unique_path(self, filename: str) -> str:
+        """Storage path that cannot collide with another upload of the same name"""
+        os.makedirs(self.storage_folder, exist_ok=True)
+        name = secure_filename(filename) or 'document'
+        return os.path.join(self.storage_folder, f"{uuid.uuid4().hex}_{name}")
+
+    def store_upload(self, file_storage) -> str:
+        """Save an uploaded werkzeug FileStorage under a unique name and return its path"""
+        path = self.unique_path(file_storage.filename)
+        file_storage.save(path)
+        return path
+
+    def submit_uploads(self, files, use_vlm: Optional[bool] = None,
+                       auto_stage: Optional[bool] = None) -> Dict:
+        """Store uploaded files and queue one job per file; returns the batch id, jobs and rejected names"""
+        stored = []
+        rejected = []
+        for file_storage in files:
+            if not file_storage or not file_storage.filename:
+                continue
+            if not self.allowed(file_storage.filename):
+                rejected.append(file_storage.filename)
+                continue
+            stored.append((file_storage.filename, self.store_upload(file_storage)))
+
+        batch_id, jobs = self.enqueue(stored, 'upload', use_vlm, auto_stage)
+        return {
+            'batch_id': batch_id,
+            'jobs': [job.to_dict(include_result=False) for job in jobs],
+            'rejected': rejected
+        }
+
+    def enqueue(self, files: List[Tuple[str, str]], source: str, use_vlm: Optional[bool] = None,
+                auto_stage: Optional[bool] = None) -> Tuple[str, List[IngestionJob]]:
+        """Record (original filename, stored path) pairs as one batch of queued jobs"""
+        batch_id = uuid.uuid4().hex
+        jobs = [
+            IngestionJob(
+                batch_id=batch_id,
+                source=source,
+                original_filename=filename,
+                stored_path=path,
+                use_vlm=self.use_vlm if use_vlm is None else use_vlm,
+                auto_stage=self.auto_stage if auto_stage is None else auto_stage,
+                status='queued'
+            )
+            for filename, path in files
+        ]
+        if jobs:
+            db.session.add_all(jobs)
+            db.session.commit()
+            # Only hand ids to the workers once the rows are visible to their sessions
+            for job in jobs:
+                self._queue.put(job.id)
+        return batch_id, jobs
+
+    def _work(self):
+        while True:
+            job_id = self._queue.get()
+            if job_id is None:
+                return
+            try:
+                with self.app.app_context():
+                    self._process(job_id)
+            except Exception as e:
+                print(f"Ingestion job {job_id} failed: {e}")
+
+    def _claim(self, job_id: int) -> bool:
+        """Atomically move a job from queued to processing; False if someone else got it"""
+        claimed = IngestionJob.query.filter_by(id=job_id, status='queued').update(
+            {'status': 'processing', 'started_at': datetime.utcnow()},
+            synchronize_session=False
+        )
+        db.session.commit()
+        return claimed == 1
+
+    def _process(self, job_id: int):
+        if not self._claim(job_id):
+            return
+        job = IngestionJob.query.get(job_id)
+        stored_path = job.stored_path
+        start_time = time.time()
+
+        try:
+            result = self._extract(job)
+
+            provider_id = None
+            if result.get('success') and job.auto_stage:
+                provider_id = self._stage_provider(result.get('data') or {})
+
+            job.result = result
+            job.status = 'completed' if result.get('success') else 'failed'
+            job.error = None if result.get('success') else result.get('error', 'Extraction failed')
+            job.provider_id = provider_id
+            job.completed_at = datetime.utcnow()
+            job.processing_time_seconds = time.time() - start_time
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            self._fail(job_id, str(e) or e.__class__.__name__, start_time)
+
+        try:
+            os.remove(stored_path)
+        except OSError:
+            pass
+
+    def _extract(self, job: IngestionJob) -> Dict:
+        """Extraction result for a job's stored file; an extractor exception becomes a failed result"""
+        try:
+            if _extension(job.stored_path) in IMAGE_EXTENSIONS:
+                return self.pdf_extractor.extract_from_image(job.stored_path, use_vlm=job.use_vlm)
+            return self.pdf_extractor.extract_from_pdf(job.stored_path, use_vlm=job.use_vlm)
+        except Exception as e:
+            return {'success': False, 'error': str(e)}
+
+    def _fail(self, job_id: int, error: str, start_time: float):
+        """Mark a job failed after its processing transaction was rolled back"""
+        IngestionJob.query.filter_by(id=job_id).update({
+            'status': 'failed',
+            'error': error,
+            'result': None,
+            'provider_id': None,
+            'completed_at': datetime.utcnow(),
+            'processing_time_seconds': time.time() - start_time
+        }, synchronize_session=False)
+        db.session.commit()
+
+    def _stage_provider(self, data: Dict) -> Optional[int]:
+        """Create a pending Provider from extracted data; an existing NPI is linked rather than duplicated"""
+        fields = _provider_fields(data)
+        if not fields.get('first_name') or not fields.get('last_name'):
+            return None
+
+        npi = fields.get('npi')
+        if npi:
+            existing = Provider.query.filter_by(npi=npi).first()
+            if existing:
+                return existing.id
+
+        provider = Provider(**fields, status='pending')
+        db.session.add(provider)
+        try:
+            db.session.commit()
+        except IntegrityError:
+            # Another job staged the same NPI in the meantime
+            db.session.rollback()
+            existing = Provider.query.filter_by(npi=npi).first() if npi else None
+            return existing.id if existing else None
+        return provider.id
+
+    def scan_watch_folder(self) -> List[IngestionJob]:
+        """Queue watch-folder files whose size and mtime did not change since the previous scan"""
+        if not self.watch_folder or not os.path.isdir(self.watch_folder):
+            return []
+
+        seen = {}
+        ready = []
+        for entry in os.scandir(self.watch_folder):
+            if not entry.is_file() or entry.name.startswith('.') or not self.allowed(entry.name):
+                continue
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            signature = (stat.st_size, stat.st_mtime)
+            # A file still being copied in changes between scans; wait until it settles
+            if self._pending_files.get(entry.path) == signature:
+                ready.append(entry)
+            else:
+                seen[entry.path] = signature
+        self._pending_files = seen
+
+        stored = []
+        for entry in ready:
+            path = self.unique_path(entry.name)
+            try:
+                shutil.move(entry.path, path)
+            except OSError:
+                continue  # removed, or taken by another process watching the same folder
+            stored.append((entry.name, path))
+
+        _, jobs = self.enqueue(stored, 'watch_folder')
+        return jobs
+
+    def _watch(self):
+        while not self._stopping.wait(self.poll_interval):
+            try:
+                with self.app.app_context():
+                    jobs = self.scan_watch_folder()
+                if jobs:
+                    print(f"Queued {len(jobs)} files from watch folder {self.watch_folder}")
+            except Exception as e:
+                print(f"Error scanning watch folder {self.watch_folder}: {e}")
+
+    def batch_status(self, batch_id: str) -> Optional[Dict]:
+        """Progress of one batch; None if the batch does not exist"""
+        jobs = IngestionJob.query.filter_by(batch_id=batch_id).order_by(IngestionJob.id).all()
+        if not jobs:
+            return None
+
+        counts = {status: 0 for status in ('queued', 'processing', 'completed', 'failed')}
+        for job in jobs:
+            counts[job.status] = counts.get(job.status, 0) + 1
+        finished = counts['completed'] + counts['failed']
+        return {
+            'batch_id': batch_id,
+            'total_jobs': len(jobs),
+            'status_counts': counts,
+            'progress_percentage': finished / len(jobs) * 100,
+            'staged_providers': sorted({job.provider_id for job in jobs if job.provider_id}),
+            'jobs': [job.to_dict(include_result=False) for job in jobs]
+        }
+
+    def stats(self) -> Dict:
+        """Queue depth, worker count and job counts by status"""
+        counts = dict(db.session.query(IngestionJob.status, func.count(IngestionJob.id)).group_by(IngestionJob.status).all())
+        return {
+            'workers': self.workers,
+            'running': self.app is not None and not self._stopping.is_set(),
+            'queue_depth': self._queue.qsize(),
+            'watch_folder': self.watch_folder or None,
+            'jobs_by_status': counts
+        }
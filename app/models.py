@@ -39,6 +39,8 @@ class Provider(db.Model):
     
     # Relationships
     validations = db.relationship('ValidationResult', backref='provider', lazy=True, cascade='all, delete-orphan')
+    fingerprint = db.relationship('ProviderFingerprint', backref='provider', uselist=False, lazy=True,
+                                  cascade='all, delete-orphan')
     
     @property
     def full_name(self):
@@ -153,3 +155,77 @@ class ValidationBatch(db.Model):
             'progress_percentage': (self.processed_providers / self.total_providers * 100) if self.total_providers > 0 else 0
         }
 
+class ProviderFingerprint(db.Model):
+    __tablename__ = 'provider_fingerprints'
+    
+    # One row per provider, written with its last successful validation
+    provider_id = db.Column(db.Integer, db.ForeignKey('providers.id'), primary_key=True)
+    fingerprint = db.Column(db.String(64), nullable=False)  # sha256 of the validated fields and source versions
+    source_versions = db.Column(JSON, nullable=True)
+    
+    # When each source was last read successfully (None if it was unavailable)
+    validated_at = db.Column(db.DateTime, nullable=False)
+    npi_checked_at = db.Column(db.DateTime, nullable=True)
+    website_checked_at = db.Column(db.DateTime, nullable=True)
+    has_website = db.Column(db.Boolean, default=False)
+    
+    # Outcome of that validation
+    status = db.Column(db.String(50), nullable=True)
+    has_discrepancy = db.Column(db.Boolean, default=False)
+    
+    def to_dict(self):
+        return {
+            'provider_id': self.provider_id,
+            'fingerprint': self.fingerprint,
+            'source_versions': self.source_versions,
+            'validated_at': self.validated_at.isoformat() if self.validated_at else None,
+            'npi_checked_at': self.npi_checked_at.isoformat() if self.npi_checked_at else None,
+            'website_checked_at': self.website_checked_at.isoformat() if self.website_checked_at else None,
+            'has_website': self.has_website,
+            'status': self.status,
+            'has_discrepancy': self.has_discrepancy
+        }
+
+
+class IngestionJob(db.Model):
+    __tablename__ = 'ingestion_jobs'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    batch_id = db.Column(db.String(32), nullable=False, index=True)  # groups the files of one upload or folder scan
+    source = db.Column(db.String(20), default='upload')  # upload, watch_folder
+    original_filename = db.Column(db.String(255), nullable=False)
+    stored_path = db.Column(db.String(500), nullable=False)
+    use_vlm = db.Column(db.Boolean, default=False)
+    auto_stage = db.Column(db.Boolean, default=False)
+    
+    # Status
+    status = db.Column(db.String(50), default='queued', index=True)  # queued, processing, completed, failed
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime, nullable=True)
+    completed_at = db.Column(db.DateTime, nullable=True)
+    
+    # Results
+    result = db.Column(JSON, nullable=True)
+    error = db.Column(db.Text, nullable=True)
+    provider_id = db.Column(db.Integer, db.ForeignKey('providers.id'), nullable=True)  # staged pending provider
+    processing_time_seconds = db.Column(db.Float, nullable=True)
+    
+    def to_dict(self, include_result=True):
+        data = {
+            'id': self.id,
+            'batch_id': self.batch_id,
+            'source': self.source,
+            'filename': self.original_filename,
+            'use_vlm': self.use_vlm,
+            'auto_stage': self.auto_stage,
+            'status': self.status,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'completed_at': self.completed_at.isoformat() if self.completed_at else None,
+            'error': self.error,
+            'provider_id': self.provider_id,
+            'processing_time_seconds': self.processing_time_seconds
+        }
+        if include_result:
+            data['result'] = self.result
+        return data
@@ -0,0 +1,208 @@
+"""
+Chunked persistence of validation results.
+
+Saving a provider's results the ORM way (one ValidationResult object per
+row, then a commit per provider) costs a transaction, and on SQLite an
+fsync, for every provider. ValidationResultWriter buffers results and
+status changes instead and writes each chunk of providers in one
+transaction: a single executemany INSERT for the result rows and one
+UPDATE ... SET status = CASE id ... per slice of providers. Provider
+fingerprints (app/revalidation.py), when given, are replaced in the same
+transaction. Anything else pending in the session, such as enrichment
+changes to the same providers, is committed with the chunk.
+"""
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional
+
+from sqlalchemy import case, delete, insert, update
+
+from app import db
+from app.models import Provider, ProviderFingerprint, ValidationResult
+
+STATUS_UPDATE_SLICE = 300  # providers per UPDATE; keeps bound parameters under SQLite's 999 limit
+PROVIDER_QUERY_SLICE = 500  # provider ids per IN query when loading a batch
+
+
+def load_providers(provider_ids: Iterable[int]) -> List[Provider]:
+    """Providers with the given ids, in the order given (unknown and repeated ids skipped), one IN query per slice"""
+    provider_ids = list(dict.fromkeys(provider_ids))
+    loaded = {}
+    for start in range(0, len(provider_ids), PROVIDER_QUERY_SLICE):
+        for provider in Provider.query.filter(Provider.id.in_(provider_ids[start:start + PROVIDER_QUERY_SLICE])):
+            loaded[provider.id] = provider
+    return [loaded[provider_id] for provider_id in provider_ids if provider_id in loaded]
+
+
+def load_validations(provider_ids: Iterable[int]) -> Dict[int, List[ValidationResult]]:
+    """Validation results of each given provider (empty list for none), one IN query per slice"""
+    provider_ids = list(dict.fromkeys(provider_ids))
+    loaded = {provider_id: [] for provider_id in provider_ids}
+    for start in range(0, len(provider_ids), PROVIDER_QUERY_SLICE):
+        query = ValidationResult.query.filter(
+            ValidationResult.provider_id.in_(provider_ids[start:start + PROVIDER_QUERY_SLICE])
+        ).order_by(ValidationResult.id)
+        for validation in query:
+            loaded[validation.provider_id].append(validation)
+    return loaded
+
+
+def provider_status(validation_results: Dict) -> str:
+    """Provider status implied by a validate_provider_contact result"""
+    overall_confidence = validation_results.get('overall_confidence', 0.0)
+    discrepancies = validation_results.get('discrepancies', [])
+    validations = validation_results.get('validations', [])
+
+    # No validations performed (shouldn't happen now), keep as pending
+    if not validations:
+        return 'pending'
+
+    # Check if there are format issues or major discrepancies
+    has_format_issues = any(
+        v.get('status') == 'needs_review' and 'format' in v.get('field_name', '')
+        for v in validations
+    )
+
+    # Check completeness
+    completeness_validation = next(
+        (v for v in validations if v.get('field_name') == 'data_completeness'),
+        None
+    )
+    is_complete = completeness_validation and completeness_validation.get('status') == 'validated'
+
+    # Determine status based on confidence and data quality
+    if overall_confidence >= 0.75 and not has_format_issues and is_complete:
+        return 'validated'
+    elif overall_confidence >= 0.6 and not has_format_issues:
+        # Good data quality, mark as validated
+        return 'validated'
+    elif discrepancies or has_format_issues or overall_confidence < 0.5:
+        return 'needs_review'
+    # Medium confidence, good enough to validate
+    return 'validated'
+
+
+def validation_rows(provider_id: int, validation_results: Dict, validation_type: str = 'contact') -> List[Dict]:
+    """ValidationResult column values for each validation in a result"""
+    return [
+        {
+            'provider_id': provider_id,
+            'validation_type': validation_type,
+            'field_name': validation['field_name'],
+            'original_value': validation.get('original_value'),
+            'validated_value': validation.get('validated_value'),
+            'confidence_score': validation['confidence_score'],
+            'source': validation.get('source'),
+            'status': validation.get('status', 'pending'),
+            'discrepancy_reason': validation.get('discrepancy_reason'),
+            'validated_at': datetime.utcnow()
+        }
+        for validation in validation_results.get('validations', [])
+    ]
+
+
+class ValidationResultWriter:
+    """
+    Buffers validation results and provider statuses, committing one chunk of providers per transaction
+    """
+
+    def __init__(self, chunk_size: int = 200, validation_type: str = 'contact',
+                 before_commit: Optional[Callable[[], None]] = None):
+        self.chunk_size = max(1, int(chunk_size))
+        self.validation_type = validation_type
+        # Called inside each chunk's transaction, e.g. to record batch progress without a commit of its own
+        self.before_commit = before_commit
+
+        self._rows: List[Dict] = []
+        self._statuses: Dict[int, str] = {}
+        self._fingerprints: Dict[int, Dict] = {}
+        self.rows_written = 0
+        self.providers_written = 0
+        self.transactions = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.flush()
+        else:
+            self.discard()
+
+    @property
+    def pending(self) -> int:
+        """Providers buffered since the last commit"""
+        return len(self._statuses)
+
+    def add(self, provider: Provider, validation_results: Dict, status: Optional[str] = None,
+            fingerprint: Optional[Dict] = None) -> str:
+        """Buffer a provider's results (and ProviderFingerprint values); returns the status it will be given"""
+        status = status or provider_status(validation_results)
+        self._rows.extend(validation_rows(provider.id, validation_results, self.validation_type))
+        self._statuses[provider.id] = status
+        if fingerprint is not None:
+            self._fingerprints[provider.id] = fingerprint
+        if self.pending >= self.chunk_size:
+            self.flush()
+        return status
+
+    def flush(self):
+        """Write everything buffered in one transaction (on failure it is rolled back and stays buffered)"""
+        if not self._statuses and not self._rows:
+            return
+        try:
+            # render_nulls keeps rows with different empty columns in one executemany
+            # instead of splitting the chunk into one INSERT per pattern of NULLs
+            if self._rows:
+                db.session.execute(insert(ValidationResult).execution_options(render_nulls=True), self._rows)
+            provider_ids = list(self._statuses)
+            now = datetime.utcnow()
+            for start in range(0, len(provider_ids), STATUS_UPDATE_SLICE):
+                ids = provider_ids[start:start + STATUS_UPDATE_SLICE]
+                db.session.execute(
+                    update(Provider)
+                    .where(Provider.id.in_(ids))
+                    .values(
+                        status=case({pid: self._statuses[pid] for pid in ids}, value=Provider.id),
+                        updated_at=now
+                    )
+                    .execution_options(synchronize_session=False)
+                )
+            fingerprint_ids = list(self._fingerprints)
+            for start in range(0, len(fingerprint_ids), STATUS_UPDATE_SLICE):
+                db.session.execute(
+                    delete(ProviderFingerprint)
+                    .where(ProviderFingerprint.provider_id.in_(fingerprint_ids[start:start + STATUS_UPDATE_SLICE]))
+                    .execution_options(synchronize_session=False)
+                )
+            if self._fingerprints:
+                db.session.execute(insert(ProviderFingerprint).execution_options(render_nulls=True),
+                                   list(self._fingerprints.values()))
+            if self.before_commit:
+                self.before_commit()
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+        self.rows_written += len(self._rows)
+        self.providers_written += len(self._statuses)
+        self.transactions += 1
+        self._rows = []
+        self._statuses = {}
+        self._fingerprints = {}
+
+    def discard(self):
+        """Drop everything buffered since the last commit"""
+        self._rows = []
+        self._statuses = {}
+        self._fingerprints = {}
+
+    def stats(self) -> Dict:
+        """Return write counters"""
+        return {
+            'chunk_size': self.chunk_size,
+            'rows_written': self.rows_written,
+            'providers_written': self.providers_written,
+            'transactions': self.transactions,
+            'pending_providers': self.pending
+        }
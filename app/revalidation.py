@@ -0,0 +1,146 @@
+"""
+Incremental revalidation planning.
+
+Each successful validation stores a ProviderFingerprint: a hash of the
+fields validation reads (after enrichment) together with the versions of
+the data sources and rules it ran against, when each external source was
+last read, and whether the result had discrepancies. Before an incremental
+batch, RevalidationPlanner compares the selected providers with their
+fingerprints and keeps only those that need work:
+
+- never validated, or validated against other source versions
+- data changed since the last validation
+- NPI evidence older than its TTL, or website evidence older than its TTL
+  for providers with a practice website (a source that was unavailable
+  counts as never read)
+- last result had a discrepancy
+
+Everything else keeps its current status and results.
+"""
+import hashlib
+import json
+import os
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+from app import db
+from app.models import Provider, ProviderFingerprint
+from app.persistence import provider_status
+
+# Fields validation and enrichment read; a change to any of them makes a provider due
+VALIDATED_FIELDS = [
+    'npi', 'first_name', 'last_name', 'middle_name', 'specialty', 'practice_name',
+    'phone', 'email', 'address_line1', 'city', 'state', 'zip_code'
+]
+
+FINGERPRINT_QUERY_SLICE = 500  # provider ids per IN query; keeps bound parameters under SQLite's 999 limit
+
+
+def source_versions(rules_version: str, nppes_index_path: str = '') -> Dict[str, str]:
+    """Versions of the data a validation runs against; when one changes every provider is due"""
+    versions = {'rules': str(rules_version), 'npi': 'registry_api'}
+    if nppes_index_path:
+        try:
+            versions['npi'] = f"nppes:{int(os.path.getmtime(nppes_index_path))}"
+        except OSError:
+            versions['npi'] = 'nppes'
+    return versions
+
+
+def provider_fingerprint(provider, versions: Dict[str, str]) -> str:
+    """sha256 of a provider's validated fields and the source versions"""
+    payload = json.dumps(
+        {'fields': [getattr(provider, name) for name in VALIDATED_FIELDS], 'sources': versions},
+        sort_keys=True, default=str
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class RevalidationPlan(NamedTuple):
+    due: List[Provider]
+    reasons: Dict[int, List[str]]  # provider id -> why it is due
+    skipped: int
+
+    def summary(self) -> Dict:
+        """Counts of due and skipped providers and of each reason"""
+        return {
+            'due': len(self.due),
+            'skipped': self.skipped,
+            'reasons': dict(Counter(reason for reasons in self.reasons.values() for reason in reasons))
+        }
+
+
+class RevalidationPlanner:
+    """
+    Records provider fingerprints and picks the providers an incremental batch has to revalidate
+    """
+
+    def __init__(self, versions: Dict[str, str], npi_ttl_days: float = 30, website_ttl_days: float = 7):
+        self.versions = versions
+        self.npi_ttl = timedelta(days=npi_ttl_days)
+        self.website_ttl = timedelta(days=website_ttl_days)
+
+    def fingerprint(self, provider) -> str:
+        return provider_fingerprint(provider, self.versions)
+
+    def fingerprint_row(self, provider: Provider, validation_results: Dict, evidence,
+                        status: Optional[str] = None, now: Optional[datetime] = None) -> Dict:
+        """ProviderFingerprint column values for a provider just validated from evidence (and enriched)"""
+        now = now or datetime.utcnow()
+        unavailable = set(validation_results.get('unavailable_sources', [])) | set(evidence.unavailable_sources)
+        has_website = evidence.scraped_data is not None
+        return {
+            'provider_id': provider.id,
+            'fingerprint': self.fingerprint(provider),
+            'source_versions': dict(self.versions),
+            'validated_at': now,
+            'npi_checked_at': None if 'npi' in unavailable else now,
+            'website_checked_at': now if has_website and 'website' not in unavailable else None,
+            'has_website': has_website,
+            'status': status or provider_status(validation_results),
+            'has_discrepancy': bool(validation_results.get('discrepancies'))
+        }
+
+    def record(self, provider: Provider, validation_results: Dict, evidence, status: Optional[str] = None):
+        """Store a provider's fingerprint in the session (committed with the caller's transaction)"""
+        db.session.merge(ProviderFingerprint(**self.fingerprint_row(provider, validation_results, evidence, status)))
+
+    def due_reasons(self, provider, stored: Optional[ProviderFingerprint], now: datetime) -> List[str]:
+        """Why a provider needs revalidating (empty if it does not)"""
+        if stored is None:
+            return ['never_validated']
+
+        reasons = []
+        if stored.source_versions != self.versions:
+            reasons.append('source_versions_changed')
+        elif stored.fingerprint != self.fingerprint(provider):
+            reasons.append('data_changed')
+        if stored.npi_checked_at is None or now - stored.npi_checked_at > self.npi_ttl:
+            reasons.append('npi_stale')
+        if stored.has_website and (stored.website_checked_at is None or now - stored.website_checked_at > self.website_ttl):
+            reasons.append('website_stale')
+        if stored.has_discrepancy:
+            reasons.append('discrepancy')
+        return reasons
+
+    def plan(self, providers: Iterable[Provider], now: Optional[datetime] = None) -> RevalidationPlan:
+        """Split providers into those due for revalidation (in the given order) and the rest"""
+        providers = list(providers)
+        now = now or datetime.utcnow()
+        provider_ids = [provider.id for provider in providers]
+
+        stored = {}
+        for start in range(0, len(provider_ids), FINGERPRINT_QUERY_SLICE):
+            ids = provider_ids[start:start + FINGERPRINT_QUERY_SLICE]
+            for fingerprint in ProviderFingerprint.query.filter(ProviderFingerprint.provider_id.in_(ids)):
+                stored[fingerprint.provider_id] = fingerprint
+
+        due = []
+        reasons = {}
+        for provider in providers:
+            provider_reasons = self.due_reasons(provider, stored.get(provider.id), now)
+            if provider_reasons:
+                due.append(provider)
+                reasons[provider.id] = provider_reasons
+        return RevalidationPlan(due, reasons, len(providers) - len(due))
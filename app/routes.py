@@ -1,10 +1,23 @@
 from flask import Blueprint, render_template, request, jsonify, send_file, session
 from app import db
-from app.models import Provider, ValidationResult, ValidationBatch
+from app.models import Provider, ValidationResult, ValidationBatch, IngestionJob
+from app.ingestion import IngestionManager
+from app.persistence import ValidationResultWriter, load_providers, provider_status
+from app.quality_audit import run_format_audit
+from app.revalidation import RevalidationPlanner, source_versions
 from agents.data_validation_agent import DataValidationAgent
 from agents.enrichment_agent import InformationEnrichmentAgent
 from agents.quality_assurance_agent import QualityAssuranceAgent
 from agents.directory_management_agent import DirectoryManagementAgent
+from services import http_fixtures
+from services.npi_service import NPIService
+from services.nppes_index import NPPESIndex
+from services.persistent_cache import PersistentCache
+from services.crawler import CrawlerEngine
+from services.evidence import EvidenceGatherer
+from services.throttling import CircuitBreaker, TokenBucket
+from services.specialty_matcher import shared_matcher
+from services.web_scraper import WebScraper
 from services.pdf_extractor import PDFExtractor
 from services.synthetic_data import generate_provider_dataset, save_providers_to_json
 from config import Config
@@ -12,16 +25,107 @@ from datetime import datetime
 import os
 import json
 import time
-from werkzeug.utils import secure_filename
 
 bp = Blueprint('main', __name__)
 
-# Initialize agents
-data_validation_agent = DataValidationAgent(Config.NPI_API_KEY)
-enrichment_agent = InformationEnrichmentAgent(Config.NPI_API_KEY)
+# Initialize agents (validation and enrichment share one pooled NPI client and scraper)
+npi_service = NPIService(
+    Config.NPI_API_KEY,
+    max_workers=Config.NPI_MAX_WORKERS,
+    pool_size=Config.NPI_POOL_SIZE,
+    timeout=Config.NPI_REQUEST_TIMEOUT,
+    cache=PersistentCache(
+        Config.NPI_CACHE_PATH,
+        namespace='npi',
+        ttl=Config.NPI_CACHE_TTL,
+        max_entries=Config.NPI_CACHE_MAX_ENTRIES
+    ),
+    backend=NPPESIndex(Config.NPPES_INDEX_PATH) if Config.NPPES_INDEX_PATH else None,
+    rate_limiter=TokenBucket(Config.NPI_RATE_LIMIT),
+    circuit_breaker=CircuitBreaker(Config.NPI_CIRCUIT_FAILURE_THRESHOLD, Config.NPI_CIRCUIT_RESET_TIMEOUT),
+    max_retries=Config.NPI_MAX_RETRIES
+)
+web_scraper = WebScraper(
+    CrawlerEngine(
+        max_concurrency=Config.SCRAPER_MAX_CONCURRENCY,
+        per_host_concurrency=Config.SCRAPER_PER_HOST_CONCURRENCY,
+        per_host_delay=Config.SCRAPER_PER_HOST_DELAY,
+        max_bytes=Config.SCRAPER_MAX_PAGE_BYTES,
+        timeout=Config.SCRAPER_TIMEOUT
+    ),
+    page_cache=PersistentCache(
+        Config.SCRAPER_PAGE_CACHE_PATH,
+        namespace='pages',
+        max_entries=Config.SCRAPER_PAGE_CACHE_MAX_ENTRIES
+    ),
+    specialty_matcher=shared_matcher(Config.SPECIALTY_TAXONOMY_PATH)
+)
+
+# Record live traffic to fixtures, or serve it from a local replay server
+if Config.HTTP_FIXTURE_MODE == 'record':
+    fixture_store = http_fixtures.FixtureStore(Config.HTTP_FIXTURE_DIR)
+    http_fixtures.record(npi_service.session, fixture_store)
+    http_fixtures.record(web_scraper.session, fixture_store)
+elif Config.HTTP_FIXTURE_MODE == 'replay':
+    http_fixtures.replay(npi_service.session, Config.HTTP_REPLAY_URL)
+    http_fixtures.replay(web_scraper.session, Config.HTTP_REPLAY_URL)
+
+# Registry records and practice websites are fetched once per provider and read by both agents
+evidence_gatherer = EvidenceGatherer(
+    npi_service,
+    web_scraper,
+    max_concurrency=Config.MAX_CONCURRENT_VALIDATIONS,
+    timeout=Config.VALIDATION_TIMEOUT
+)
+data_validation_agent = DataValidationAgent(
+    npi_service=npi_service,
+    web_scraper=web_scraper,
+    evidence_gatherer=evidence_gatherer
+)
+enrichment_agent = InformationEnrichmentAgent(
+    npi_service=npi_service,
+    web_scraper=web_scraper,
+    evidence_gatherer=evidence_gatherer
+)
 qa_agent = QualityAssuranceAgent(Config.CONFIDENCE_THRESHOLD)
+revalidation_planner = RevalidationPlanner(
+    source_versions(Config.VALIDATION_RULES_VERSION, Config.NPPES_INDEX_PATH),
+    npi_ttl_days=Config.REVALIDATION_NPI_TTL_DAYS,
+    website_ttl_days=Config.REVALIDATION_WEBSITE_TTL_DAYS
+)
 directory_agent = DirectoryManagementAgent()
-pdf_extractor = PDFExtractor(Config.OPENAI_API_KEY)
+pdf_extractor = PDFExtractor(
+    Config.OPENAI_API_KEY,
+    ocr_workers=Config.PDF_OCR_WORKERS,
+    dpi=Config.PDF_DPI,
+    page_window=Config.PDF_PAGE_WINDOW,
+    vlm_concurrency=Config.PDF_VLM_CONCURRENCY,
+    vlm_max_dimension=Config.PDF_VLM_MAX_DIMENSION,
+    stop_when_complete=Config.PDF_STOP_WHEN_COMPLETE,
+    min_field_confidence=Config.PDF_MIN_FIELD_CONFIDENCE,
+    prioritize_pages=Config.PDF_PRIORITIZE_PAGES,
+    ocr_preprocess=Config.PDF_OCR_PREPROCESS,
+    ocr_regions=Config.PDF_OCR_REGIONS,
+    tesseract_config=Config.PDF_TESSERACT_CONFIG,
+    skip_blank_pages=Config.PDF_SKIP_BLANK_PAGES,
+    cache=PersistentCache(
+        Config.PDF_EXTRACTION_CACHE_PATH,
+        namespace='extractions',
+        max_bytes=Config.PDF_EXTRACTION_CACHE_MAX_BYTES
+    )
+)
+
+ingestion_manager = IngestionManager(
+    pdf_extractor,
+    Config.INGEST_STORAGE_FOLDER,
+    workers=Config.INGEST_WORKERS,
+    watch_folder=Config.INGEST_WATCH_FOLDER,
+    poll_interval=Config.INGEST_POLL_INTERVAL,
+    allowed_extensions=Config.ALLOWED_EXTENSIONS,
+    use_vlm=Config.INGEST_USE_VLM,
+    auto_stage=Config.INGEST_AUTO_STAGE,
+    stale_after=Config.INGEST_STALE_AFTER
+)
 
 # Ensure upload directory exists
 os.makedirs(Config.UPLOAD_FOLDER, exist_ok=True)
@@ -131,12 +235,14 @@ def api_validate_provider(provider_id):
     """API endpoint to validate a single provider"""
     provider = Provider.query.get_or_404(provider_id)
     
-    # Run validation
-    validation_results = data_validation_agent.validate_provider_contact(provider)
-    data_validation_agent.save_validation_results(provider, validation_results)
+    # Fetch the registry record and practice website once; validation and enrichment both read it
+    evidence = evidence_gatherer.gather(provider)
+    validation_results = data_validation_agent.validate_from_evidence(evidence)
+    enrichment_results = enrichment_agent.enrich_from_evidence(evidence)
     
-    # Run enrichment
-    enrichment_results = enrichment_agent.enrich_provider_info(provider)
+    data_validation_agent.save_validation_results(provider, validation_results)
+    enrichment_agent.apply_enrichment(provider, enrichment_results)
+    revalidation_planner.record(provider, validation_results, evidence)
     enrichment_agent.save_enrichment_results(provider, enrichment_results)
     
     # Get updated provider
@@ -155,11 +261,19 @@ def api_batch_validate():
         data = request.json or {}
         provider_ids = data.get('provider_ids', [])
         batch_name = data.get('batch_name', f'Batch_{datetime.now().strftime("%Y%m%d_%H%M%S")}')
+        incremental = data.get('incremental', False)
+        
+        # The batch's providers stay loaded across the chunk commits below rather than being
+        # expired and reloaded one by one (the session is discarded at the end of the request)
+        db.session().expire_on_commit = False
         
         if not provider_ids:
-            # Get all pending providers
-            providers = Provider.query.filter_by(status='pending').all()
-            provider_ids = [p.id for p in providers]
+            # Get all pending providers (incremental runs consider the whole directory)
+            query = Provider.query if incremental else Provider.query.filter_by(status='pending')
+            batch_providers = query.all()
+            provider_ids = [p.id for p in batch_providers]
+        else:
+            batch_providers = load_providers(provider_ids)
         
         if not provider_ids:
             return jsonify({
@@ -167,6 +281,21 @@ def api_batch_validate():
                 'batch_id': None
             }), 400
         
+        revalidation = None
+        if incremental:
+            # Only providers whose data changed, whose evidence expired or whose last result had a discrepancy
+            plan = revalidation_planner.plan(batch_providers)
+            revalidation = plan.summary()
+            batch_providers = plan.due
+            provider_ids = [p.id for p in batch_providers]
+            if not provider_ids:
+                return jsonify({
+                    'batch_id': None,
+                    'batch_name': batch_name,
+                    'processed': 0,
+                    'revalidation': revalidation
+                })
+        
         # Create batch
         batch = directory_agent.create_validation_batch(batch_name, provider_ids)
         batch.started_at = datetime.utcnow()
@@ -182,42 +311,44 @@ def api_batch_validate():
         
         start_time = time.time()
         
-        for provider_id in provider_ids[:200]:  # Limit to 200 for demo
+        batch_id = batch.id
+        
+        # Results, status changes, enrichment and batch progress are committed together, one transaction per chunk
+        def record_progress():
+            avg_confidence = sum(confidence_scores) / len(confidence_scores) if confidence_scores else 0
+            directory_agent.update_batch_progress(batch_id, processed, validated, needs_review, avg_confidence, commit=False)
+        
+        result_writer = ValidationResultWriter(Config.VALIDATION_WRITE_CHUNK_SIZE, before_commit=record_progress)
+        
+        # NPI lookups and website scrapes run concurrently (MAX_CONCURRENT_VALIDATIONS providers at a
+        # time); each provider is checked and enriched here as soon as its own evidence is in
+        for provider, evidence in evidence_gatherer.gather_many(batch_providers):
+            provider_id = provider.id
             try:
-                provider = Provider.query.get(provider_id)
-                if not provider:
-                    continue
-                
-                # Validate
-                validation_results = data_validation_agent.validate_provider_contact(provider)
-                data_validation_agent.save_validation_results(provider, validation_results)
-                
-                # Enrich
-                enrichment_results = enrichment_agent.enrich_provider_info(provider)
-                enrichment_agent.save_enrichment_results(provider, enrichment_results)
-                
-                # Update counts
-                processed += 1
-                confidence = validation_results.get('overall_confidence', 0.5)
-                confidence_scores.append(confidence)
-                
-                # Refresh provider from database
-                db.session.refresh(provider)
-                if provider.status == 'validated':
-                    validated += 1
-                elif provider.status == 'needs_review':
-                    needs_review += 1
-                
-                # Update batch progress periodically
-                if processed % 10 == 0:
-                    avg_confidence = sum(confidence_scores) / len(confidence_scores) if confidence_scores else 0
-                    directory_agent.update_batch_progress(batch.id, processed, validated, needs_review, avg_confidence)
-                    
+                validation_results = data_validation_agent.validate_from_evidence(evidence)
+                enrichment_agent.apply_enrichment(provider, enrichment_agent.enrich_from_evidence(evidence))
+                status = provider_status(validation_results)
+                fingerprint = revalidation_planner.fingerprint_row(provider, validation_results, evidence, status)
             except Exception as e:
                 errors.append(f"Provider {provider_id}: {str(e)}")
                 processed += 1  # Count as processed even if failed
                 confidence_scores.append(0.3)  # Low confidence for errors
                 continue
+            
+            # Update counts
+            processed += 1
+            confidence = validation_results.get('overall_confidence', 0.5)
+            confidence_scores.append(confidence)
+            if status == 'validated':
+                validated += 1
+            elif status == 'needs_review':
+                needs_review += 1
+            
+            # Outside the per-provider handler: a failed chunk write has rolled back the whole
+            # chunk, enrichment and progress included, so it fails the batch rather than one provider
+            result_writer.add(provider, validation_results, status, fingerprint)
+        
+        result_writer.flush()
         
         # Final update - ensure batch is marked as completed
         avg_confidence = sum(confidence_scores) / len(confidence_scores) if confidence_scores else 0
@@ -245,10 +376,15 @@ def api_batch_validate():
             'needs_review': needs_review,
             'average_confidence': avg_confidence,
             'processing_time_seconds': processing_time,
+            'revalidation': revalidation,
             'errors': errors[:5] if errors else []  # Return first 5 errors if any
         })
         
     except Exception as e:
+        db.session.rollback()
+        if 'result_writer' in locals():
+            result_writer.discard()
+        
         # If batch was created, mark it as failed
         if 'batch' in locals() and batch:
             batch.status = 'failed'
@@ -375,11 +511,16 @@ def api_assess_quality():
         assessment = qa_agent.assess_provider_quality(provider)
         return jsonify(assessment)
     else:
-        # Assess all providers
-        providers = Provider.query.all()
-        report = qa_agent.generate_quality_report(providers)
+        # Assess all providers (SQL aggregates instead of a query per provider)
+        report = qa_agent.generate_directory_report()
         return jsonify(report)
 
+@bp.route('/api/quality/format-audit', methods=['GET'])
+def api_format_audit():
+    """API endpoint to audit phone, email and ZIP formats and completeness across all providers"""
+    chunk_size = request.args.get('chunk_size', Config.QUALITY_AUDIT_CHUNK_SIZE, type=int)
+    return jsonify(run_format_audit(max(1, chunk_size)))
+
 @bp.route('/api/quality/prioritize', methods=['GET'])
 def api_prioritize_review():
     """API endpoint to get prioritized list for review"""
@@ -387,6 +528,26 @@ def api_prioritize_review():
     prioritized = qa_agent.prioritize_providers_for_review(providers, limit=50)
     return jsonify({'prioritized': prioritized})
 
+@bp.route('/api/npi/cache', methods=['GET'])
+def api_npi_cache_stats():
+    """API endpoint to get NPI response cache statistics"""
+    return jsonify(npi_service.cache_stats())
+
+@bp.route('/api/npi/stats', methods=['GET'])
+def api_npi_stats():
+    """API endpoint to get NPI client statistics (cache, retries, throttling, circuit state)"""
+    return jsonify(npi_service.stats())
+
+@bp.route('/api/scraper/stats', methods=['GET'])
+def api_scraper_stats():
+    """API endpoint to get web scraper statistics"""
+    return jsonify(web_scraper.stats())
+
+@bp.route('/api/pdf/cache', methods=['GET'])
+def api_pdf_cache_stats():
+    """API endpoint to get PDF/image extraction cache statistics"""
+    return jsonify(pdf_extractor.cache_stats())
+
 @bp.route('/api/providers/<int:provider_id>/email', methods=['GET'])
 def api_generate_email(provider_id):
     """API endpoint to generate email template"""
@@ -406,16 +567,17 @@ def api_upload_pdf():
         return jsonify({'error': 'No file selected'}), 400
     
     if file and file.filename.lower().endswith('.pdf'):
-        filename = secure_filename(file.filename)
-        filepath = os.path.join(Config.UPLOAD_FOLDER, filename)
+        # Unique name so concurrent uploads of the same file name do not overwrite each other
+        filepath = ingestion_manager.unique_path(file.filename)
         file.save(filepath)
         
         # Extract data
         use_vlm = request.form.get('use_vlm', 'true').lower() == 'true'
-        extraction_result = pdf_extractor.extract_from_pdf(filepath, use_vlm=use_vlm)
-        
-        # Clean up file
-        os.remove(filepath)
+        try:
+            extraction_result = pdf_extractor.extract_from_pdf(filepath, use_vlm=use_vlm)
+        finally:
+            # Clean up file
+            os.remove(filepath)
         
         if extraction_result.get('success'):
             return jsonify(extraction_result)
@@ -424,6 +586,42 @@ def api_upload_pdf():
     
     return jsonify({'error': 'Invalid file type'}), 400
 
+@bp.route('/api/ingest', methods=['POST'])
+def api_ingest():
+    """API endpoint to queue many PDFs/images for background extraction; returns immediately"""
+    files = request.files.getlist('files') + request.files.getlist('file')
+    if not files:
+        return jsonify({'error': 'No files provided'}), 400
+    
+    use_vlm = request.form.get('use_vlm', 'true').lower() == 'true'
+    auto_stage = request.form.get('auto_stage')
+    auto_stage = None if auto_stage is None else auto_stage.lower() == 'true'
+    
+    submission = ingestion_manager.submit_uploads(files, use_vlm=use_vlm, auto_stage=auto_stage)
+    if not submission['jobs']:
+        return jsonify({'error': 'No supported files provided', 'rejected': submission['rejected']}), 400
+    
+    return jsonify(submission), 202
+
+@bp.route('/api/ingest/jobs/<int:job_id>', methods=['GET'])
+def api_ingest_job(job_id):
+    """API endpoint to get an ingestion job's status and extraction result"""
+    job = IngestionJob.query.get_or_404(job_id)
+    return jsonify(job.to_dict())
+
+@bp.route('/api/ingest/batches/<batch_id>', methods=['GET'])
+def api_ingest_batch(batch_id):
+    """API endpoint to get the progress of an ingestion batch"""
+    status = ingestion_manager.batch_status(batch_id)
+    if status is None:
+        return jsonify({'error': 'Batch not found'}), 404
+    return jsonify(status)
+
+@bp.route('/api/ingest/stats', methods=['GET'])
+def api_ingest_stats():
+    """API endpoint to get ingestion queue statistics"""
+    return jsonify(ingestion_manager.stats())
+
 @bp.route('/api/synthetic/generate', methods=['POST'])
 def api_generate_synthetic():
     """API endpoint to generate synthetic provider data"""
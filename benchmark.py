@@ -0,0 +1,634 @@
+"""
+Benchmark script for the Provider Directory Management System.
+
+Runs offline against synthetic data and the local HTTP replay server, so
+results are repeatable without network access or API keys.
+
+Usage:
+    python benchmark.py npi --count 2000 --latency 0.15 --error-rate 0.02 --rate-limit 200
+    python benchmark.py html --paragraphs 5000
+    python benchmark.py ocr --pages 40 --workers 8
+    python benchmark.py vlm --pages 20 --latency 1.0
+    python benchmark.py ocr-preprocess --pages 10
+    python benchmark.py ocr-parse --pages 200
+    python benchmark.py persist --providers 2000 --chunk-size 50 200 1000
+    python benchmark.py audit --providers 100000 --chunk-size 50000
+    python benchmark.py report --providers 5000
+"""
+import argparse
+import math
+import os
+import random
+import re
+import tempfile
+import time
+
+from bs4 import BeautifulSoup
+from flask import Flask
+from sqlalchemy import event, insert
+
+from agents.data_validation_agent import DataValidationAgent
+from agents.quality_assurance_agent import QualityAssuranceAgent
+from app import db
+from app.models import Provider, ValidationResult
+from app.persistence import ValidationResultWriter, validation_rows
+from app.quality_audit import iter_quality_records, run_format_audit
+from services.html_extraction import PARSERS, HTMLExtractor
+from services.http_fixtures import FixtureStore, ReplayServer, replay
+from services.npi_service import NPIService
+from services.ocr_parser import parse_ocr_text
+from services.pdf_extractor import FieldCompletionTracker, PDFExtractor, _ocr_image
+from services.synthetic_data import generate_provider_dataset
+from services.throttling import CircuitBreaker, TokenBucket
+from services.vlm_stub import StubVLMClient
+
+
+def _synthetic_npi_record(npi: str) -> dict:
+    """Registry-shaped result for a synthetic provider"""
+    return {
+        'number': npi,
+        'enumeration_type': 'NPI-1',
+        'basic': {'first_name': 'JANE', 'last_name': f'DOE{npi[-4:]}', 'credential': 'MD'},
+        'addresses': [{
+            'address_purpose': 'LOCATION',
+            'address_1': f'{random.randint(1, 9999)} MAIN ST',
+            'city': 'AUSTIN',
+            'state': 'TX',
+            'postal_code': '78701',
+            'telephone_number': '512-555-0100'
+        }],
+        'taxonomies': [{'code': '207R00000X', 'desc': 'Internal Medicine', 'primary': True}],
+        'practiceLocations': []
+    }
+
+
+def bench_npi(args):
+    """Measure concurrent NPI lookup throughput against the replay server"""
+    random.seed(args.seed)
+    npis = [str(1000000000 + i) for i in range(args.count)]
+
+    store = FixtureStore(tempfile.mkdtemp(prefix='npi_fixtures_'))
+    for npi in npis:
+        store.save_json('GET', f"{NPIService.BASE_URL}?version=2.1&number={npi}",
+                        {'result_count': 1, 'results': [_synthetic_npi_record(npi)]})
+
+    server = ReplayServer(
+        store,
+        latency=(args.latency * 0.5, args.latency * 1.5),
+        error_rate=args.error_rate,
+        rate_limit=args.rate_limit,
+        seed=args.seed
+    )
+    with server:
+        service = NPIService(
+            max_workers=args.workers,
+            pool_size=args.workers,
+            rate_limiter=TokenBucket(args.client_rate),
+            circuit_breaker=CircuitBreaker(failure_threshold=args.count),
+            max_retries=args.retries
+        )
+        service.RETRY_BASE_DELAY = 0.05
+        replay(service.session, server.url)
+
+        found = unavailable = 0
+        start = time.perf_counter()
+        for npi, record in service.lookup_many(npis):
+            if isinstance(record, Exception):
+                unavailable += 1
+            elif record:
+                found += 1
+        elapsed = time.perf_counter() - start
+
+    print(f"NPI lookups: {args.count} in {elapsed:.2f}s "
+          f"({args.count / elapsed:.1f}/s, {args.count / elapsed * 3600:,.0f}/hour)")
+    print(f"  found={found} unavailable={unavailable}")
+    print(f"  client: {service.stats()}")
+    print(f"  server: {server.counters}")
+
+
+def _synthetic_practice_page(paragraphs: int) -> bytes:
+    """Large practice website with contact details in the footer"""
+    filler = ('Our board-certified physicians provide compassionate care for patients of all ages. '
+              'Visit us for annual physicals, chronic disease management and same-day appointments. ')
+    body = ''.join(f'<div class="section"><h2>Service {i}</h2><p>{filler}</p></div>' for i in range(paragraphs))
+    return (
+        '<html><head><script>var tracking = "1234567890";</script></head><body>'
+        f'<nav>Home | Services | Contact</nav>{body}'
+        '<footer><address itemscope itemtype="https://schema.org/PostalAddress">'
+        '<span itemprop="streetAddress">1200 Congress Avenue</span>, '
+        '<span itemprop="addressLocality">Austin</span>, <span itemprop="addressRegion">TX</span> '
+        '<span itemprop="postalCode">78701</span></address>'
+        '<a href="tel:512-555-0100">(512) 555-0100</a> <a href="mailto:office@example.com">Email us</a>'
+        '<p>Cardiology and Internal Medicine</p></footer></body></html>'
+    ).encode()
+
+
+def _baseline_parse(content: bytes) -> dict:
+    """The original html.parser + per-call regex extraction, for comparison"""
+    soup = BeautifulSoup(content, 'html.parser')
+    phone_pattern = re.compile(r'(\+?1?[-.\s]?\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4})')
+    email_pattern = re.compile(r'[\w\.-]+@[\w\.-]+\.\w+')
+    text = soup.get_text()
+    phones = phone_pattern.findall(text)
+    emails = email_pattern.findall(text)
+    re.findall(r'(\d+\s+[\w\s]+(?:Street|St|Avenue|Ave|Road|Rd|Drive|Dr)[\s,]+[\w\s,]+(?:TX|CA|NY)[\s,]+(?:\d{5}))',
+               text, re.IGNORECASE)
+    return {'phone': phones[0] if phones else None, 'email': emails[0] if emails else None}
+
+
+def bench_html(args):
+    """Measure per-page extraction time on a large synthetic page"""
+    content = _synthetic_practice_page(args.paragraphs)
+    print(f"Page size: {len(content) / 1024:.0f} KiB, {args.repeat} runs each")
+
+    def timed(label, func):
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            result = func(content)
+        per_page = (time.perf_counter() - start) / args.repeat
+        print(f"  {label:<28} {per_page * 1000:8.1f} ms/page  phone={result.get('phone')!r}")
+
+    timed('baseline (html.parser)', _baseline_parse)
+    for parser in PARSERS:
+        try:
+            extractor = HTMLExtractor(parser)
+            extractor.extract(b'<html></html>')
+        except Exception as e:
+            print(f"  {parser:<28} unavailable ({e})")
+            continue
+        timed(f'HTMLExtractor ({parser})', extractor.extract)
+
+
+def _synthetic_credentialing_pdf(path: str, pages: int):
+    """Multi-page text PDF standing in for a scanned credentialing packet"""
+    from reportlab.lib.pagesizes import letter
+    from reportlab.pdfgen import canvas
+
+    pdf = canvas.Canvas(path, pagesize=letter)
+    for page in range(1, pages + 1):
+        lines = [f'Credentialing Packet - Page {page}', 'Name: Jane Marie Doe', 'NPI: 1234567893',
+                 'Phone: (512) 555-0100', 'Email: jane.doe@example.com',
+                 '1200 Congress Avenue, Austin, TX 78701', 'Specialty: Internal Medicine', 'License: TX12345']
+        y = 720
+        for line in lines * 3:
+            pdf.drawString(72, y, line)
+            y -= 24
+        pdf.showPage()
+    pdf.save()
+
+
+def bench_ocr(args):
+    """Compare serial and process-pool OCR throughput on one PDF"""
+    pdf_path = args.pdf
+    if not pdf_path:
+        pdf_path = os.path.join(tempfile.mkdtemp(prefix='ocr_bench_'), 'packet.pdf')
+        _synthetic_credentialing_pdf(pdf_path, args.pages)
+
+    runs = [(workers, False) for workers in sorted({1, args.workers})] + [(args.workers, True)]
+    results = {}
+    for workers, use_text_layer in runs:
+        extractor = PDFExtractor(ocr_workers=workers, dpi=args.dpi, use_text_layer=use_text_layer)
+        start = time.perf_counter()
+        result = extractor.extract_from_pdf(pdf_path, use_vlm=False)
+        elapsed = time.perf_counter() - start
+        extractor.close()
+        label = f"workers={workers:<3} text layer {'on ' if use_text_layer else 'off'}"
+        if not result['success']:
+            print(f"  {label}: failed ({result['error']})")
+            return
+        results[(workers, use_text_layer)] = result['data']
+        pages = result['pages_processed']
+        print(f"  {label} {pages} pages in {elapsed:.2f}s ({pages / elapsed:.2f} pages/s, "
+              f"{result['text_layer_pages']} from text layer)")
+    print(f"  OCR output identical across worker counts: "
+          f"{all(data == results[(1, False)] for (_, text), data in results.items() if not text)}")
+
+
+def _synthetic_page_images(pages: int, dpi: int):
+    """Letter-size page scans at the given DPI with a few lines of form text"""
+    from PIL import Image, ImageDraw
+
+    size = (int(8.5 * dpi), int(11 * dpi))
+    images = []
+    for page in range(1, pages + 1):
+        image = Image.new('RGB', size, 'white')
+        draw = ImageDraw.Draw(image)
+        for line in range(40):
+            draw.text((dpi, dpi + line * dpi // 6), f'Page {page} line {line}: Name: Jane Doe NPI: 1234567893',
+                      fill='black')
+        images.append(image)
+    return images
+
+
+def bench_vlm(args):
+    """Compare the original serial full-resolution PNG VLM path with the concurrent downscaled pipeline"""
+    images = _synthetic_page_images(args.pages, args.dpi)
+    configs = [
+        ('serial, full-size PNG', dict(vlm_concurrency=1, vlm_max_dimension=0, vlm_image_format='PNG',
+                                       stop_when_complete=False)),
+        (f'concurrent x{args.concurrency}, JPEG', dict(vlm_concurrency=args.concurrency, stop_when_complete=False)),
+        (f'concurrent x{args.concurrency}, JPEG, skip', dict(vlm_concurrency=args.concurrency)),
+    ]
+    for label, options in configs:
+        client = StubVLMClient(latency=(args.latency * 0.5, args.latency * 1.5), fill_rate=args.fill_rate,
+                               seed=args.seed)
+        extractor = PDFExtractor(openai_client=client, **options)
+        start = time.perf_counter()
+        tracker = FieldCompletionTracker(extractor.required_fields)
+        results, pages = extractor._extract_pages_with_vlm(enumerate(images, start=1), tracker)
+        elapsed = time.perf_counter() - start
+        sent = sum(page['bytes'] for page in pages)
+        print(f"  {label:<32} {len(pages):>3} pages sent in {elapsed:6.2f}s, "
+              f"{sent / len(pages) / 1024:8.0f} KiB/page, complete={tracker.complete}, client={client.stats()}")
+
+
+OCR_GROUND_TRUTH = {
+    'first_name': 'Jane', 'last_name': 'Doe', 'npi': '1234567893', 'email': 'jane.doe@example.com',
+    'address_line1': '1200 Congress Avenue', 'city': 'Austin', 'state': 'TX', 'zip_code': '78701',
+    'license_number': 'TX12345',
+}
+
+
+def _synthetic_scans(pages: int, dpi: int, seed: int):
+    """Noisy, slightly skewed page scans of a provider form; every fifth page is blank"""
+    from PIL import Image, ImageDraw, ImageFont
+
+    rng = random.Random(seed)
+    font = ImageFont.load_default(size=dpi // 7)
+    size = (int(8.5 * dpi), int(11 * dpi))
+    truth = OCR_GROUND_TRUTH
+    lines = [
+        f"Name: {truth['first_name']} {truth['last_name']}", f"NPI: {truth['npi']}",
+        f"Email: {truth['email']}",
+        f"{truth['address_line1']}, {truth['city']}, {truth['state']} {truth['zip_code']}",
+        f"License: {truth['license_number']}",
+    ]
+    scans = []
+    for page in range(1, pages + 1):
+        image = Image.new('RGB', size, (245, 243, 238))
+        draw = ImageDraw.Draw(image)
+        if page % 5:
+            for index, line in enumerate(lines):
+                draw.text((dpi, dpi + index * dpi // 3), line, fill=(30, 30, 30), font=font)
+        for _ in range(size[0] * size[1] // 2000):
+            x, y = rng.randrange(size[0]), rng.randrange(size[1])
+            draw.point((x, y), fill=(90, 90, 90))
+        scans.append(image.rotate(rng.uniform(-3, 3), fillcolor=(245, 243, 238)))
+    return scans
+
+
+def bench_ocr_preprocess(args):
+    """Per-page OCR time and field accuracy with and without preprocessing"""
+    scans = _synthetic_scans(args.pages, args.dpi, args.seed)
+    parser = PDFExtractor()
+    configs = [
+        ('raw page, default settings', {'tesseract_config': ''}),
+        ('preprocessed', {'preprocess': True, 'deskew': True, 'skip_blank': True,
+                          'tesseract_config': args.tesseract_config}),
+        ('preprocessed, text regions', {'preprocess': True, 'deskew': True, 'regions': True, 'skip_blank': True}),
+    ]
+    for label, options in configs:
+        seconds = []
+        correct = expected = blank = 0
+        for image in scans:
+            result = _ocr_image(image, options)
+            seconds.append(result['seconds'])
+            if result['blank']:
+                blank += 1
+                continue
+            fields = parser._parse_ocr_text(result['text'])
+            expected += len(OCR_GROUND_TRUTH)
+            correct += sum(1 for field, value in OCR_GROUND_TRUTH.items() if fields.get(field) == value)
+        accuracy = correct / expected if expected else 0.0
+        print(f"  {label:<28} {sum(seconds) / len(seconds) * 1000:7.0f} ms/page (max {max(seconds) * 1000:.0f}), "
+              f"{blank} blank skipped, field accuracy {accuracy:.1%}")
+
+
+def _baseline_ocr_parse(text: str) -> dict:
+    """The original per-field regex searches over OCR text, for comparison"""
+    data = {}
+    phones = re.findall(r'(\+?1?[-.\s]?\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4})', text)
+    if phones:
+        data['phone'] = phones[0]
+    emails = re.findall(r'[\w\.-]+@[\w\.-]+\.\w+', text)
+    if emails:
+        data['email'] = emails[0]
+    npi_match = re.search(r'NPI[:\s]*(\d{10})', text, re.IGNORECASE)
+    if npi_match:
+        data['npi'] = npi_match.group(1)
+    for pattern in [r'Name[:\s]+([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)', r'Provider[:\s]+([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)',
+                    r'Dr\.\s+([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)']:
+        match = re.search(pattern, text)
+        if match:
+            name_parts = match.group(1).split()
+            if len(name_parts) >= 2:
+                data['first_name'] = name_parts[0]
+                data['last_name'] = name_parts[-1]
+                if len(name_parts) > 2:
+                    data['middle_name'] = ' '.join(name_parts[1:-1])
+            break
+    addr_match = re.search(r'(\d+\s+[\w\s]+(?:Street|St|Avenue|Ave|Road|Rd|Drive|Dr)[\s,]+[\w\s,]+(?:[A-Z]{2})[\s,]+(?:\d{5}(?:-\d{4})?))',
+                           text, re.IGNORECASE)
+    if addr_match:
+        parts = addr_match.group(1).split(',')
+        if len(parts) >= 2:
+            data['address_line1'] = parts[0].strip()
+            data['city'] = parts[1].strip()
+            if len(parts) >= 3:
+                state_zip = parts[2].strip().split()
+                if len(state_zip) >= 2:
+                    data['state'] = state_zip[0]
+                    data['zip_code'] = state_zip[1]
+    for keyword in ['Specialty', 'Specialization', 'Practice']:
+        match = re.search(f'{keyword}[:\\s]+([A-Z][a-z]+(?:\\s+[A-Z][a-z]+)*)', text)
+        if match:
+            data['specialty'] = match.group(1)
+            break
+    license_match = re.search(r'License[:\s]*([A-Z0-9]+)', text, re.IGNORECASE)
+    if license_match:
+        data['license_number'] = license_match.group(1)
+    return data
+
+
+def _synthetic_ocr_pages(pages: int, seed: int):
+    """OCR-like page texts: form boilerplate and numbers with provider fields scattered through"""
+    rng = random.Random(seed)
+    words = ('the patient provider credentialing form page section board certified hospital '
+             'affiliation date signature attest privileges malpractice coverage').split()
+    texts = []
+    for page in range(pages):
+        lines = []
+        for _ in range(60):
+            roll = rng.random()
+            if roll < 0.03:
+                lines.append(f"Phone: ({rng.randint(200, 999)}) 555-{rng.randint(1000, 9999)}")
+            elif roll < 0.05:
+                lines.append(f"{rng.randint(1, 9999)} {rng.choice(['Main', 'Oak', 'Congress'])} "
+                             f"{rng.choice(['Street', 'Ave', 'Road'])}, Austin, TX {rng.randint(10000, 99999)}")
+            elif roll < 0.06:
+                lines.append(f"NPI: {rng.randint(10 ** 9, 10 ** 10 - 1)}")
+            elif roll < 0.07:
+                lines.append(f"{rng.choice(['Name', 'Provider', 'Dr.'])}: {rng.choice(['Jane', 'John'])} "
+                             f"{rng.choice(['Doe', 'Smith'])}")
+            elif roll < 0.08:
+                lines.append(f"{rng.choice(['Specialty', 'Practice'])}: Internal Medicine")
+            elif roll < 0.085:
+                lines.append(f"License: TX{rng.randint(1000, 99999)}  Email: provider{page}@example.com")
+            else:
+                lines.append(' '.join(rng.choice(words + [str(rng.randint(1, 2000))]) for _ in range(10)))
+        texts.append('\n'.join(lines))
+    return texts
+
+
+def bench_ocr_parse(args):
+    """Per-page and whole-document OCR text parsing time, original searches vs the single-pass parser"""
+    pages = _synthetic_ocr_pages(args.pages, args.seed)
+    dump = '\n\f'.join(pages)
+    mismatches = sum(1 for text in pages + [dump] if _baseline_ocr_parse(text) != parse_ocr_text(text))
+    print(f"{len(pages)} pages, {len(dump) / 1024:.0f} KiB dump, {args.repeat} runs each, "
+          f"{mismatches} result mismatches")
+
+    for label, func in [('original per-field searches', _baseline_ocr_parse), ('single-pass parser', parse_ocr_text)]:
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            for text in pages:
+                func(text)
+        per_page = (time.perf_counter() - start) / (args.repeat * len(pages))
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            func(dump)
+        per_dump = (time.perf_counter() - start) / args.repeat
+        print(f"  {label:<28} {per_page * 1000:7.2f} ms/page  {per_dump * 1000:8.1f} ms/document")
+
+
+def _quality_results(agent: DataValidationAgent, provider: Provider) -> dict:
+    """Offline validation result for a provider (format and completeness checks only)"""
+    validations = agent._validate_data_quality(provider)
+    return {
+        'provider_id': provider.id,
+        'validations': validations,
+        'overall_confidence': sum(v['confidence_score'] for v in validations) / len(validations),
+        'discrepancies': [v for v in validations if v['status'] == 'discrepancy'],
+        'unavailable_sources': []
+    }
+
+
+def bench_persist(args):
+    """Committed validation rows per second: a commit per save vs chunked bulk writes (SQLite)"""
+    with tempfile.TemporaryDirectory() as tmp:
+        app = Flask(__name__)
+        app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        db.init_app(app)
+        with app.app_context():
+            db.create_all()
+            random.seed(args.seed)
+            providers = [Provider(**data, status='pending') for data in generate_provider_dataset(args.providers, 0.4)]
+            db.session.add_all(providers)
+            db.session.commit()
+            agent = DataValidationAgent()
+            results = [(provider, _quality_results(agent, provider)) for provider in providers]
+            rows = sum(len(result['validations']) for _, result in results)
+            print(f"{len(providers)} providers, {rows} validation rows per run")
+
+            def reset():
+                ValidationResult.query.delete()
+                Provider.query.update({'status': 'pending'})
+                db.session.commit()
+
+            def snapshot():
+                statuses = sorted(db.session.query(Provider.id, Provider.status).all())
+                stored = db.session.query(ValidationResult.provider_id, ValidationResult.field_name,
+                                          ValidationResult.confidence_score, ValidationResult.status)
+                return statuses, sorted(stored.all())
+
+            def timed(label, run):
+                reset()
+                start = time.perf_counter()
+                transactions = run()
+                elapsed = time.perf_counter() - start
+                print(f"  {label:<32} {elapsed:7.2f} s  {rows / elapsed:9.0f} rows/s  {transactions} transactions")
+                return snapshot()
+
+            def per_provider():
+                for provider, result in results:
+                    agent.save_validation_results(provider, result)
+                    db.session.commit()  # save_enrichment_results
+                return 2 * len(results)
+
+            baseline = timed('commit per save (original)', per_provider)
+            for chunk_size in args.chunk_size:
+                def chunked():
+                    with ValidationResultWriter(chunk_size) as writer:
+                        for provider, result in results:
+                            writer.add(provider, result)
+                    return writer.transactions
+                same = timed(f'ValidationResultWriter({chunk_size})', chunked) == baseline
+                print(f"  {'':<32} stored rows and statuses {'identical' if same else 'DIFFER'}")
+
+
+def bench_audit(args):
+    """Full-directory format audit: per-provider checks vs the columnar audit (SQLite)"""
+    with tempfile.TemporaryDirectory() as tmp:
+        app = Flask(__name__)
+        app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        db.init_app(app)
+        with app.app_context():
+            db.create_all()
+            random.seed(args.seed)
+            profiles = generate_provider_dataset(args.profiles, 0.4)
+            columns = [column.name for column in Provider.__table__.columns if column.name not in ('id', 'npi')]
+            rows = [
+                {name: value for name, value in profiles[index % len(profiles)].items() if name in columns}
+                for index in range(args.providers)
+            ]
+            for start in range(0, len(rows), 10000):
+                db.session.execute(insert(Provider), [dict(row, status='pending') for row in rows[start:start + 10000]])
+            db.session.commit()
+            print(f"{args.providers} providers ({args.profiles} distinct profiles)")
+
+            def timed(label, run):
+                start = time.perf_counter()
+                result = run()
+                elapsed = time.perf_counter() - start
+                print(f"  {label:<36} {elapsed:7.2f} s  {args.providers / elapsed:10.0f} providers/s")
+                return result
+
+            agent = DataValidationAgent()
+            baseline = timed('per-provider records (original)', lambda: [
+                (provider.id, agent._validate_data_quality(provider))
+                for provider in Provider.query.order_by(Provider.id).yield_per(args.chunk_size)
+            ])
+            db.session.expunge_all()
+            records = timed('columnar records', lambda: list(iter_quality_records(args.chunk_size)))
+            print(f"  {'':<36} records {'identical' if records == baseline else 'DIFFER'}")
+            del baseline, records
+
+            per_provider = timed('audit summary, per provider', lambda: run_format_audit(args.chunk_size, columnar=False))
+            columnar = timed('audit summary, columnar', lambda: run_format_audit(args.chunk_size))
+            same = all(per_provider[key] == columnar[key] for key in ('providers', 'records', 'fields', 'required_fields_present'))
+            print(f"  {'':<36} summaries {'identical' if same else 'DIFFER'}; "
+                  f"{columnar['providers_needing_review']} providers need review")
+
+
+def bench_report(args):
+    """Directory quality report: per-provider assessments vs one aggregate SQL query (SQLite)"""
+    with tempfile.TemporaryDirectory() as tmp:
+        app = Flask(__name__)
+        app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        db.init_app(app)
+        with app.app_context():
+            db.create_all()
+            random.seed(args.seed)
+            profiles = generate_provider_dataset(args.profiles, 0.4)
+            columns = [column.name for column in Provider.__table__.columns if column.name not in ('id', 'npi')]
+            db.session.execute(insert(Provider), [
+                dict({name: value for name, value in profiles[index % len(profiles)].items() if name in columns},
+                     status='pending')
+                for index in range(args.providers)
+            ])
+            agent = DataValidationAgent()
+            rows = []
+            # Leave some providers unvalidated
+            for provider in Provider.query.filter(Provider.id % 10 != 0):
+                rows.extend(validation_rows(provider.id, _quality_results(agent, provider)))
+            db.session.execute(insert(ValidationResult), rows)
+            db.session.commit()
+            db.session.expunge_all()
+            print(f"{args.providers} providers, {len(rows)} validation results")
+
+            queries = [0]
+            event.listen(db.engine, 'before_cursor_execute', lambda *_: queries.__setitem__(0, queries[0] + 1))
+            qa_agent = QualityAssuranceAgent()
+
+            def timed(label, run):
+                queries[0] = 0
+                start = time.perf_counter()
+                report = run()
+                elapsed = time.perf_counter() - start
+                print(f"  {label:<36} {elapsed:7.2f} s  {queries[0]:7d} queries")
+                db.session.expunge_all()
+                return report
+
+            baseline = timed('assessment per provider', lambda: qa_agent.generate_quality_report(Provider.query.all()))
+            report = timed('SQL aggregates', qa_agent.generate_directory_report)
+            same = all(
+                math.isclose(report[key], value) if isinstance(value, float) else report[key] == value
+                for key, value in baseline.items()
+            )
+            print(f"  {'':<36} reports {'match' if same else 'DIFFER'}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Provider directory benchmarks')
+    subparsers = parser.add_subparsers(dest='benchmark', required=True)
+
+    npi_parser = subparsers.add_parser('npi', help='Concurrent NPI registry lookups')
+    npi_parser.add_argument('--count', type=int, default=1000)
+    npi_parser.add_argument('--workers', type=int, default=16)
+    npi_parser.add_argument('--latency', type=float, default=0.15, help='Mean simulated registry latency (s)')
+    npi_parser.add_argument('--error-rate', type=float, default=0.0)
+    npi_parser.add_argument('--rate-limit', type=float, default=None, help='Simulated server requests/second')
+    npi_parser.add_argument('--client-rate', type=float, default=1000.0, help='Client token bucket rate')
+    npi_parser.add_argument('--retries', type=int, default=4)
+    npi_parser.add_argument('--seed', type=int, default=0)
+    npi_parser.set_defaults(func=bench_npi)
+
+    html_parser = subparsers.add_parser('html', help='Provider website HTML extraction')
+    html_parser.add_argument('--paragraphs', type=int, default=5000, help='Size of the synthetic page')
+    html_parser.add_argument('--repeat', type=int, default=5)
+    html_parser.set_defaults(func=bench_html)
+
+    ocr_parser = subparsers.add_parser('ocr', help='Parallel PDF OCR and the text-layer fast path')
+    ocr_parser.add_argument('pdf', nargs='?', help='PDF to OCR (a synthetic packet is generated if omitted)')
+    ocr_parser.add_argument('--pages', type=int, default=20, help='Pages in the synthetic packet')
+    ocr_parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    ocr_parser.add_argument('--dpi', type=int, default=300)
+    ocr_parser.set_defaults(func=bench_ocr)
+
+    vlm_parser = subparsers.add_parser('vlm', help='Concurrent VLM page extraction against a stub client')
+    vlm_parser.add_argument('--pages', type=int, default=20)
+    vlm_parser.add_argument('--dpi', type=int, default=300)
+    vlm_parser.add_argument('--concurrency', type=int, default=4)
+    vlm_parser.add_argument('--latency', type=float, default=1.0, help='Mean simulated VLM latency (s)')
+    vlm_parser.add_argument('--fill-rate', type=float, default=0.5, help='Chance a field is found on a page')
+    vlm_parser.add_argument('--seed', type=int, default=0)
+    vlm_parser.set_defaults(func=bench_vlm)
+
+    preprocess_parser = subparsers.add_parser('ocr-preprocess', help='OCR preprocessing speed and field accuracy')
+    preprocess_parser.add_argument('--pages', type=int, default=10)
+    preprocess_parser.add_argument('--dpi', type=int, default=300)
+    preprocess_parser.add_argument('--tesseract-config', default='--psm 3')
+    preprocess_parser.add_argument('--seed', type=int, default=0)
+    preprocess_parser.set_defaults(func=bench_ocr_preprocess)
+
+    parse_parser = subparsers.add_parser('ocr-parse', help='OCR text field parsing on large documents')
+    parse_parser.add_argument('--pages', type=int, default=200)
+    parse_parser.add_argument('--repeat', type=int, default=5)
+    parse_parser.add_argument('--seed', type=int, default=0)
+    parse_parser.set_defaults(func=bench_ocr_parse)
+
+    persist_parser = subparsers.add_parser('persist', help='Validation result persistence throughput')
+    persist_parser.add_argument('--providers', type=int, default=2000)
+    persist_parser.add_argument('--chunk-size', type=int, nargs='+', default=[50, 200, 1000])
+    persist_parser.add_argument('--seed', type=int, default=0)
+    persist_parser.set_defaults(func=bench_persist)
+
+    audit_parser = subparsers.add_parser('audit', help='Full-directory data-quality audit')
+    audit_parser.add_argument('--providers', type=int, default=100000)
+    audit_parser.add_argument('--profiles', type=int, default=2000, help='Distinct synthetic profiles, repeated')
+    audit_parser.add_argument('--chunk-size', type=int, default=50000)
+    audit_parser.add_argument('--seed', type=int, default=0)
+    audit_parser.set_defaults(func=bench_audit)
+
+    report_parser = subparsers.add_parser('report', help='Directory quality report')
+    report_parser.add_argument('--providers', type=int, default=5000)
+    report_parser.add_argument('--profiles', type=int, default=2000, help='Distinct synthetic profiles, repeated')
+    report_parser.add_argument('--seed', type=int, default=0)
+    report_parser.set_defaults(func=bench_report)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
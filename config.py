@@ -3,10 +3,14 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+BASE_DIR = os.path.abspath(os.path.dirname(__file__))
+
 class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'dev-secret-key-change-in-production'
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or 'sqlite:///provider_directory.db'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Flask instance folder; the SQLite database, caches and queued uploads live here rather than in the working directory
+    INSTANCE_PATH = os.path.abspath(os.environ.get('INSTANCE_PATH') or os.path.join(BASE_DIR, 'instance'))
     
     # API Keys
     OPENAI_API_KEY = os.environ.get('OPENAI_API_KEY') or ''
@@ -16,10 +20,70 @@ class Config:
     # Processing Settings
     MAX_CONCURRENT_VALIDATIONS = 10
     VALIDATION_TIMEOUT = 300  # 5 minutes
+    VALIDATION_WRITE_CHUNK_SIZE = 200  # providers whose results are committed per transaction in batch runs
+    QUALITY_AUDIT_CHUNK_SIZE = 50000  # provider rows loaded per chunk by the columnar format audit
+    VALIDATION_RULES_VERSION = '1'  # bump when validation logic changes so incremental batches revalidate everyone
+    REVALIDATION_NPI_TTL_DAYS = 30  # incremental batches refresh registry evidence older than this
+    REVALIDATION_WEBSITE_TTL_DAYS = 7  # and practice website evidence older than this
     CONFIDENCE_THRESHOLD = 0.80
     
+    # NPI Registry Client Settings
+    NPI_MAX_WORKERS = 16  # concurrent in-flight registry lookups
+    NPI_POOL_SIZE = 32  # keep-alive connections to the registry
+    NPI_REQUEST_TIMEOUT = 10
+    NPI_RATE_LIMIT = 10.0  # requests per second (token bucket; halves automatically on HTTP 429)
+    NPI_MAX_RETRIES = 4  # jittered exponential backoff on 429/5xx/timeouts
+    NPI_CIRCUIT_FAILURE_THRESHOLD = 5  # consecutive failed lookups before failing fast
+    NPI_CIRCUIT_RESET_TIMEOUT = 60  # seconds before a trial request is let through
+    NPI_CACHE_PATH = os.environ.get('NPI_CACHE_PATH') or os.path.join(INSTANCE_PATH, 'cache', 'npi_cache.db')
+    NPI_CACHE_TTL = 7 * 24 * 3600  # registry responses are reused for a week
+    NPI_CACHE_MAX_ENTRIES = 500000
+    # Offline NPPES index (built with `python -m services.nppes_index`); when set it replaces the live API
+    NPPES_INDEX_PATH = os.environ.get('NPPES_INDEX_PATH') or ''
+    
+    # Website Crawler Settings
+    SCRAPER_MAX_CONCURRENCY = 32  # pages in flight across all hosts
+    SCRAPER_PER_HOST_CONCURRENCY = 2
+    SCRAPER_PER_HOST_DELAY = 0.5  # seconds between requests to the same host
+    SCRAPER_MAX_PAGE_BYTES = 2 * 1024 * 1024
+    SCRAPER_TIMEOUT = 10
+    SCRAPER_PAGE_CACHE_PATH = os.environ.get('SCRAPER_PAGE_CACHE_PATH') or os.path.join(INSTANCE_PATH, 'cache', 'page_cache.db')
+    SCRAPER_PAGE_CACHE_MAX_ENTRIES = 100000
+    # NUCC taxonomy CSV whose specialty names are matched on scraped pages; the 20 common specialties if unset
+    SPECIALTY_TAXONOMY_PATH = os.environ.get('SPECIALTY_TAXONOMY_PATH') or ''
+    
+    # PDF Extraction Settings
+    PDF_OCR_WORKERS = int(os.environ.get('PDF_OCR_WORKERS') or os.cpu_count() or 1)  # processes rasterizing/OCRing pages
+    PDF_DPI = 300
+    PDF_PAGE_WINDOW = 2  # pages rasterized at once; bounds memory on long scanned documents
+    PDF_OCR_PREPROCESS = True  # grayscale, binarize and deskew pages before Tesseract
+    PDF_OCR_REGIONS = False  # OCR only detected text bands instead of the whole page
+    PDF_TESSERACT_CONFIG = os.environ.get('PDF_TESSERACT_CONFIG') or '--psm 3'
+    PDF_SKIP_BLANK_PAGES = True
+    PDF_VLM_CONCURRENCY = 4  # concurrent VLM page requests across all uploads
+    PDF_VLM_MAX_DIMENSION = 1600  # pages are downscaled to this longest side and sent as JPEG
+    PDF_STOP_WHEN_COMPLETE = True  # skip remaining pages once the required provider fields are filled
+    PDF_MIN_FIELD_CONFIDENCE = 0.70  # a field only counts as filled at or above this confidence
+    PDF_PRIORITIZE_PAGES = True  # visit first/last and form-like pages first
+    PDF_EXTRACTION_CACHE_PATH = os.environ.get('PDF_EXTRACTION_CACHE_PATH') or os.path.join(INSTANCE_PATH, 'cache', 'extraction_cache.db')
+    PDF_EXTRACTION_CACHE_MAX_BYTES = 256 * 1024 * 1024  # least recently used results are evicted beyond this
+    
+    # Bulk Ingestion Settings
+    INGEST_WORKERS = int(os.environ.get('INGEST_WORKERS') or 2)  # documents extracted at once in the background
+    INGEST_STORAGE_FOLDER = os.path.join(INSTANCE_PATH, 'ingest')  # queued files, stored under unique names
+    INGEST_WATCH_FOLDER = os.environ.get('INGEST_WATCH_FOLDER') or ''  # files dropped here are ingested; disabled if unset
+    INGEST_POLL_INTERVAL = 5.0  # seconds between watch-folder scans
+    INGEST_USE_VLM = True  # watch-folder default; falls back to OCR without an OpenAI key
+    INGEST_AUTO_STAGE = False  # stage extracted records as pending providers unless the upload says otherwise
+    INGEST_STALE_AFTER = float(os.environ.get('INGEST_STALE_AFTER') or 3600)  # seconds a job may stay 'processing' before a start requeues it (a few times the slowest extraction)
+    
+    # HTTP record/replay for offline load testing (see services/http_fixtures.py)
+    HTTP_FIXTURE_MODE = os.environ.get('HTTP_FIXTURE_MODE') or ''  # '', 'record' or 'replay'
+    HTTP_FIXTURE_DIR = os.environ.get('HTTP_FIXTURE_DIR') or os.path.join(INSTANCE_PATH, 'fixtures')
+    HTTP_REPLAY_URL = os.environ.get('HTTP_REPLAY_URL') or 'http://127.0.0.1:8765'
+    
     # File Upload Settings
     MAX_UPLOAD_SIZE = 16 * 1024 * 1024  # 16MB
-    UPLOAD_FOLDER = 'uploads'
+    UPLOAD_FOLDER = os.path.join(BASE_DIR, 'uploads')
     ALLOWED_EXTENSIONS = {'pdf', 'png', 'jpg', 'jpeg'}
 
@@ -3,13 +3,12 @@ Demo script to showcase the Provider Directory Management System
 This script demonstrates the key flows and capabilities
 """
 from app import create_app, db
-from app.models import Provider, ValidationBatch
+from app.models import Provider
 from agents.data_validation_agent import DataValidationAgent
 from agents.enrichment_agent import InformationEnrichmentAgent
 from agents.quality_assurance_agent import QualityAssuranceAgent
 from agents.directory_management_agent import DirectoryManagementAgent
 from services.synthetic_data import generate_provider_dataset
-from services.pdf_extractor import PDFExtractor
 from config import Config
 import time
 
@@ -57,12 +56,16 @@ def demo_flow_1():
         
         start_time = time.time()
         for provider in providers[:20]:
+            # Gather registry and website evidence once for both agents
+            evidence = data_validation_agent.evidence.gather(provider)
+            
             # Validate
-            validation_results = data_validation_agent.validate_provider_contact(provider)
+            validation_results = data_validation_agent.validate_from_evidence(evidence)
             data_validation_agent.save_validation_results(provider, validation_results)
             
             # Enrich
-            enrichment_results = enrichment_agent.enrich_provider_info(provider)
+            enrichment_results = enrichment_agent.enrich_from_evidence(evidence)
+            enrichment_agent.apply_enrichment(provider, enrichment_results)
             enrichment_agent.save_enrichment_results(provider, enrichment_results)
             
             confidence_scores.append(validation_results.get('overall_confidence', 0.5))
@@ -162,7 +165,7 @@ def demo_flow_3():
         
         # Quality assessment
         qa_agent = QualityAssuranceAgent(Config.CONFIDENCE_THRESHOLD)
-        report = qa_agent.generate_quality_report(providers)
+        report = qa_agent.generate_directory_report()
         
         print(f"\n2. Quality Report:")
         print(f"   - Total Providers: {report['total_providers']}")
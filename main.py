@@ -1,7 +1,13 @@
+import os
+
 from app import create_app
 from config import Config
 
-app = create_app(Config)
+# With debug=True the Werkzeug reloader runs this script twice: a parent that only watches
+# files and the child that serves (WERKZEUG_RUN_MAIN=true). Only the child runs ingestion
+# workers, so the two never recover and process the same jobs.
+reloader_parent = __name__ == '__main__' and os.environ.get('WERKZEUG_RUN_MAIN') != 'true'
+app = create_app(Config, start_ingestion=not reloader_parent)
 
 if __name__ == '__main__':
     app.run(debug=True, host='0.0.0.0', port=5000)
@@ -0,0 +1,183 @@
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Callable, Dict, Iterable, Iterator, Optional, Tuple
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+class _HostState:
+    """Per-host concurrency and politeness bookkeeping"""
+
+    def __init__(self):
+        self.active = 0
+        self.next_allowed = 0.0
+        self.lock = threading.Condition()
+
+class CrawlerEngine:
+    """
+    Concurrent page fetcher for provider websites.
+
+    Uses one pooled session, a global concurrency cap, per-host concurrency
+    and delay limits (so practice groups sharing a domain are not hammered
+    while other hosts sit idle), and streaming reads with a response-size cap.
+    """
+
+    DEFAULT_MAX_CONCURRENCY = 32
+    DEFAULT_PER_HOST_CONCURRENCY = 2
+    DEFAULT_PER_HOST_DELAY = 0.5  # seconds between request starts to one host
+    DEFAULT_MAX_BYTES = 2 * 1024 * 1024
+    DEFAULT_TIMEOUT = 10
+    CHUNK_SIZE = 64 * 1024
+
+    def __init__(self, session: Optional[requests.Session] = None, max_concurrency: Optional[int] = None,
+                 per_host_concurrency: Optional[int] = None, per_host_delay: Optional[float] = None,
+                 max_bytes: Optional[int] = None, timeout: Optional[float] = None):
+        self.max_concurrency = max_concurrency or self.DEFAULT_MAX_CONCURRENCY
+        self.per_host_concurrency = per_host_concurrency or self.DEFAULT_PER_HOST_CONCURRENCY
+        self.per_host_delay = self.DEFAULT_PER_HOST_DELAY if per_host_delay is None else per_host_delay
+        self.max_bytes = max_bytes or self.DEFAULT_MAX_BYTES
+        self.timeout = timeout or self.DEFAULT_TIMEOUT
+
+        self.session = session or requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.max_concurrency, pool_maxsize=self.per_host_concurrency)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+        self.pages_fetched = 0
+        self.bytes_downloaded = 0
+        self.truncated_pages = 0
+        self._hosts: Dict[str, _HostState] = {}
+        self._lock = threading.Lock()
+
+    def _host(self, host: str) -> _HostState:
+        with self._lock:
+            state = self._hosts.get(host)
+            if state is None:
+                state = self._hosts[host] = _HostState()
+            return state
+
+    def _release(self, state: _HostState):
+        with state.lock:
+            state.active -= 1
+            state.lock.notify()
+
+    def fetch(self, url: str, headers: Optional[Dict[str, str]] = None) -> Dict:
+        """Fetch one URL, blocking until its host has a free slot"""
+        state = self._host(urlparse(url).netloc.lower())
+        with state.lock:
+            while state.active >= self.per_host_concurrency:
+                state.lock.wait()
+            state.active += 1
+            now = time.monotonic()
+            start_at = max(now, state.next_allowed)
+            state.next_allowed = start_at + self.per_host_delay
+        try:
+            if start_at > now:
+                time.sleep(start_at - now)
+            return self._download(url, headers)
+        finally:
+            self._release(state)
+
+    def _download(self, url: str, headers: Optional[Dict[str, str]] = None) -> Dict:
+        """Stream a response body up to max_bytes"""
+        result = {
+            'url': url,
+            'status': None,
+            'headers': {},
+            'content': b'',
+            'truncated': False,
+            'error': None
+        }
+        start = time.perf_counter()
+        try:
+            with self.session.get(url, headers=headers, timeout=self.timeout, stream=True) as response:
+                result['status'] = response.status_code
+                result['headers'] = dict(response.headers)
+                result['url'] = response.url or url
+                response.raise_for_status()
+
+                chunks = []
+                received = 0
+                for chunk in response.iter_content(self.CHUNK_SIZE):
+                    chunks.append(chunk)
+                    received += len(chunk)
+                    if received >= self.max_bytes:
+                        result['truncated'] = True
+                        break
+                result['content'] = b''.join(chunks)[:self.max_bytes]
+        except Exception as e:
+            result['error'] = str(e)
+
+        result['elapsed'] = time.perf_counter() - start
+        with self._lock:
+            self.pages_fetched += 1
+            self.bytes_downloaded += len(result['content'])
+            if result['truncated']:
+                self.truncated_pages += 1
+        return result
+
+    def fetch_many(self, urls: Iterable[str],
+                   headers_for: Optional[Callable[[str], Dict[str, str]]] = None,
+                   started: Optional[Callable[[str], None]] = None) -> Iterator[Tuple[str, Dict]]:
+        """Fetch many URLs concurrently, yielding (url, result) as each finishes
+
+        URLs are scheduled per host so a busy host never occupies global slots
+        while it waits out its own concurrency or delay limit.
+        headers_for(url) may supply per-request headers; started(url) is called
+        as each download is handed to a free worker.
+        """
+        pending: 'OrderedDict[str, deque]' = OrderedDict()
+        for url in urls:
+            host = urlparse(url).netloc.lower()
+            pending.setdefault(host, deque()).append(url)
+
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+            in_flight = {}
+            while pending or in_flight:
+                now = time.monotonic()
+                next_ready = None
+
+                for host in list(pending):
+                    if len(in_flight) >= self.max_concurrency:
+                        break
+                    state = self._host(host)
+                    with state.lock:
+                        if state.active >= self.per_host_concurrency:
+                            continue
+                        if state.next_allowed > now:
+                            next_ready = min(next_ready or state.next_allowed, state.next_allowed)
+                            continue
+                        state.active += 1
+                        state.next_allowed = now + self.per_host_delay
+
+                    url = pending[host].popleft()
+                    if not pending[host]:
+                        del pending[host]
+                    headers = headers_for(url) if headers_for else None
+                    if started:
+                        started(url)
+                    in_flight[executor.submit(self._download, url, headers)] = (url, state)
+
+                if not in_flight:
+                    # Every remaining host is waiting out its delay or is busy with direct fetches
+                    time.sleep(max(0.01, (next_ready or now) - now))
+                    continue
+
+                timeout = max(0.0, next_ready - now) if next_ready else None
+                done, _ = wait(in_flight, timeout=timeout, return_when=FIRST_COMPLETED)
+                for future in done:
+                    url, state = in_flight.pop(future)
+                    self._release(state)
+                    yield url, future.result()
+
+    def stats(self) -> Dict:
+        """Return crawler counters"""
+        return {
+            'pages_fetched': self.pages_fetched,
+            'bytes_downloaded': self.bytes_downloaded,
+            'truncated_pages': self.truncated_pages,
+            'hosts_seen': len(self._hosts)
+        }
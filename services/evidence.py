@@ -0,0 +1,276 @@
+"""
+Per-provider evidence gathered once and shared by validation and enrichment.
+
+Validating a provider and then enriching it used to mean two registry
+lookups and, for providers with a practice website, two scrapes: each agent
+fetched its own sources and took its own to_dict() of the provider.
+EvidenceGatherer fetches every external source once per provider into a
+ProviderEvidence bundle: a snapshot of the provider's columns, its to_dict(),
+the NPI registry validation and the scraped practice website. The bundle is
+frozen (dicts become read-only mappings, lists become tuples), so
+DataValidationAgent.validate_from_evidence and
+InformationEnrichmentAgent.enrich_from_evidence can read it as pure
+functions, in any order or at the same time, and only the final
+apply/save steps touch the database session.
+"""
+import heapq
+import queue
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import Future
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Any, Dict, Iterable, Iterator, Mapping, NamedTuple, Optional, Tuple
+
+
+def freeze(value: Any) -> Any:
+    """Read-only copy of a JSON-like value: dicts become mappingproxies and lists tuples"""
+    if isinstance(value, (dict, MappingProxyType)):
+        return MappingProxyType({key: freeze(item) for key, item in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(item) for item in value)
+    return value
+
+
+@lru_cache(maxsize=None)
+def _snapshot_type(fields: Tuple[str, ...]):
+    return namedtuple('ProviderSnapshot', fields)
+
+
+def snapshot_provider(provider) -> Tuple:
+    """Immutable copy of a Provider's column values (plus full_name), read by attribute like the model"""
+    columns = tuple(column.name for column in provider.__table__.columns)
+    snapshot_type = _snapshot_type(columns + ('full_name',))
+    return snapshot_type(*(freeze(getattr(provider, name)) for name in columns), provider.full_name)
+
+
+class ProviderEvidence(NamedTuple):
+    provider_id: int
+    provider: Tuple  # snapshot_provider(provider)
+    provider_data: Mapping  # provider.to_dict(), frozen
+    npi_validation: Mapping  # NPIService.validate_provider result ({} if the lookup raised)
+    website_url: Optional[str]
+    scraped_data: Optional[Mapping]  # None when there was no website to scrape
+    unavailable_sources: Tuple[str, ...]  # sources whose lookup timed out
+
+
+class _LookupStage:
+    """
+    One source's lookups in a gather_many batch, run through a bulk API on a feeder thread
+
+    Each distinct key gets a Future for its result, and started[key] records when the lookup
+    began. Every start and every result is reported as (source, key) on the events queue, so
+    gather_many can time lookups out from their own start and yield providers as they finish.
+    """
+
+    def __init__(self, source: str, events: queue.Queue):
+        self.source = source
+        self.events = events
+        self.results: Dict[Any, Future] = {}
+        self.started: Dict[Any, float] = {}
+        self.stopped = threading.Event()
+
+    def add(self, key) -> Future:
+        return self.results.setdefault(key, Future())
+
+    def start(self, key):
+        self.started[key] = time.time()
+        self.events.put((self.source, key))
+
+    def resolve(self, key, result):
+        self.results[key].set_result(result)
+        self.events.put((self.source, key))
+
+    def feed(self, items: Iterable[Tuple[Any, Any]]) -> Iterator:
+        """The items of (key, item) pairs, for a bulk API that draws each as its lookup starts"""
+        for key, item in items:
+            if self.stopped.is_set():
+                return
+            self.start(key)
+            yield item
+
+    def run(self, lookups: Iterator[Tuple[Any, Any]]):
+        """Resolve each key from lookups, (key, result) pairs, on a daemon thread"""
+        threading.Thread(target=self._drain, args=(lookups,), daemon=True).start()
+
+    def _drain(self, lookups: Iterator[Tuple[Any, Any]]):
+        try:
+            for key, result in lookups:
+                self.resolve(key, result)
+                if self.stopped.is_set():
+                    break
+        except Exception as e:
+            for key, future in self.results.items():
+                if not future.done():
+                    future.set_exception(e)
+                    self.events.put((self.source, key))
+        finally:
+            close = getattr(lookups, 'close', None)
+            if close:
+                close()
+
+
+class EvidenceGatherer:
+    """
+    Fetches each provider's registry record and practice website once, as a frozen ProviderEvidence
+    """
+
+    def __init__(self, npi_service, web_scraper, max_concurrency: int = 10, timeout: float = 300):
+        self.npi_service = npi_service
+        self.web_scraper = web_scraper
+        self.max_concurrency = max_concurrency  # providers with lookups in flight in gather_many
+        self.timeout = timeout  # seconds a provider's lookups may take before they count as unavailable
+
+    def find_website_url(self, provider) -> Optional[str]:
+        """Find the practice website (placeholder - in production would use a search API)
+        
+        No website source is wired in yet, so this returns None, as the original agents
+        did: scraping (crawler, page cache, HTML extraction, specialty matching) only runs
+        for callers that pass scraped_data to gather, or for a subclass that overrides this.
+        """
+        return None
+
+    def gather(self, provider, npi_validation: Optional[Dict] = None,
+               scraped_data: Optional[Dict] = None) -> ProviderEvidence:
+        """Evidence for one provider; npi_validation and scraped_data, if given, are used instead of fetching"""
+        provider_data = provider.to_dict()
+        if npi_validation is None:
+            try:
+                npi_validation = self.npi_service.validate_provider(provider_data)
+            except Exception:
+                npi_validation = {}
+
+        if scraped_data is not None:
+            website_url = scraped_data.get('website_url')
+        else:
+            website_url = self.find_website_url(provider) if provider.practice_name else None
+            if website_url:
+                try:
+                    scraped_data = self.web_scraper.scrape_provider_website(website_url, provider.full_name)
+                except Exception:
+                    scraped_data = {}
+
+        return self._evidence(provider, provider_data, npi_validation, website_url, scraped_data, ())
+
+    def gather_many(self, providers: Iterable, max_concurrency: Optional[int] = None,
+                    timeout: Optional[float] = None) -> Iterator[Tuple[Any, ProviderEvidence]]:
+        """Gather evidence for many providers with their lookups overlapped, yielding each as it finishes
+
+        NPI validations run through NPIService.validate_many with max_concurrency lookups in
+        flight and, alongside them, practice websites through WebScraper.scrape_many, whose
+        crawler applies its own global and per-host limits. Yields
+        (provider, evidence) in completion order. A lookup still running timeout seconds
+        after it started is recorded in unavailable_sources: the NPI validation becomes an
+        unavailable result and the scraped website an empty one. New lookups only start on
+        free workers, so one abandoned at its deadline holds its worker until it returns
+        instead of leaving later lookups queued (and timing out) behind it.
+        """
+        max_concurrency = max_concurrency or self.max_concurrency
+        timeout = timeout or self.timeout
+        # Provider rows are read here, on the calling thread; the lookups only see plain data
+        entries = [
+            {
+                'provider': provider,
+                'provider_data': provider.to_dict(),
+                'website_url': self.find_website_url(provider) if provider.practice_name else None
+            }
+            for provider in providers
+        ]
+        events = queue.Queue()
+        stages = {'npi': _LookupStage('npi', events), 'website': _LookupStage('website', events)}
+        waiting = {}  # (source, key) -> entries still waiting on that lookup
+        for entry in entries:
+            entry['npi'] = stages['npi'].add(id(entry['provider_data']))
+            entry['website'] = stages['website'].add(entry['website_url']) if entry['website_url'] else None
+            entry['lookups'] = 2 if entry['website_url'] else 1
+            waiting.setdefault(('npi', id(entry['provider_data'])), []).append(entry)
+            if entry['website_url']:
+                waiting.setdefault(('website', entry['website_url']), []).append(entry)
+
+        deadlines = []  # heap of (deadline, source, key) for lookups that have started
+
+        try:
+            npi_stage = stages['npi']
+            npi_stage.run(
+                (id(provider_data), validation)
+                for provider_data, validation in self.npi_service.validate_many(
+                    npi_stage.feed((id(entry['provider_data']), entry['provider_data']) for entry in entries),
+                    max_concurrency
+                )
+            )
+            website_stage = stages['website']
+            if website_stage.results:
+                website_stage.run(self.web_scraper.scrape_many(list(website_stage.results), started=website_stage.start))
+
+            remaining = len(entries)
+            while remaining:
+                try:
+                    source, key = events.get(timeout=max(0.0, deadlines[0][0] - time.time()) if deadlines else None)
+                    finished = [(source, key)]
+                    if not stages[source].results[key].done():
+                        heapq.heappush(deadlines, (stages[source].started[key] + timeout, source, key))
+                        finished = []
+                except queue.Empty:
+                    finished = []
+                now = time.time()
+                while deadlines and deadlines[0][0] <= now:
+                    _, source, key = heapq.heappop(deadlines)
+                    finished.append((source, key))
+
+                for lookup in finished:
+                    for entry in waiting.pop(lookup, ()):
+                        entry['lookups'] -= 1
+                        if not entry['lookups']:
+                            remaining -= 1
+                            yield entry['provider'], self._finish(entry, timeout)
+        finally:
+            for stage in stages.values():
+                stage.stopped.set()
+
+    def _finish(self, entry: Dict, timeout: float) -> ProviderEvidence:
+        """Evidence for a provider whose lookups finished or timed out"""
+        timed_out = []
+
+        npi_validation = self._lookup_result(entry['npi'])
+        if npi_validation is None:
+            timed_out.append('npi')
+            npi_validation = {
+                'valid': False,
+                'unavailable': True,
+                'confidence': 0.0,
+                'message': f'NPI lookup timed out after {timeout}s'
+            }
+
+        scraped_data = None
+        if entry['website'] is not None:
+            # An empty result skips web validation, as a failed scrape does
+            scraped_data = self._lookup_result(entry['website'])
+            if scraped_data is None:
+                timed_out.append('website')
+                scraped_data = {}
+
+        return self._evidence(entry['provider'], entry['provider_data'], npi_validation,
+                              entry['website_url'], scraped_data, tuple(timed_out))
+
+    def _lookup_result(self, future: Future) -> Optional[Dict]:
+        """A finished lookup's result ({} if it raised), or None if it is still running"""
+        if not future.done():
+            return None
+        try:
+            result = future.result()
+        except Exception:
+            return {}
+        return {} if isinstance(result, Exception) else result
+
+    def _evidence(self, provider, provider_data: Dict, npi_validation: Dict, website_url: Optional[str],
+                  scraped_data: Optional[Dict], unavailable_sources: Tuple[str, ...]) -> ProviderEvidence:
+        return ProviderEvidence(
+            provider_id=provider.id,
+            provider=snapshot_provider(provider),
+            provider_data=freeze(provider_data),
+            npi_validation=freeze(npi_validation or {}),
+            website_url=website_url,
+            scraped_data=freeze(scraped_data),
+            unavailable_sources=unavailable_sources
+        )
@@ -0,0 +1,217 @@
+"""
+Fast contact extraction from provider website HTML.
+
+Uses a C-backed parser when one is installed (selectolax's lexbor backend,
+then lxml) and falls back to BeautifulSoup's html.parser. Likely contact
+regions are checked first: tel:/mailto: links, schema.org microdata
+(telephone, email, PostalAddress), <address> tags and the page footer.
+Full-text regex scans over the whole page run only for fields those
+regions did not provide.
+"""
+import re
+from typing import Dict, List, Optional
+
+try:
+    from selectolax.lexbor import LexborHTMLParser as SelectolaxParser
+    SELECTOLAX_AVAILABLE = True
+except ImportError:
+    SELECTOLAX_AVAILABLE = False
+
+try:
+    import lxml.html
+    LXML_AVAILABLE = True
+except ImportError:
+    LXML_AVAILABLE = False
+
+from bs4 import BeautifulSoup
+
+PHONE_PATTERN = re.compile(r'(\+?1?[-.\s]?\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4})')
+EMAIL_PATTERN = re.compile(r'[\w\.-]+@[\w\.-]+\.\w+')
+
+US_STATE_CODES = (
+    'CA|NY|TX|FL|IL|PA|OH|GA|NC|MI|NJ|VA|WA|AZ|MA|TN|IN|MO|MD|WI|CO|MN|SC|AL|LA|KY|OR|OK|CT|IA|AR|UT|NV|MS|KS|NM|NE|WV|ID|HI|NH|ME|RI|MT|DE|SD|ND|AK|VT|WY|DC'
+)
+# Street and city runs are bounded so a long page cannot trigger quadratic backtracking
+ADDRESS_PATTERN = re.compile(
+    r'(\d+\s+[\w\s]{1,80}(?:Street|St|Avenue|Ave|Road|Rd|Drive|Dr|Lane|Ln|Boulevard|Blvd|Court|Ct|Way|Circle|Cir)'
+    r'[\s,]+[\w\s,]{1,80}(?:' + US_STATE_CODES + r')[\s,]+(?:\d{5}(?:-\d{4})?))',
+    re.IGNORECASE
+)
+
+# (CSS selector, equivalent XPath) pairs for likely contact regions
+TEL_LINKS = ('a[href^="tel:"]', '//a[starts-with(@href, "tel:")]')
+MAILTO_LINKS = ('a[href^="mailto:"]', '//a[starts-with(@href, "mailto:")]')
+TELEPHONE_MICRODATA = ('[itemprop="telephone"]', '//*[@itemprop="telephone"]')
+EMAIL_MICRODATA = ('[itemprop="email"]', '//*[@itemprop="email"]')
+POSTAL_ADDRESS_MICRODATA = ('[itemtype*="PostalAddress"]', '//*[contains(@itemtype, "PostalAddress")]')
+CONTACT_REGIONS = ('address, footer, [itemprop="address"]', '//address | //footer | //*[@itemprop="address"]')
+
+POSTAL_ADDRESS_FIELDS = {
+    'line1': 'streetAddress',
+    'city': 'addressLocality',
+    'state': 'addressRegion',
+    'zip_code': 'postalCode',
+}
+
+def parse_address_text(text: str) -> Optional[Dict]:
+    """Find and split the first street address in free text"""
+    match = ADDRESS_PATTERN.search(text)
+    if not match:
+        return None
+    parts = match.group(1).split(',')
+    if len(parts) < 2:
+        return None
+    return {
+        'line1': parts[0].strip(),
+        'city': parts[1].strip() if len(parts) > 1 else '',
+        'state': parts[2].strip()[:2] if len(parts) > 2 else '',
+        'zip_code': parts[2].strip().split()[-1] if len(parts) > 2 else ''
+    }
+
+def _first_phone(texts: List[str]) -> Optional[str]:
+    for text in texts:
+        match = PHONE_PATTERN.search(text)
+        if match:
+            return match.group(1)
+    return None
+
+def _first_email(texts: List[str]) -> Optional[str]:
+    for text in texts:
+        match = EMAIL_PATTERN.search(text)
+        if match:
+            return match.group(0)
+    return None
+
+class _SelectolaxDocument:
+    def __init__(self, content: bytes):
+        self.tree = SelectolaxParser(content)
+        self.tree.strip_tags(['script', 'style', 'noscript'])
+
+    def text(self) -> str:
+        body = self.tree.body or self.tree.root
+        return body.text(separator=' ') if body else ''
+
+    def texts(self, selector) -> List[str]:
+        return [node.text(separator=' ') for node in self.tree.css(selector[0])]
+
+    def attrs(self, selector, attr: str) -> List[str]:
+        return [node.attributes.get(attr) or '' for node in self.tree.css(selector[0])]
+
+    def itemprops(self, selector) -> List[Dict[str, str]]:
+        return [
+            {child.attributes.get('itemprop'): child.text(separator=' ') for child in node.css('[itemprop]')}
+            for node in self.tree.css(selector[0])
+        ]
+
+class _LxmlDocument:
+    def __init__(self, content: bytes):
+        self.tree = lxml.html.fromstring(content or b'<html></html>')
+        for node in self.tree.xpath('//script | //style | //noscript'):
+            node.drop_tree()
+
+    def text(self) -> str:
+        return ' '.join(self.tree.itertext())
+
+    def texts(self, selector) -> List[str]:
+        return [' '.join(node.itertext()) for node in self.tree.xpath(selector[1])]
+
+    def attrs(self, selector, attr: str) -> List[str]:
+        return [node.get(attr) or '' for node in self.tree.xpath(selector[1])]
+
+    def itemprops(self, selector) -> List[Dict[str, str]]:
+        return [
+            {child.get('itemprop'): ' '.join(child.itertext()) for child in node.xpath('.//*[@itemprop]')}
+            for node in self.tree.xpath(selector[1])
+        ]
+
+class _SoupDocument:
+    def __init__(self, content: bytes):
+        self.soup = BeautifulSoup(content, 'html.parser')
+        for node in self.soup(['script', 'style', 'noscript']):
+            node.decompose()
+
+    def text(self) -> str:
+        return self.soup.get_text(' ')
+
+    def texts(self, selector) -> List[str]:
+        return [node.get_text(' ') for node in self.soup.select(selector[0])]
+
+    def attrs(self, selector, attr: str) -> List[str]:
+        return [node.get(attr) or '' for node in self.soup.select(selector[0])]
+
+    def itemprops(self, selector) -> List[Dict[str, str]]:
+        return [
+            {child.get('itemprop'): child.get_text(' ') for child in node.select('[itemprop]')}
+            for node in self.soup.select(selector[0])
+        ]
+
+PARSERS = {
+    'selectolax': _SelectolaxDocument,
+    'lxml': _LxmlDocument,
+    'html.parser': _SoupDocument,
+}
+
+def default_parser() -> str:
+    """Fastest parser available in this environment"""
+    if SELECTOLAX_AVAILABLE:
+        return 'selectolax'
+    if LXML_AVAILABLE:
+        return 'lxml'
+    return 'html.parser'
+
+class HTMLExtractor:
+    """
+    Extracts phone, email and address from a page, contact regions first
+    """
+
+    def __init__(self, parser: Optional[str] = None):
+        self.parser = parser or default_parser()
+        if self.parser not in PARSERS:
+            raise ValueError(f"Unknown HTML parser: {self.parser}")
+        if (self.parser == 'selectolax' and not SELECTOLAX_AVAILABLE) or (self.parser == 'lxml' and not LXML_AVAILABLE):
+            raise ValueError(f"HTML parser not installed: {self.parser}")
+
+    def extract(self, content: bytes) -> Dict:
+        """Return phone, email, address and the page's visible text"""
+        doc = PARSERS[self.parser](content)
+
+        phone = _first_phone([href[len('tel:'):] for href in doc.attrs(TEL_LINKS, 'href')])
+        phone = phone or _first_phone(doc.texts(TELEPHONE_MICRODATA))
+
+        email = _first_email([href[len('mailto:'):].split('?')[0] for href in doc.attrs(MAILTO_LINKS, 'href')])
+        email = email or _first_email(doc.texts(EMAIL_MICRODATA))
+
+        address = self._microdata_address(doc)
+
+        region_texts = doc.texts(CONTACT_REGIONS)
+        phone = phone or _first_phone(region_texts)
+        email = email or _first_email(region_texts)
+        if address is None:
+            for region_text in region_texts:
+                address = parse_address_text(region_text)
+                if address:
+                    break
+
+        # Fall back to scanning the whole page only for what is still missing
+        text = doc.text()
+        phone = phone or _first_phone([text])
+        email = email or _first_email([text])
+        address = address or parse_address_text(text)
+
+        return {
+            'phone': phone,
+            'email': email,
+            'address': address,
+            'text': text
+        }
+
+    def _microdata_address(self, doc) -> Optional[Dict]:
+        """Structured address from the first schema.org PostalAddress with a street"""
+        for props in doc.itemprops(POSTAL_ADDRESS_MICRODATA):
+            address = {
+                field: ' '.join((props.get(prop) or '').split())
+                for field, prop in POSTAL_ADDRESS_FIELDS.items()
+            }
+            if address['line1']:
+                return address
+        return None
@@ -0,0 +1,286 @@
+"""
+Record/replay of HTTP traffic for the requests.Session used by NPIService
+and WebScraper.
+
+Record mode mounts a transport adapter that saves every response to a
+FixtureStore. Replay mode serves the store from a local HTTP stand-in
+(ReplayServer) with configurable latency, error rate and rate limiting, and
+mounts an adapter that routes the session's requests to it. Batch
+validation can then be load-tested deterministically on an offline machine.
+
+Serve a fixture directory with:
+    python -m services.http_fixtures instance/fixtures/ --latency 0.2 --error-rate 0.05 --rate-limit 20
+"""
+import argparse
+import base64
+import hashlib
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+FIXTURE_URL_HEADER = 'X-Fixture-URL'
+
+# Hop-by-hop or already-decoded headers that must not be replayed verbatim
+_SKIPPED_HEADERS = {'content-encoding', 'content-length', 'transfer-encoding', 'connection', 'keep-alive'}
+
+
+def canonical_url(url: str) -> str:
+    """Normalize a URL so equivalent requests map to the same fixture"""
+    parts = urlsplit(url)
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path or '/', query, ''))
+
+
+class FixtureStore:
+    """
+    Directory of recorded responses, one JSON file per (method, URL)
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._memory: Dict[str, Optional[Dict]] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, method: str, url: str) -> str:
+        return hashlib.sha1(f"{method.upper()} {canonical_url(url)}".encode()).hexdigest()
+
+    def save(self, method: str, url: str, status: int, headers: Dict[str, str], body: bytes):
+        """Store a response for (method, url)"""
+        key = self._key(method, url)
+        fixture = {
+            'method': method.upper(),
+            'url': canonical_url(url),
+            'status': status,
+            'headers': {k: v for k, v in headers.items() if k.lower() not in _SKIPPED_HEADERS},
+            'body': base64.b64encode(body).decode()
+        }
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(fixture, f)
+        os.replace(tmp_path, os.path.join(self.directory, key + '.json'))
+        with self._lock:
+            self._memory[key] = fixture
+
+    def save_json(self, method: str, url: str, payload, status: int = 200):
+        """Store a JSON response, e.g. a synthetic registry result"""
+        self.save(method, url, status, {'Content-Type': 'application/json'}, json.dumps(payload).encode())
+
+    def load(self, method: str, url: str) -> Optional[Dict]:
+        """Return the stored fixture for (method, url), or None"""
+        key = self._key(method, url)
+        with self._lock:
+            if key in self._memory:
+                return self._memory[key]
+        path = os.path.join(self.directory, key + '.json')
+        fixture = None
+        if os.path.exists(path):
+            with open(path) as f:
+                fixture = json.load(f)
+        with self._lock:
+            self._memory[key] = fixture
+        return fixture
+
+
+class RecordingAdapter(HTTPAdapter):
+    """Transport adapter that sends requests normally and records each response"""
+
+    def __init__(self, store: FixtureStore, **kwargs):
+        self.store = store
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        response = super().send(request, **kwargs)
+        self.store.save(request.method, request.url, response.status_code,
+                        dict(response.headers), response.content)
+        return response
+
+
+class ReplayAdapter(HTTPAdapter):
+    """Transport adapter that routes every request to a ReplayServer"""
+
+    def __init__(self, server_url: str, **kwargs):
+        self.server_url = server_url.rstrip('/')
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        original_url = request.url
+        request.url = self.server_url + '/replay'
+        request.headers[FIXTURE_URL_HEADER] = original_url
+        response = super().send(request, **kwargs)
+        response.url = original_url
+        return response
+
+
+def _adapter_kwargs(session: requests.Session) -> Dict:
+    """Carry over the pool settings of the adapter currently mounted for https"""
+    current = session.get_adapter('https://')
+    return {
+        'pool_connections': getattr(current, '_pool_connections', 10),
+        'pool_maxsize': getattr(current, '_pool_maxsize', 10),
+        'pool_block': getattr(current, '_pool_block', False),
+    }
+
+
+def record(session: requests.Session, store: FixtureStore):
+    """Record every response the session receives into store"""
+    adapter = RecordingAdapter(store, **_adapter_kwargs(session))
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+
+
+def replay(session: requests.Session, server_url: str):
+    """Serve every request the session makes from a ReplayServer"""
+    adapter = ReplayAdapter(server_url, **_adapter_kwargs(session))
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+
+
+class ReplayServer:
+    """
+    Local HTTP stand-in that serves a FixtureStore with simulated network
+    conditions: per-request latency, a random 5xx error rate and a
+    requests-per-second limit answered with 429 + Retry-After.
+    """
+
+    def __init__(self, store: FixtureStore, host: str = '127.0.0.1', port: int = 0,
+                 latency: Tuple[float, float] = (0.0, 0.0), error_rate: float = 0.0,
+                 rate_limit: Optional[float] = None, seed: int = 0):
+        self.store = store
+        self.latency = latency
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit
+        self.counters = {'requests': 0, 'served': 0, 'missing': 0, 'errors': 0, 'throttled': 0}
+
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._window_start = time.monotonic()
+        self._window_count = 0
+
+        self._httpd = ThreadingHTTPServer((host, port), self._make_handler())
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> 'ReplayServer':
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _decide(self) -> Tuple[str, float]:
+        """Pick the simulated outcome and latency for one request"""
+        with self._lock:
+            self.counters['requests'] += 1
+            delay = self._random.uniform(*self.latency)
+
+            if self.rate_limit:
+                now = time.monotonic()
+                if now - self._window_start >= 1.0:
+                    self._window_start = now
+                    self._window_count = 0
+                self._window_count += 1
+                if self._window_count > self.rate_limit:
+                    self.counters['throttled'] += 1
+                    return 'throttled', 0.0
+
+            if self._random.random() < self.error_rate:
+                self.counters['errors'] += 1
+                return 'error', delay
+
+        return 'serve', delay
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def _respond(self, status: int, headers: Dict[str, str], body: bytes):
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                if self.command != 'HEAD':
+                    self.wfile.write(body)
+
+            def _handle(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                if length:
+                    self.rfile.read(length)
+
+                outcome, delay = server._decide()
+                if delay:
+                    time.sleep(delay)
+
+                if outcome == 'throttled':
+                    self._respond(429, {'Retry-After': '1'}, b'Too Many Requests')
+                    return
+                if outcome == 'error':
+                    self._respond(503, {}, b'Service Unavailable')
+                    return
+
+                url = self.headers.get(FIXTURE_URL_HEADER, '')
+                fixture = server.store.load(self.command, url)
+                if fixture is None:
+                    with server._lock:
+                        server.counters['missing'] += 1
+                    self._respond(404, {}, b'No fixture recorded')
+                    return
+
+                with server._lock:
+                    server.counters['served'] += 1
+                self._respond(fixture['status'], fixture['headers'], base64.b64decode(fixture['body']))
+
+            do_GET = _handle
+            do_HEAD = _handle
+            do_POST = _handle
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Serve recorded HTTP fixtures with simulated network conditions')
+    parser.add_argument('directory', help='Fixture directory')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=0.0, help='Mean per-request latency in seconds')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of requests answered with 503')
+    parser.add_argument('--rate-limit', type=float, default=None, help='Requests per second before answering 429')
+    args = parser.parse_args()
+
+    replay_server = ReplayServer(
+        FixtureStore(args.directory), port=args.port,
+        latency=(args.latency * 0.5, args.latency * 1.5),
+        error_rate=args.error_rate, rate_limit=args.rate_limit
+    )
+    print(f"Replaying {args.directory} at {replay_server.url} (Ctrl+C to stop)")
+    try:
+        replay_server._httpd.serve_forever()
+    except KeyboardInterrupt:
+        replay_server.stop()
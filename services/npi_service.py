@@ -1,39 +1,113 @@
+import logging
 import requests
 import time
-from typing import Dict, Optional, List
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from requests.adapters import HTTPAdapter
+from typing import Callable, Dict, Iterable, Iterator, Optional, List, Tuple
+from services.persistent_cache import PersistentCache
+from services.single_flight import SingleFlight
+from services.throttling import CircuitBreaker, CircuitOpenError, TokenBucket, backoff_delay
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+class NPIRegistryUnavailable(Exception):
+    """
+    Raised when the registry could not answer (throttled, erroring, timing out
+    or circuit open) - distinct from a lookup that found no provider
+    """
 
 class NPIService:
     """
     Service for interacting with the NPI Registry API
+    
+    An optional backend (any object with search_by_npi and search_by_name,
+    such as services.nppes_index.NPPESIndex) answers lookups locally instead
+    of calling the registry API.
     """
     
     BASE_URL = "https://npiregistry.cms.hhs.gov/api/"
+    DEFAULT_MAX_WORKERS = 16
+    DEFAULT_POOL_SIZE = 32
+    DEFAULT_TIMEOUT = 10
+    DEFAULT_RATE_LIMIT = 10.0  # requests per second
+    DEFAULT_MAX_RETRIES = 4
+    RETRY_BASE_DELAY = 0.5
+    RETRY_MAX_DELAY = 30.0
+    RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
     
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None, max_workers: Optional[int] = None,
+                 pool_size: Optional[int] = None, timeout: Optional[float] = None,
+                 cache: Optional[PersistentCache] = None, backend=None,
+                 rate_limiter: Optional[TokenBucket] = None, circuit_breaker: Optional[CircuitBreaker] = None,
+                 max_retries: Optional[int] = None):
         self.api_key = api_key
+        self.cache = cache
+        self.backend = backend
+        self.max_workers = max_workers or self.DEFAULT_MAX_WORKERS
+        self.pool_size = pool_size or self.DEFAULT_POOL_SIZE
+        self.timeout = timeout or self.DEFAULT_TIMEOUT
+        self.rate_limiter = rate_limiter or TokenBucket(self.DEFAULT_RATE_LIMIT)
+        self.circuit_breaker = circuit_breaker or CircuitBreaker()
+        self.max_retries = self.DEFAULT_MAX_RETRIES if max_retries is None else max_retries
+        self.retries = 0
+        self.throttled_responses = 0
+        self.single_flight = SingleFlight()
         self.session = requests.Session()
+        
+        # Bounded, blocking connection pool shared by all worker threads so
+        # concurrent lookups reuse keep-alive connections to the registry
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size, pool_block=True)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
     
     def search_by_npi(self, npi: str) -> Optional[Dict]:
         """Search for provider by NPI number"""
+        if self.backend is not None:
+            return self.backend.search_by_npi(npi)
+        
+        cache_key = self._npi_cache_key(npi)
+        cached = self._cache_get(cache_key)
+        if cached is not _MISSING:
+            return cached
+        
+        # Concurrent lookups of the same NPI share one outbound request
+        return self.single_flight.do(cache_key, self._fetch_by_npi, npi, cache_key)
+    
+    def _fetch_by_npi(self, npi: str, cache_key: str) -> Optional[Dict]:
+        """Fetch an NPI record from the registry API and cache it"""
         try:
             params = {
                 'version': '2.1',
                 'number': npi
             }
             
-            response = self.session.get(self.BASE_URL, params=params, timeout=10)
-            response.raise_for_status()
-            data = response.json()
+            data = self._get(params)
             
-            if data.get('result_count', 0) > 0:
-                return data['results'][0]
-            return None
+            result = data['results'][0] if data.get('result_count', 0) > 0 else None
+            self._cache_set(cache_key, result)
+            return result
+        except NPIRegistryUnavailable:
+            raise
         except Exception as e:
-            print(f"Error searching NPI {npi}: {str(e)}")
+            logger.warning("Error searching NPI %s: %s", npi, e)
             return None
     
     def search_by_name(self, first_name: str, last_name: str, state: Optional[str] = None) -> List[Dict]:
         """Search for providers by name"""
+        if self.backend is not None:
+            return self.backend.search_by_name(first_name, last_name, state)
+        
+        cache_key = self._name_cache_key(first_name, last_name, state)
+        cached = self._cache_get(cache_key)
+        if cached is not _MISSING:
+            return cached
+        
+        return self.single_flight.do(cache_key, self._fetch_by_name, first_name, last_name, state, cache_key)
+    
+    def _fetch_by_name(self, first_name: str, last_name: str, state: Optional[str], cache_key: str) -> List[Dict]:
+        """Search the registry API by name and cache the results"""
         try:
             params = {
                 'version': '2.1',
@@ -44,15 +118,157 @@ class NPIService:
             if state:
                 params['state'] = state
             
-            response = self.session.get(self.BASE_URL, params=params, timeout=10)
-            response.raise_for_status()
-            data = response.json()
+            data = self._get(params)
             
-            return data.get('results', [])
+            results = data.get('results', [])
+            self._cache_set(cache_key, results)
+            # Matched records are full registry records, so later number lookups can reuse them
+            for record in results:
+                if record.get('number'):
+                    self._cache_set(self._npi_cache_key(record['number']), record)
+            return results
+        except NPIRegistryUnavailable:
+            raise
         except Exception as e:
-            print(f"Error searching by name {first_name} {last_name}: {str(e)}")
+            logger.warning("Error searching by name %s %s: %s", first_name, last_name, e)
             return []
     
+    def _get(self, params: Dict) -> Dict:
+        """GET the registry API with rate limiting, jittered retries and a circuit breaker
+        
+        Raises NPIRegistryUnavailable for throttling, 5xx and transport errors
+        (timeouts, dropped connections, broken or undecodable bodies, redirect
+        loops) once retries are exhausted, and at once for a success response
+        whose body is not JSON; other HTTP errors are raised as-is. Every call
+        that passes the circuit breaker records a success or a failure on it,
+        so a half-open trial always resolves.
+        """
+        try:
+            self.circuit_breaker.before_call()
+        except CircuitOpenError as e:
+            raise NPIRegistryUnavailable(str(e)) from e
+        
+        last_error = None
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                self.retries += 1
+            
+            self.rate_limiter.acquire()
+            retry_after = None
+            try:
+                response = self.session.get(self.BASE_URL, params=params, timeout=self.timeout)
+            except requests.RequestException as e:
+                last_error = e
+            else:
+                if response.status_code not in self.RETRYABLE_STATUS_CODES:
+                    try:
+                        data = response.json() if response.ok else None
+                    except ValueError as e:
+                        self.circuit_breaker.record_failure()
+                        raise NPIRegistryUnavailable(f"Unreadable response from NPI registry: {e}") from e
+                    # The registry answered, even if it rejected the request
+                    self.circuit_breaker.record_success()
+                    self.rate_limiter.recovered()
+                    response.raise_for_status()
+                    return data
+                
+                last_error = requests.HTTPError(f"{response.status_code} from NPI registry", response=response)
+                if response.status_code == 429:
+                    self.throttled_responses += 1
+                    self.rate_limiter.throttled()
+                    retry_after = response.headers.get('Retry-After')
+            
+            if attempt < self.max_retries:
+                delay = backoff_delay(attempt, self.RETRY_BASE_DELAY, self.RETRY_MAX_DELAY)
+                if retry_after and retry_after.isdigit():
+                    delay = max(delay, float(retry_after))
+                time.sleep(delay)
+        
+        self.circuit_breaker.record_failure()
+        raise NPIRegistryUnavailable(f"NPI registry unavailable after {self.max_retries + 1} attempts: {last_error}")
+    
+    def _npi_cache_key(self, npi) -> str:
+        return f"npi:{str(npi).strip()}"
+    
+    def _name_cache_key(self, first_name: str, last_name: str, state: Optional[str]) -> str:
+        parts = [(part or '').strip().upper() for part in (first_name, last_name, state)]
+        return 'name:' + '|'.join(parts)
+    
+    def _cache_get(self, key: str):
+        if self.cache is None:
+            return _MISSING
+        return self.cache.get(key, _MISSING)
+    
+    def _cache_set(self, key: str, value):
+        if self.cache is not None:
+            self.cache.set(key, value)
+    
+    def cache_stats(self) -> Dict:
+        """Return NPI response cache counters"""
+        if self.cache is None:
+            return {'enabled': False}
+        return {'enabled': True, **self.cache.stats()}
+    
+    def stats(self) -> Dict:
+        """Return client counters: cache, retries, throttling and circuit state"""
+        return {
+            'cache': self.cache_stats(),
+            'retries': self.retries,
+            'throttled_responses': self.throttled_responses,
+            'current_rate_limit': self.rate_limiter.rate,
+            'circuit_state': self.circuit_breaker.state,
+            'circuit_trips': self.circuit_breaker.trips,
+            'single_flight': self.single_flight.stats()
+        }
+    
+    def lookup_many(self, npis: Iterable[str]) -> Iterator[Tuple[str, Optional[Dict]]]:
+        """Look up many NPI numbers concurrently, yielding (npi, record) as each completes
+        
+        A lookup that raises (NPIRegistryUnavailable when the registry could not be
+        reached) yields its exception instead, so one failure does not abort the whole batch.
+        """
+        return self._run_concurrently(self.search_by_npi, npis)
+    
+    def search_many(self, names: Iterable[Tuple[str, str, Optional[str]]]) -> Iterator[Tuple[Tuple, List[Dict]]]:
+        """Search many (first_name, last_name, state) queries concurrently, yielding (query, results) as each completes"""
+        return self._run_concurrently(lambda query: self.search_by_name(*query), names)
+    
+    def validate_many(self, providers_data: Iterable[Dict], max_workers: Optional[int] = None) -> Iterator[Tuple[Dict, Dict]]:
+        """Validate many providers concurrently, yielding (provider_data, validation) as each completes"""
+        return self._run_concurrently(self.validate_provider, providers_data, max_workers)
+    
+    def _run_concurrently(self, func: Callable, items: Iterable, max_workers: Optional[int] = None) -> Iterator[Tuple]:
+        """Run func over items on a thread pool with at most max_workers calls in flight
+        
+        Items are drawn from the iterable only as workers free up, so a lazy iterable sees
+        each item at the moment its call starts.
+        """
+        max_workers = max_workers or self.max_workers
+        items = iter(items)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            in_flight = {}
+            
+            def submit_next() -> bool:
+                for item in items:
+                    in_flight[executor.submit(func, item)] = item
+                    return True
+                return False
+            
+            for _ in range(max_workers):
+                if not submit_next():
+                    break
+            
+            while in_flight:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    item = in_flight.pop(future)
+                    submit_next()
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        result = e
+                    yield item, result
+    
     def extract_provider_info(self, npi_data: Dict) -> Dict:
         """Extract structured provider information from NPI response"""
         if not npi_data:
@@ -103,9 +319,12 @@ class NPIService:
             # Try to find by name
             first_name = provider_data.get('first_name', '')
             last_name = provider_data.get('last_name', '')
-            state = provider_data.get('state')
+            state = provider_data.get('state') or (provider_data.get('address') or {}).get('state')
             
-            matches = self.search_by_name(first_name, last_name, state)
+            try:
+                matches = self.search_by_name(first_name, last_name, state)
+            except NPIRegistryUnavailable as e:
+                return self._unavailable_result(e)
             if matches:
                 npi_data = matches[0]
                 npi = npi_data.get('number')
@@ -116,7 +335,10 @@ class NPIService:
                     'message': 'Provider not found in NPI registry'
                 }
         else:
-            npi_data = self.search_by_npi(npi)
+            try:
+                npi_data = self.search_by_npi(npi)
+            except NPIRegistryUnavailable as e:
+                return self._unavailable_result(e)
         
         if not npi_data:
             return {
@@ -153,4 +375,12 @@ class NPIService:
             'discrepancies': discrepancies,
             'message': 'Provider found in NPI registry'
         }
-
+    
+    def _unavailable_result(self, error: Exception) -> Dict:
+        """Validation result for a lookup the registry could not answer"""
+        return {
+            'valid': False,
+            'unavailable': True,
+            'confidence': 0.0,
+            'message': f'NPI registry temporarily unavailable: {error}'
+        }
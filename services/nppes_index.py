@@ -0,0 +1,257 @@
+"""
+Offline NPI backend built from the CMS NPPES dissemination file.
+
+The multi-GB NPPES CSV is streamed in chunks into a SQLite index keyed by
+NPI (the table's rowid) with a secondary name/state index. Lookups return
+records shaped like NPI Registry API results, so
+NPIService.extract_provider_info works unchanged on them.
+
+Build an index with:
+    python -m services.nppes_index npidata_pfile.csv nppes_index.db --taxonomy nucc_taxonomy.csv
+"""
+import argparse
+import csv
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterator, List, Optional
+
+# NPPES dissemination file column headers
+COL_NPI = 'NPI'
+COL_ENTITY_TYPE = 'Entity Type Code'
+COL_ORG_NAME = 'Provider Organization Name (Legal Business Name)'
+COL_LAST_NAME = 'Provider Last Name (Legal Name)'
+COL_FIRST_NAME = 'Provider First Name'
+COL_MIDDLE_NAME = 'Provider Middle Name'
+COL_CREDENTIAL = 'Provider Credential Text'
+COL_GENDER = 'Provider Gender Code'
+COL_DEACTIVATION_DATE = 'NPI Deactivation Date'
+COL_REACTIVATION_DATE = 'NPI Reactivation Date'
+
+LOCATION_COLUMNS = {
+    'address_1': 'Provider First Line Business Practice Location Address',
+    'address_2': 'Provider Second Line Business Practice Location Address',
+    'city': 'Provider Business Practice Location Address City Name',
+    'state': 'Provider Business Practice Location Address State Name',
+    'postal_code': 'Provider Business Practice Location Address Postal Code',
+    'telephone_number': 'Provider Business Practice Location Address Telephone Number',
+}
+
+MAILING_COLUMNS = {
+    'address_1': 'Provider First Line Business Mailing Address',
+    'address_2': 'Provider Second Line Business Mailing Address',
+    'city': 'Provider Business Mailing Address City Name',
+    'state': 'Provider Business Mailing Address State Name',
+    'postal_code': 'Provider Business Mailing Address Postal Code',
+    'telephone_number': 'Provider Business Mailing Address Telephone Number',
+}
+
+MAX_TAXONOMIES = 15
+DEFAULT_CHUNK_SIZE = 50000
+
+
+def load_taxonomy_labels(nucc_csv_path: str) -> Dict[str, str]:
+    """Load NUCC taxonomy code -> description labels from the NUCC taxonomy CSV"""
+    labels = {}
+    with open(nucc_csv_path, newline='', encoding='utf-8-sig', errors='replace') as f:
+        for row in csv.DictReader(f):
+            code = (row.get('Code') or '').strip()
+            if not code:
+                continue
+            label = (row.get('Display Name') or '').strip()
+            if not label:
+                parts = [(row.get('Classification') or '').strip(), (row.get('Specialization') or '').strip()]
+                label = ', '.join(p for p in parts if p)
+            labels[code] = label
+    return labels
+
+
+def _nppes_row_to_record(row: List[str], columns: Dict[str, int],
+                         taxonomy_labels: Dict[str, str]) -> Dict:
+    """Convert one NPPES CSV row into an NPI Registry API-shaped record"""
+    def col(name: str) -> str:
+        idx = columns.get(name)
+        return row[idx].strip() if idx is not None and idx < len(row) else ''
+
+    def address(purpose: str, mapping: Dict[str, str]) -> Dict:
+        addr = {'address_purpose': purpose, 'country_code': 'US'}
+        for field, name in mapping.items():
+            addr[field] = col(name)
+        return addr
+
+    entity_type = col(COL_ENTITY_TYPE)
+    basic = {
+        'first_name': col(COL_FIRST_NAME),
+        'last_name': col(COL_LAST_NAME),
+        'middle_name': col(COL_MIDDLE_NAME),
+        'credential': col(COL_CREDENTIAL),
+        'gender': col(COL_GENDER),
+    }
+    if entity_type == '2':
+        basic['organization_name'] = col(COL_ORG_NAME)
+
+    taxonomies = []
+    for i in range(1, MAX_TAXONOMIES + 1):
+        code = col(f'Healthcare Provider Taxonomy Code_{i}')
+        if not code:
+            continue
+        taxonomy = {
+            'code': code,
+            'desc': taxonomy_labels.get(code, code),
+            'primary': col(f'Healthcare Provider Primary Taxonomy Switch_{i}') == 'Y',
+            'license': col(f'Provider License Number_{i}'),
+            'state': col(f'Provider License Number State Code_{i}'),
+        }
+        taxonomies.append(taxonomy)
+    # The registry API lists the primary taxonomy first
+    taxonomies.sort(key=lambda t: not t['primary'])
+
+    return {
+        'number': col(COL_NPI),
+        'enumeration_type': 'NPI-2' if entity_type == '2' else 'NPI-1',
+        'basic': {k: v for k, v in basic.items() if v},
+        'addresses': [address('LOCATION', LOCATION_COLUMNS), address('MAILING', MAILING_COLUMNS)],
+        'taxonomies': taxonomies,
+        'practiceLocations': [],
+    }
+
+
+def _iter_chunks(reader, columns: Dict[str, int], taxonomy_labels: Dict[str, str],
+                 chunk_size: int) -> Iterator[List[tuple]]:
+    """Stream CSV rows into chunks of index rows"""
+    chunk = []
+    npi_idx = columns[COL_NPI]
+    for row in reader:
+        if len(row) <= npi_idx or not row[npi_idx].strip().isdigit():
+            continue
+
+        deactivated = columns.get(COL_DEACTIVATION_DATE)
+        reactivated = columns.get(COL_REACTIVATION_DATE)
+        if deactivated is not None and row[deactivated].strip():
+            if reactivated is None or not row[reactivated].strip():
+                continue
+
+        record = _nppes_row_to_record(row, columns, taxonomy_labels)
+        basic = record['basic']
+        location = record['addresses'][0]
+        chunk.append((
+            int(record['number']),
+            basic.get('last_name', '').upper(),
+            basic.get('first_name', '').upper(),
+            location.get('state', '').upper(),
+            json.dumps(record, separators=(',', ':'))
+        ))
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def build_nppes_index(csv_path: str, index_path: str, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                      taxonomy_labels: Optional[Dict[str, str]] = None) -> int:
+    """Stream an NPPES dissemination CSV into a SQLite index, returning the row count"""
+    taxonomy_labels = taxonomy_labels or {}
+    tmp_path = index_path + '.building'
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+
+    dir_path = os.path.dirname(index_path)
+    if dir_path:
+        os.makedirs(dir_path, exist_ok=True)
+
+    conn = sqlite3.connect(tmp_path)
+    conn.execute('PRAGMA journal_mode=OFF')
+    conn.execute('PRAGMA synchronous=OFF')
+    conn.execute('''
+        CREATE TABLE providers (
+            npi INTEGER PRIMARY KEY,
+            last_name TEXT NOT NULL,
+            first_name TEXT NOT NULL,
+            state TEXT NOT NULL,
+            record TEXT NOT NULL
+        )
+    ''')
+
+    total = 0
+    with open(csv_path, newline='', encoding='utf-8', errors='replace') as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        columns = {name.strip(): idx for idx, name in enumerate(header)}
+        if COL_NPI not in columns:
+            conn.close()
+            os.remove(tmp_path)
+            raise ValueError(f"{csv_path} does not look like an NPPES dissemination file")
+
+        for chunk in _iter_chunks(reader, columns, taxonomy_labels, chunk_size):
+            conn.executemany('INSERT OR REPLACE INTO providers VALUES (?, ?, ?, ?, ?)', chunk)
+            conn.commit()
+            total += len(chunk)
+
+    # Building the secondary index after the bulk load is much faster than maintaining it
+    conn.execute('CREATE INDEX ix_providers_name ON providers (last_name, first_name, state)')
+    conn.commit()
+    conn.execute('VACUUM')
+    conn.close()
+
+    os.replace(tmp_path, index_path)
+    return total
+
+
+class NPPESIndex:
+    """
+    Read-only NPI backend over an index built by build_nppes_index
+    """
+
+    MAX_NAME_RESULTS = 200  # the registry API caps result sets at 200
+
+    def __init__(self, index_path: str):
+        if not os.path.exists(index_path):
+            raise FileNotFoundError(f"NPPES index not found: {index_path}")
+        self.index_path = index_path
+        self._local = threading.local()
+
+    @property
+    def _conn(self) -> sqlite3.Connection:
+        # SQLite connections are per-thread; the index is shared read-only
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            uri = f"file:{os.path.abspath(self.index_path)}?mode=ro"
+            conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+            self._local.conn = conn
+        return conn
+
+    def search_by_npi(self, npi: str) -> Optional[Dict]:
+        """Look up a registry-shaped record by NPI number"""
+        npi = str(npi or '').strip()
+        if not npi.isdigit():
+            return None
+        row = self._conn.execute('SELECT record FROM providers WHERE npi = ?', (int(npi),)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def search_by_name(self, first_name: str, last_name: str, state: Optional[str] = None) -> List[Dict]:
+        """Look up registry-shaped records by first/last name and optional state"""
+        query = 'SELECT record FROM providers WHERE last_name = ? AND first_name = ?'
+        params = [(last_name or '').strip().upper(), (first_name or '').strip().upper()]
+        if state:
+            query += ' AND state = ?'
+            params.append(state.strip().upper())
+        query += ' LIMIT ?'
+        params.append(self.MAX_NAME_RESULTS)
+        return [json.loads(row[0]) for row in self._conn.execute(query, params)]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Build an offline NPI index from the NPPES dissemination CSV')
+    parser.add_argument('csv_path', help='Path to npidata_pfile_*.csv')
+    parser.add_argument('index_path', help='Output SQLite index path')
+    parser.add_argument('--taxonomy', help='NUCC taxonomy CSV used to label taxonomy codes')
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+    args = parser.parse_args()
+
+    labels = load_taxonomy_labels(args.taxonomy) if args.taxonomy else None
+    start = time.time()
+    count = build_nppes_index(args.csv_path, args.index_path, args.chunk_size, labels)
+    print(f"Indexed {count} providers into {args.index_path} in {time.time() - start:.1f}s")
@@ -0,0 +1,152 @@
+"""
+Single-pass provider field extraction from OCR text.
+
+The labeled field patterns are combined into one compiled regex of
+lookaheads, so a single forward scan reports every offset where any field
+pattern starts, with each field tried on its own (several fields can start
+at the same offset). scan() yields all of these candidates with their
+positions; select() keeps the best per field: the highest-priority label
+(Name: before Provider: before Dr.), earliest in the text.
+
+parse_ocr_text() runs the same scan but drops a pattern from it as soon as
+its field can no longer improve, so on a long OCR dump each field costs
+no more than its first useful match. The patterns and tie-breaking
+reproduce PDFExtractor's former per-field searches, so results are
+unchanged.
+"""
+import re
+from functools import lru_cache
+from typing import Dict, FrozenSet, Iterator, List, NamedTuple, Pattern
+
+NAME_WORDS = r'[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*'
+
+# group name -> (field, priority, pattern); the group's own text is the candidate value
+FIELD_PATTERNS = {
+    'npi': ('npi', 0, r'(?i:NPI)[:\s]*(?P<npi>\d{10})'),
+    'license_number': ('license_number', 0, r'(?i:License[:\s]*(?P<license_number>[A-Z0-9]+))'),
+    'name_label': ('name', 0, r'Name[:\s]+(?P<name_label>' + NAME_WORDS + ')'),
+    'provider_label': ('name', 1, r'Provider[:\s]+(?P<provider_label>' + NAME_WORDS + ')'),
+    'doctor_title': ('name', 2, r'Dr\.\s+(?P<doctor_title>' + NAME_WORDS + ')'),
+    'specialty_label': ('specialty', 0, r'Specialty[:\s]+(?P<specialty_label>' + NAME_WORDS + ')'),
+    'specialization_label': ('specialty', 1, r'Specialization[:\s]+(?P<specialization_label>' + NAME_WORDS + ')'),
+    'practice_label': ('specialty', 2, r'Practice[:\s]+(?P<practice_label>' + NAME_WORDS + ')'),
+    'email': ('email', 0, r'(?P<email>[\w\.-]+@[\w\.-]+\.\w+)'),
+    # The leading lookahead only skips offsets with no state and ZIP ahead in the same run of
+    # word/space/comma characters, which every match needs; it avoids quadratic backtracking
+    'address': ('address', 0, r'(?i:(?=\d[\w\s,]*?[A-Z]{2}[\s,]+\d{5})(?P<address>\d+\s+[\w\s]+(?:Street|St|Avenue|Ave|Road|Rd|Drive|Dr)'
+                                                       r'[\s,]+[\w\s,]+(?:[A-Z]{2})[\s,]+(?:\d{5}(?:-\d{4})?)))'),
+    'phone': ('phone', 0, r'(?P<phone>\+?1?[-.\s]?\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4})'),
+}
+
+
+def _unnamed(pattern: str) -> str:
+    return re.sub(r'\(\?P<\w+>', '(?:', pattern)
+
+
+ALL_GROUPS = frozenset(FIELD_PATTERNS)
+
+
+@lru_cache(maxsize=512)
+def _scanner(groups: FrozenSet[str]) -> Pattern:
+    """Combined scanner over a subset of the field patterns (compiled once per subset)"""
+    patterns = [pattern for group, (_, _, pattern) in FIELD_PATTERNS.items() if group in groups]
+    # An offset is reported only if some field starts there (the guard); each field is then
+    # tried on its own so one starting at the same offset as another is not hidden by it
+    return re.compile(
+        '(?=' + '|'.join(_unnamed(pattern) for pattern in patterns) + ')'
+        + ''.join(f'(?:(?={pattern})|)' for pattern in patterns)
+    )
+
+
+class Candidate(NamedTuple):
+    field: str
+    value: str
+    start: int
+    priority: int
+
+
+def _candidates(match) -> Iterator[Candidate]:
+    for group, value in match.groupdict().items():
+        if value is not None:
+            field, priority, _ = FIELD_PATTERNS[group]
+            yield Candidate(field, value, match.start(), priority)
+
+
+def scan(text: str) -> Iterator[Candidate]:
+    """Yield every field candidate in text, in order of position"""
+    for match in _scanner(ALL_GROUPS).finditer(text):
+        yield from _candidates(match)
+
+
+def _better(candidate: Candidate, current: Candidate) -> bool:
+    return current is None or (candidate.priority, candidate.start) < (current.priority, current.start)
+
+
+def select(candidates: List[Candidate]) -> Dict[str, Candidate]:
+    """Best candidate per field: lowest priority label, then earliest"""
+    best: Dict[str, Candidate] = {}
+    for candidate in candidates:
+        if _better(candidate, best.get(candidate.field)):
+            best[candidate.field] = candidate
+    return best
+
+
+def best_candidates(text: str) -> Dict[str, Candidate]:
+    """select(scan(text)), stopping each pattern once its field can no longer improve"""
+    best: Dict[str, Candidate] = {}
+    groups = ALL_GROUPS
+    position = 0
+    while groups:
+        match = _scanner(groups).search(text, position)
+        if match is None:
+            break
+        improved = False
+        for candidate in _candidates(match):
+            if _better(candidate, best.get(candidate.field)):
+                best[candidate.field] = candidate
+                improved = True
+        if improved:
+            # Later matches of a label can only lose to the current best of the same or a better label
+            groups = frozenset(
+                group for group in groups
+                if FIELD_PATTERNS[group][0] not in best or FIELD_PATTERNS[group][1] < best[FIELD_PATTERNS[group][0]].priority
+            )
+        position = match.start() + 1
+    return best
+
+
+def parse_ocr_text(text: str) -> Dict:
+    """Provider fields found in OCR text (same keys and values as the former per-field searches)"""
+    best = best_candidates(text)
+    data = {}
+
+    for field in ('phone', 'email', 'npi'):
+        if field in best:
+            data[field] = best[field].value
+
+    if 'name' in best:
+        name_parts = best['name'].value.split()
+        if len(name_parts) >= 2:
+            data['first_name'] = name_parts[0]
+            data['last_name'] = name_parts[-1]
+            if len(name_parts) > 2:
+                data['middle_name'] = ' '.join(name_parts[1:-1])
+
+    if 'address' in best:
+        parts = best['address'].value.split(',')
+        if len(parts) >= 2:
+            data['address_line1'] = parts[0].strip()
+            data['city'] = parts[1].strip()
+            if len(parts) >= 3:
+                state_zip = parts[2].strip().split()
+                if len(state_zip) >= 2:
+                    data['state'] = state_zip[0]
+                    data['zip_code'] = state_zip[1]
+
+    if 'specialty' in best:
+        data['specialty'] = best['specialty'].value
+
+    if 'license_number' in best:
+        data['license_number'] = best['license_number'].value
+
+    return data
@@ -0,0 +1,145 @@
+"""
+Page image preprocessing ahead of Tesseract.
+
+Tesseract time grows with pixel count and noise, so pages are reduced to a
+clean, upright black-on-white image first: grayscale, Otsu binarization and
+projection-profile deskew. Blank and near-blank pages are detected up front
+and not OCR'd at all, and text_regions() finds the horizontal bands of a
+page that actually contain ink so only those are passed to Tesseract.
+
+Uses Pillow only, so it runs in the OCR worker processes without extra
+dependencies.
+"""
+from typing import List, Tuple
+
+from PIL import Image
+
+BLANK_INK_FRACTION = 0.0002  # pages with less inked area than this are treated as blank
+INK_DENSITY_LEVEL = 38  # a thumbnail pixel at least ~15% covered by ink counts as inked; lone specks do not
+DESKEW_MAX_ANGLE = 5.0  # degrees searched either side of upright
+DESKEW_STEP = 0.5
+ANALYSIS_WIDTH = 600  # thumbnail width used for blank, skew and layout analysis
+REGION_ROW_INK = 0.005  # a thumbnail row with more ink than this holds text
+REGION_GAP = 0.02  # bands closer than this fraction of page height are merged
+REGION_PADDING = 0.01
+
+
+def _thumbnail(gray: Image.Image) -> Image.Image:
+    """Box-downsampled copy for analysis; averaging also removes speckle noise"""
+    if gray.width <= ANALYSIS_WIDTH:
+        return gray
+    height = max(1, round(gray.height * ANALYSIS_WIDTH / gray.width))
+    return gray.resize((ANALYSIS_WIDTH, height), Image.BOX)
+
+
+def _ink_mask(gray: Image.Image, threshold: int = 128) -> Image.Image:
+    """Inverted binary image: ink is 255, paper is 0"""
+    return gray.point(lambda value: 255 if value < threshold else 0)
+
+
+def _row_profile(mask: Image.Image) -> List[float]:
+    """Fraction of ink in each pixel row"""
+    return [value / 255.0 for value in mask.resize((1, mask.height), Image.BOX).getdata()]
+
+
+def otsu_threshold(gray: Image.Image) -> int:
+    """Gray level that best separates ink from paper (Otsu's method)"""
+    histogram = gray.histogram()[:256]
+    total = sum(histogram)
+    weighted_total = sum(level * count for level, count in enumerate(histogram))
+
+    background = 0
+    weighted_background = 0.0
+    best_variance = -1.0
+    threshold = 127
+    for level, count in enumerate(histogram):
+        background += count
+        if background == 0:
+            continue
+        foreground = total - background
+        if foreground == 0:
+            break
+        weighted_background += level * count
+        mean_background = weighted_background / background
+        mean_foreground = (weighted_total - weighted_background) / foreground
+        variance = background * foreground * (mean_background - mean_foreground) ** 2
+        if variance > best_variance:
+            best_variance = variance
+            threshold = level
+    return threshold
+
+
+def is_blank(image: Image.Image) -> bool:
+    """True for blank or near-blank pages (no meaningful ink once isolated specks are averaged out)"""
+    # Downsampling the full-resolution ink mask gives local ink density per thumbnail pixel
+    density = _thumbnail(_ink_mask(image.convert('L')))
+    inked = sum(density.histogram()[INK_DENSITY_LEVEL:256])
+    return inked < BLANK_INK_FRACTION * density.width * density.height
+
+
+def estimate_skew(binary: Image.Image) -> float:
+    """Rotation in degrees that makes text lines horizontal
+
+    Text rows produce the sharpest row-ink profile (highest variance) when
+    they are level, so a small range of angles is tried on a thumbnail.
+    """
+    mask = _ink_mask(_thumbnail(binary))
+    best_angle = 0.0
+    best_score = -1.0
+    steps = int(DESKEW_MAX_ANGLE / DESKEW_STEP)
+    for step in range(-steps, steps + 1):
+        angle = step * DESKEW_STEP
+        profile = _row_profile(mask.rotate(angle, resample=Image.NEAREST, fillcolor=0) if angle else mask)
+        mean = sum(profile) / len(profile)
+        score = sum((value - mean) ** 2 for value in profile)
+        if score > best_score:
+            best_score = score
+            best_angle = angle
+    return best_angle
+
+
+def preprocess_page(image: Image.Image, deskew: bool = True) -> Image.Image:
+    """Grayscale, binarize and deskew a page"""
+    gray = image.convert('L')
+    threshold = otsu_threshold(gray)
+    binary = gray.point(lambda value: 255 if value > threshold else 0)
+    if deskew:
+        angle = estimate_skew(binary)
+        if angle:
+            binary = binary.rotate(angle, resample=Image.NEAREST, expand=True, fillcolor=255)
+    return binary
+
+
+def text_regions(binary: Image.Image) -> List[Tuple[int, int, int, int]]:
+    """Bounding boxes (left, top, right, bottom) of the horizontal bands of a page that contain text"""
+    thumbnail = _thumbnail(binary)
+    mask = _ink_mask(thumbnail)
+    x_scale = binary.width / float(thumbnail.width)
+    y_scale = binary.height / float(thumbnail.height)
+    gap = max(1, int(REGION_GAP * thumbnail.height))
+    padding = int(REGION_PADDING * binary.height)
+
+    bands = []
+    for row, ink in enumerate(_row_profile(mask)):
+        if ink <= REGION_ROW_INK:
+            continue
+        if bands and row - bands[-1][1] <= gap:
+            bands[-1][1] = row
+        else:
+            bands.append([row, row])
+
+    boxes = []
+    for top, bottom in bands:
+        # Trim side margins using the band's column profile
+        band = mask.crop((0, top, mask.width, bottom + 1))
+        columns = [value for value in band.resize((band.width, 1), Image.BOX).getdata()]
+        inked = [column for column, value in enumerate(columns) if value]
+        if not inked:
+            continue
+        boxes.append((
+            max(0, int(inked[0] * x_scale) - padding),
+            max(0, int(top * y_scale) - padding),
+            min(binary.width, int((inked[-1] + 1) * x_scale) + padding),
+            min(binary.height, int((bottom + 1) * y_scale) + padding)
+        ))
+    return boxes
@@ -1,11 +1,20 @@
 import os
 import json
-from typing import Dict, List, Optional
+import re
+import hashlib
+import subprocess
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 from PIL import Image
 import pytesseract
-from pdf2image import convert_from_path
+from pdf2image import convert_from_path, pdfinfo_from_path
 import io
 import base64
+from services.ocr_parser import parse_ocr_text
+from services.ocr_preprocessing import is_blank, preprocess_page, text_regions
+from services.persistent_cache import PersistentCache
 
 try:
     from openai import OpenAI
@@ -13,60 +22,277 @@ try:
 except ImportError:
     OPENAI_AVAILABLE = False
 
+def _init_ocr_worker():
+    """Keep each tesseract process single-threaded so pool workers do not oversubscribe cores"""
+    os.environ['OMP_THREAD_LIMIT'] = '1'
+
+REGION_TESSERACT_CONFIG = '--psm 6'  # each cropped region is a single uniform block of text
+JSON_OBJECT_PATTERN = re.compile(r'\{.*\}', re.DOTALL)  # JSON object in a VLM reply (may be fenced)
+
+def _ocr_image(image: Image.Image, options: Dict) -> Dict:
+    """Preprocess and OCR one page image, returning its text, OCR time and whether it was blank"""
+    start = time.perf_counter()
+    if options.get('skip_blank') and is_blank(image):
+        return {'text': '', 'seconds': time.perf_counter() - start, 'blank': True}
+    
+    processed = image
+    if options.get('preprocess'):
+        processed = preprocess_page(image, deskew=options.get('deskew', True))
+    
+    if options.get('preprocess') and options.get('regions'):
+        texts = [
+            pytesseract.image_to_string(processed.crop(box), config=REGION_TESSERACT_CONFIG)
+            for box in text_regions(processed)
+        ]
+        text = '\n'.join(texts)
+    else:
+        text = pytesseract.image_to_string(processed, config=options.get('tesseract_config') or '')
+    return {'text': text, 'seconds': time.perf_counter() - start, 'blank': False}
+
+def _ocr_page(pdf_path: str, page_number: int, dpi: int, options: Dict) -> Dict:
+    """Rasterize and OCR one page (1-based); runs in a worker process"""
+    images = convert_from_path(pdf_path, dpi=dpi, first_page=page_number, last_page=page_number)
+    if not images:
+        return {'text': '', 'seconds': 0.0, 'blank': True}
+    try:
+        return _ocr_image(images[0], options)
+    finally:
+        images[0].close()
+
+class FieldCompletionTracker:
+    """
+    Tracks which target fields a multi-page extraction has filled, the best
+    confidence seen for each, and whether the required set is complete
+    """
+    
+    def __init__(self, required_fields: Iterable[str], min_confidence: float = 0.0):
+        self.required_fields = list(required_fields)
+        self.min_confidence = min_confidence
+        self.fields: Dict[str, Dict] = {}
+        self.pages_seen = 0
+    
+    def add(self, page_number: int, data: Optional[Dict], confidence: float):
+        """Record the fields one page produced at the confidence of the path that read it"""
+        self.pages_seen += 1
+        for field, value in (data or {}).items():
+            if value in (None, '', []):
+                continue
+            current = self.fields.get(field)
+            if current is None or confidence > current['confidence']:
+                self.fields[field] = {'value': value, 'confidence': confidence, 'page': page_number}
+    
+    def missing(self) -> List[str]:
+        """Required fields not yet filled at min_confidence"""
+        return [
+            field for field in self.required_fields
+            if field not in self.fields or self.fields[field]['confidence'] < self.min_confidence
+        ]
+    
+    @property
+    def complete(self) -> bool:
+        return not self.missing()
+
 class PDFExtractor:
     """
     Service for extracting information from PDFs, including scanned documents
     Uses VLM (Vision Language Model) for better accuracy
     """
     
-    def __init__(self, openai_api_key: Optional[str] = None):
+    DEFAULT_DPI = 300
+    DEFAULT_PAGE_WINDOW = 2  # pages rasterized and held in memory at once
+    MIN_TEXT_LAYER_CHARS = 25  # fewer embedded characters than this means an image-only page
+    TEXT_LAYER_TIMEOUT = 60
+    PROMPT_VERSION = 1  # bump when the VLM prompt or model changes so cached extractions are not reused
+    HASH_CHUNK_SIZE = 1024 * 1024
+    DEFAULT_VLM_CONCURRENCY = 4
+    DEFAULT_VLM_MAX_DIMENSION = 1600  # longest side in pixels of images sent to the VLM
+    DEFAULT_VLM_JPEG_QUALITY = 85
+    # Once every one of these fields is filled, the remaining pages are skipped
+    REQUIRED_FIELDS = [
+        'npi', 'first_name', 'last_name', 'address_line1', 'city', 'state', 'zip_code',
+        'phone', 'license_number'
+    ]
+    # Confidence of a field by the path that read its page
+    PATH_CONFIDENCE = {'text': 0.80, 'ocr': 0.70, 'vlm': 0.85}
+    LAYOUT_DPI = 24  # thumbnail resolution used to rank image pages by form-like layout
+    
+    def __init__(self, openai_api_key: Optional[str] = None, ocr_workers: Optional[int] = None,
+                 dpi: Optional[int] = None, page_window: Optional[int] = None, use_text_layer: bool = True,
+                 cache: Optional[PersistentCache] = None, openai_client=None,
+                 vlm_concurrency: Optional[int] = None, vlm_max_dimension: Optional[int] = None,
+                 vlm_image_format: str = 'JPEG', vlm_jpeg_quality: Optional[int] = None,
+                 stop_when_complete: bool = True, required_fields: Optional[List[str]] = None,
+                 min_field_confidence: float = 0.0, prioritize_pages: bool = True,
+                 ocr_preprocess: bool = True, ocr_deskew: bool = True, ocr_regions: bool = False,
+                 tesseract_config: str = '', skip_blank_pages: bool = True):
         self.openai_api_key = openai_api_key
-        self.openai_client = None
+        self.openai_client = openai_client
+        self.vlm_concurrency = vlm_concurrency or self.DEFAULT_VLM_CONCURRENCY
+        # 0 sends pages at full rasterized resolution
+        self.vlm_max_dimension = self.DEFAULT_VLM_MAX_DIMENSION if vlm_max_dimension is None else vlm_max_dimension
+        self.vlm_image_format = vlm_image_format.upper()
+        self.vlm_jpeg_quality = vlm_jpeg_quality or self.DEFAULT_VLM_JPEG_QUALITY
+        # Shared by every document this extractor processes, so concurrent uploads stay within the limit
+        self._vlm_semaphore = threading.BoundedSemaphore(self.vlm_concurrency)
+        self.ocr_workers = ocr_workers or 1
+        self.dpi = dpi or self.DEFAULT_DPI
+        self.page_window = page_window or self.DEFAULT_PAGE_WINDOW
+        self.use_text_layer = use_text_layer
+        # Early exit: stop processing pages once required_fields are filled at min_field_confidence
+        self.stop_when_complete = stop_when_complete
+        self.required_fields = required_fields or self.REQUIRED_FIELDS
+        self.min_field_confidence = min_field_confidence
+        self.prioritize_pages = prioritize_pages
+        # OCR preprocessing: grayscale/binarize/deskew, optional text-region cropping, blank-page skipping
+        self.ocr_options = {
+            'preprocess': ocr_preprocess,
+            'deskew': ocr_deskew,
+            'regions': ocr_regions,
+            'tesseract_config': tesseract_config,
+            'skip_blank': skip_blank_pages
+        }
+        self.skip_blank_pages = skip_blank_pages
+        # Successful extraction results keyed by file content hash and extraction mode
+        self.cache = cache
+        self._ocr_pool = None
+        self._pool_lock = threading.Lock()
         
-        if OPENAI_AVAILABLE and openai_api_key:
+        if self.openai_client is None and OPENAI_AVAILABLE and openai_api_key:
             try:
                 self.openai_client = OpenAI(api_key=openai_api_key)
             except Exception as e:
                 print(f"Warning: Could not initialize OpenAI client: {e}")
     
-    def extract_from_pdf(self, pdf_path: str, use_vlm: bool = True) -> Dict:
-        """Extract provider information from PDF"""
+    def extract_from_pdf(self, pdf_path: str, use_vlm: bool = True,
+                         cancel_event: Optional[threading.Event] = None) -> Dict:
+        """Extract provider information from PDF, reusing the cached result for an identical file"""
+        return self._cached_extraction(pdf_path, use_vlm, self._extract_pdf, pdf_path, use_vlm, cancel_event)
+    
+    def _extract_pdf(self, pdf_path: str, use_vlm: bool = True,
+                     cancel_event: Optional[threading.Event] = None) -> Dict:
+        """Run extraction on a PDF
+        
+        Pages with an embedded text layer are parsed directly; only
+        image-only pages are rasterized, a small window at a time, and
+        released once processed, so peak memory does not grow with page
+        count. With stop_when_complete, image pages are visited most
+        promising first and the rest are skipped once the required fields
+        are filled; if the text layer fills them, no page is rendered at
+        all. Setting cancel_event stops the extraction before the next
+        page.
+        """
         try:
-            # Convert PDF to images
-            images = convert_from_path(pdf_path, dpi=300)
-            
-            if not images:
+            page_count = int(pdfinfo_from_path(pdf_path).get('Pages') or 0)
+            if not page_count:
                 return {
                     'success': False,
                     'error': 'Could not extract images from PDF',
                     'data': {}
                 }
+            page_numbers = range(1, page_count + 1)
+            text_layer = self._text_layer(pdf_path) if self.use_text_layer else {}
+            tracker = FieldCompletionTracker(self.required_fields, self.min_field_confidence)
             
-            # Extract text from all pages
-            extracted_text = []
-            extracted_data = {}
+            # Text-layer pages are free to read, so they count toward completion first
+            text_results = {}
+            for page_number in sorted(text_layer):
+                text_results[page_number] = self._parse_ocr_text(text_layer[page_number])
+                tracker.add(page_number, text_results[page_number], self.PATH_CONFIDENCE['text'])
+            
+            image_pages = [n for n in page_numbers if n not in text_layer]
+            if self.stop_when_complete and tracker.complete:
+                # The text layer filled the required fields; no image page is ordered or rasterized
+                image_pages = []
+            elif self.stop_when_complete and self.prioritize_pages:
+                image_pages = self._page_order(pdf_path, image_pages, page_count, cancel_event)
+            
+            if use_vlm and self.openai_client:
+                # Use VLM for better extraction
+                images = self._iter_page_images(pdf_path, image_pages, cancel_event)
+                try:
+                    vlm_results, vlm_pages = self._extract_pages_with_vlm(images, tracker)
+                finally:
+                    images.close()
+                image_results = vlm_results
+                image_path = 'vlm'
+                blank_pages = {page['page'] for page in vlm_pages if page.get('blank')}
+                page_stats = {
+                    'vlm_pages': vlm_pages,
+                    'vlm_bytes_sent': sum(page['bytes'] for page in vlm_pages),
+                    'vlm_failed_pages': [page['page'] for page in vlm_pages if page.get('error')]
+                }
+                confidence = 0.85
+            else:
+                # Fallback to OCR
+                def on_page(page_number: int, text: str) -> bool:
+                    tracker.add(page_number, self._parse_ocr_text(text), self.PATH_CONFIDENCE['ocr'])
+                    return self.stop_when_complete and tracker.complete
+                
+                if self.stop_when_complete and tracker.complete:
+                    ocr_results = {}
+                else:
+                    ocr_results = self._ocr_pages(pdf_path, image_pages, cancel_event, on_page)
+                image_results = {n: result['text'] for n, result in ocr_results.items()}
+                image_path = 'ocr'
+                blank_pages = {n for n, result in ocr_results.items() if result['blank']}
+                page_stats = {
+                    'ocr_pages': [
+                        {'page': n, 'seconds': round(ocr_results[n]['seconds'], 3), 'blank': ocr_results[n]['blank']}
+                        for n in sorted(ocr_results)
+                    ]
+                }
+                confidence = 0.70
             
-            for i, image in enumerate(images):
-                if use_vlm and self.openai_client:
-                    # Use VLM for better extraction
-                    page_data = self._extract_with_vlm(image)
-                    if page_data:
-                        extracted_data.update(page_data)
+            # Assemble processed pages in page order so results do not depend on processing order
+            extracted_data = {}
+            page_texts = []
+            page_paths = []
+            for page_number in page_numbers:
+                if page_number in text_layer:
+                    page_texts.append(text_layer[page_number])
+                    self._merge_fields(extracted_data, text_results[page_number])
+                    page_paths.append('text')
+                elif page_number in blank_pages:
+                    page_paths.append('blank')
+                elif page_number in image_results:
+                    if image_path == 'vlm':
+                        self._merge_fields(extracted_data, image_results[page_number] or {})
+                    else:
+                        page_texts.append(image_results[page_number])
+                    page_paths.append(image_path)
                 else:
-                    # Fallback to OCR
-                    page_text = pytesseract.image_to_string(image)
-                    extracted_text.append(page_text)
+                    page_paths.append('skipped')
+            if image_path == 'ocr':
+                extracted_data = self._parse_ocr_text('\n'.join(page_texts))
+            
+            pages_processed = page_count - page_paths.count('skipped')
+            field_stats = {
+                'page_paths': page_paths,
+                'text_layer_pages': page_paths.count('text'),
+                'field_confidence': tracker.fields,
+                'missing_fields': tracker.missing(),
+                'blank_pages': len(blank_pages),
+                **page_stats
+            }
             
-            if not use_vlm or not self.openai_client:
-                # Parse OCR text
-                full_text = '\n'.join(extracted_text)
-                extracted_data = self._parse_ocr_text(full_text)
+            cancelled = cancel_event is not None and cancel_event.is_set() and 'skipped' in page_paths
+            if cancelled:
+                return {
+                    'success': False,
+                    'cancelled': True,
+                    'error': f'Extraction cancelled after {pages_processed} of {page_count} pages',
+                    'data': extracted_data,
+                    'pages_processed': pages_processed,
+                    **field_stats
+                }
             
             return {
                 'success': True,
                 'data': extracted_data,
-                'confidence': 0.85 if use_vlm else 0.70,
-                'pages_processed': len(images)
+                'confidence': confidence,
+                'pages_processed': pages_processed,
+                'page_count': page_count,
+                **field_stats
             }
         except Exception as e:
             return {
@@ -75,19 +301,292 @@ class PDFExtractor:
                 'data': {}
             }
     
+    def _text_layer(self, pdf_path: str) -> Dict[int, str]:
+        """Embedded text of each page that has a usable text layer, keyed by 1-based page number
+        
+        Uses poppler's pdftotext (installed alongside pdf2image), which
+        separates pages with form feeds. Returns {} if it is unavailable.
+        """
+        try:
+            completed = subprocess.run(
+                ['pdftotext', '-enc', 'UTF-8', pdf_path, '-'],
+                capture_output=True, timeout=self.TEXT_LAYER_TIMEOUT
+            )
+        except (OSError, subprocess.TimeoutExpired):
+            return {}
+        if completed.returncode != 0:
+            return {}
+        
+        text_layer = {}
+        for page_number, text in enumerate(completed.stdout.decode('utf-8', errors='replace').split('\f'), start=1):
+            if sum(1 for char in text if char.isalnum()) >= self.MIN_TEXT_LAYER_CHARS:
+                text_layer[page_number] = text
+        return text_layer
+    
+    def _iter_page_images(self, pdf_path: str, page_numbers: Iterable[int],
+                          cancel_event: Optional[threading.Event] = None) -> Iterator[Tuple[int, Image.Image]]:
+        """Yield (page_number, image) for ascending pages, rasterizing up to page_window consecutive pages at a time
+        
+        Each image is closed as soon as the consumer asks for the next one.
+        """
+        windows = []
+        for page_number in page_numbers:
+            window = windows[-1] if windows else None
+            if window and window[-1] == page_number - 1 and len(window) < self.page_window:
+                window.append(page_number)
+            else:
+                windows.append([page_number])
+        
+        for window in windows:
+            if cancel_event is not None and cancel_event.is_set():
+                return
+            images = convert_from_path(pdf_path, dpi=self.dpi, first_page=window[0], last_page=window[-1])
+            try:
+                for page_number, image in zip(window, images):
+                    if cancel_event is not None and cancel_event.is_set():
+                        return
+                    yield page_number, image
+                    image.close()
+            finally:
+                for image in images:
+                    image.close()
+                del images
+    
+    def _ocr_pages(self, pdf_path: str, page_numbers: Iterable[int],
+                   cancel_event: Optional[threading.Event] = None,
+                   on_page: Optional[Callable[[int, str], bool]] = None) -> Dict[int, Dict]:
+        """OCR results ({'text', 'seconds', 'blank'}) of pages, visited in the order given, keyed by page number
+        
+        on_page(page_number, text) is called for each non-blank page in the
+        order given, as soon as it and every page before it have finished;
+        returning True stops further pages. The process pool therefore stops
+        at the same page as the serial path, and results of pages that
+        finished past it are dropped, so both return the same pages. Stops
+        early if cancel_event is set.
+        """
+        page_numbers = list(page_numbers)
+        texts: Dict[int, Dict] = {}
+        if not page_numbers:
+            return texts
+        
+        def finished(page_number: int) -> bool:
+            result = texts[page_number]
+            return bool(on_page) and not result['blank'] and on_page(page_number, result['text'])
+        
+        if self.ocr_workers <= 1 or len(page_numbers) <= 1:
+            for page_number, image in self._iter_page_images(pdf_path, page_numbers, cancel_event):
+                texts[page_number] = _ocr_image(image, self.ocr_options)
+                if finished(page_number):
+                    break
+            return texts
+        
+        # Each worker rasterizes only its own page; a bounded number of pages is in flight at a time
+        pool = self._pool()
+        pages = iter(page_numbers)
+        in_flight = {}
+        stopped = False
+        reported = 0  # length of the prefix of page_numbers passed to on_page
+        
+        def submit_next() -> bool:
+            if stopped or (cancel_event is not None and cancel_event.is_set()):
+                return False
+            for page_number in pages:
+                in_flight[pool.submit(_ocr_page, pdf_path, page_number, self.dpi, self.ocr_options)] = page_number
+                return True
+            return False
+        
+        for _ in range(self.ocr_workers * 2):
+            if not submit_next():
+                break
+        
+        try:
+            while in_flight and not stopped:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    page_number = in_flight.pop(future)
+                    if not future.cancelled():
+                        texts[page_number] = future.result()
+                while not stopped and reported < len(page_numbers) and page_numbers[reported] in texts:
+                    reported += 1
+                    stopped = finished(page_numbers[reported - 1])
+                submit_next()
+        finally:
+            # Queued pages are dropped; pages already running finish in the background
+            for future in in_flight:
+                future.cancel()
+        if stopped:
+            return {page_number: texts[page_number] for page_number in page_numbers[:reported]}
+        return texts
+    
+    def _pool(self) -> ProcessPoolExecutor:
+        """Worker processes are started on first use and reused across documents"""
+        with self._pool_lock:
+            if self._ocr_pool is None:
+                self._ocr_pool = ProcessPoolExecutor(max_workers=self.ocr_workers, initializer=_init_ocr_worker)
+            return self._ocr_pool
+    
+    def close(self):
+        """Shut down the OCR worker processes"""
+        with self._pool_lock:
+            if self._ocr_pool is not None:
+                self._ocr_pool.shutdown()
+                self._ocr_pool = None
+    
+    def _extract_pages_with_vlm(self, pages: Iterable[Tuple[int, Image.Image]],
+                                tracker: Optional[FieldCompletionTracker] = None) -> Tuple[Dict[int, Optional[Dict]], List[Dict]]:
+        """Send page images to the VLM concurrently
+        
+        At most vlm_concurrency requests are in flight, and a page is only
+        pulled from pages (i.e. rasterized) once a request slot is free.
+        With stop_when_complete, no further pages are sent once tracker
+        reports the required fields filled.
+        Returns (page_number -> data, per-page request stats); a request that
+        failed has data None and its error in the page's stats.
+        """
+        results: Dict[int, Optional[Dict]] = {}
+        page_stats: List[Dict] = []
+        tracker = tracker or FieldCompletionTracker(self.required_fields, self.min_field_confidence)
+        
+        def complete() -> bool:
+            return self.stop_when_complete and tracker.complete
+        
+        def request(image_url: str) -> Tuple[Optional[Dict], float, Optional[str]]:
+            start = time.perf_counter()
+            try:
+                return self._vlm_request(image_url), time.perf_counter() - start, None
+            except Exception as e:
+                print(f"Error in VLM extraction: {e}")
+                return None, time.perf_counter() - start, str(e)
+            finally:
+                self._vlm_semaphore.release()
+        
+        in_flight = {}
+        
+        def collect(futures):
+            for future in futures:
+                page_number, sent_bytes = in_flight.pop(future)
+                data, latency, error = future.result()
+                results[page_number] = data
+                page_stats.append({'page': page_number, 'latency': round(latency, 3), 'bytes': sent_bytes})
+                if error:
+                    page_stats[-1]['error'] = error
+                tracker.add(page_number, data, self.PATH_CONFIDENCE['vlm'])
+        
+        pages = iter(pages)
+        with ThreadPoolExecutor(max_workers=self.vlm_concurrency) as executor:
+            while not complete():
+                self._vlm_semaphore.acquire()
+                future = None
+                try:
+                    collect([future for future in list(in_flight) if future.done()])
+                    page = None if complete() else next(pages, None)
+                    if page is None:
+                        break
+                    page_number, image = page
+                    if self.skip_blank_pages and is_blank(image):
+                        page_stats.append({'page': page_number, 'latency': 0.0, 'bytes': 0, 'blank': True})
+                        continue
+                    image_url = self._encode_for_vlm(image)
+                    future = executor.submit(request, image_url)
+                    in_flight[future] = (page_number, len(image_url))
+                finally:
+                    # A submitted request releases the permit when it finishes; on every other
+                    # path (done, blank page, rasterizing or encoding raised) it is returned here
+                    if future is None:
+                        self._vlm_semaphore.release()
+            collect(list(in_flight))
+        
+        page_stats.sort(key=lambda page: page['page'])
+        return results, page_stats
+    
+    def _page_order(self, pdf_path: str, page_numbers: List[int], page_count: int,
+                    cancel_event: Optional[threading.Event] = None) -> List[int]:
+        """Order pages most likely to hold contact data first
+        
+        The first and last pages (cover sheets, signature/contact pages) go
+        first, then the rest by a form-layout score from low-resolution
+        thumbnails, so blank and prose pages go last.
+        """
+        scores = self._layout_scores(pdf_path, page_numbers, cancel_event)
+        
+        def priority(page_number: int) -> Tuple:
+            edge = 0 if page_number == 1 else 1 if page_number == page_count else 2
+            return edge, -scores.get(page_number, 0.0), page_number
+        
+        return sorted(page_numbers, key=priority)
+    
+    def _layout_scores(self, pdf_path: str, page_numbers: List[int],
+                       cancel_event: Optional[threading.Event] = None) -> Dict[int, float]:
+        """Form-likeness per page: ruled lines and field boxes show up as mostly-dark pixel rows"""
+        if len(page_numbers) <= 2:
+            return {}
+        scores = {}
+        try:
+            for offset in range(0, len(page_numbers), 50):
+                if cancel_event is not None and cancel_event.is_set():
+                    break
+                window = page_numbers[offset:offset + 50]
+                thumbnails = convert_from_path(pdf_path, dpi=self.LAYOUT_DPI, grayscale=True,
+                                               first_page=min(window), last_page=max(window))
+                first = min(window)
+                for index, thumbnail in enumerate(thumbnails):
+                    page_number = first + index
+                    if page_number in window:
+                        scores[page_number] = self._layout_score(thumbnail)
+                    thumbnail.close()
+        except Exception as e:
+            print(f"Warning: Could not score page layout: {e}")
+        return scores
+    
+    def _layout_score(self, thumbnail: Image.Image) -> float:
+        width, height = thumbnail.size
+        dark = thumbnail.convert('L').point(lambda value: 255 if value < 128 else 0)
+        # Mean darkness of each pixel row (0-255)
+        row_darkness = list(dark.resize((1, height), Image.BOX).getdata())
+        ruled_rows = sum(1 for value in row_darkness if value > 0.4 * 255)
+        # Ruled rows dominate; ink density breaks ties and sinks blank pages
+        return ruled_rows + sum(row_darkness) / (255.0 * height)
+    
+    def _merge_fields(self, target: Dict, data: Dict):
+        """Merge a page's fields into target; later pages win, but empty values never overwrite found ones"""
+        for field, value in data.items():
+            if value not in (None, '', []) or field not in target:
+                target[field] = value
+    
+    def _encode_for_vlm(self, image: Image.Image) -> str:
+        """Downscale to vlm_max_dimension and re-encode as a base64 data URL"""
+        if self.vlm_max_dimension and max(image.size) > self.vlm_max_dimension:
+            scale = self.vlm_max_dimension / max(image.size)
+            image = image.resize((max(1, round(image.width * scale)), max(1, round(image.height * scale))),
+                                 Image.LANCZOS)
+        
+        buffered = io.BytesIO()
+        if self.vlm_image_format == 'JPEG':
+            if image.mode not in ('RGB', 'L'):
+                image = image.convert('RGB')
+            image.save(buffered, format='JPEG', quality=self.vlm_jpeg_quality, optimize=True)
+            mime_type = 'image/jpeg'
+        else:
+            image.save(buffered, format='PNG')
+            mime_type = 'image/png'
+        return f"data:{mime_type};base64,{base64.b64encode(buffered.getvalue()).decode()}"
+    
     def _extract_with_vlm(self, image: Image.Image) -> Optional[Dict]:
-        """Extract structured data using Vision Language Model"""
+        """Extract structured data using Vision Language Model (raises if the request failed)"""
         if not self.openai_client:
             return None
+        with self._vlm_semaphore:
+            return self._vlm_request(self._encode_for_vlm(image))
+    
+    def _vlm_request(self, image_url: str) -> Optional[Dict]:
+        """Send one encoded page image to the VLM and parse the JSON it returns
         
-        try:
-            # Convert image to base64
-            buffered = io.BytesIO()
-            image.save(buffered, format="PNG")
-            img_base64 = base64.b64encode(buffered.getvalue()).decode()
-            
-            # Prepare prompt for structured extraction
-            prompt = """Extract provider information from this document. Return a JSON object with the following fields:
+        Returns None if the response holds no JSON object. API errors (outages,
+        rate limits) are raised, so callers can tell a failed request from an
+        empty page and keep it out of the extraction cache.
+        """
+        # Prepare prompt for structured extraction
+        prompt = """Extract provider information from this document. Return a JSON object with the following fields:
             - first_name
             - last_name
             - middle_name (if available)
@@ -107,116 +606,46 @@ class PDFExtractor:
             - education (as array)
             
             If a field is not found, set it to null. Return only valid JSON."""
-            
-            response = self.openai_client.chat.completions.create(
-                model="gpt-4-vision-preview",
-                messages=[
-                    {
-                        "role": "user",
-                        "content": [
-                            {"type": "text", "text": prompt},
-                            {
-                                "type": "image_url",
-                                "image_url": {
-                                    "url": f"data:image/png;base64,{img_base64}"
-                                }
-                            }
-                        ]
-                    }
-                ],
-                max_tokens=1000
-            )
-            
-            result_text = response.choices[0].message.content
-            
-            # Try to extract JSON from response
-            import re
-            json_match = re.search(r'\{.*\}', result_text, re.DOTALL)
-            if json_match:
-                extracted_json = json.loads(json_match.group())
-                return extracted_json
-            
-            return None
-        except Exception as e:
-            print(f"Error in VLM extraction: {e}")
-            return None
-    
-    def _parse_ocr_text(self, text: str) -> Dict:
-        """Parse OCR text to extract provider information"""
-        import re
-        
-        data = {}
-        
-        # Extract phone
-        phone_pattern = r'(\+?1?[-.\s]?\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4})'
-        phones = re.findall(phone_pattern, text)
-        if phones:
-            data['phone'] = phones[0]
-        
-        # Extract email
-        email_pattern = r'[\w\.-]+@[\w\.-]+\.\w+'
-        emails = re.findall(email_pattern, text)
-        if emails:
-            data['email'] = emails[0]
-        
-        # Extract NPI
-        npi_pattern = r'NPI[:\s]*(\d{10})'
-        npi_match = re.search(npi_pattern, text, re.IGNORECASE)
-        if npi_match:
-            data['npi'] = npi_match.group(1)
-        
-        # Extract name (look for common patterns)
-        name_patterns = [
-            r'Name[:\s]+([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)',
-            r'Provider[:\s]+([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)',
-            r'Dr\.\s+([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)',
-        ]
         
-        for pattern in name_patterns:
-            match = re.search(pattern, text)
-            if match:
-                name_parts = match.group(1).split()
-                if len(name_parts) >= 2:
-                    data['first_name'] = name_parts[0]
-                    data['last_name'] = name_parts[-1]
-                    if len(name_parts) > 2:
-                        data['middle_name'] = ' '.join(name_parts[1:-1])
-                break
+        response = self.openai_client.chat.completions.create(
+            model="gpt-4-vision-preview",
+            messages=[
+                {
+                    "role": "user",
+                    "content": [
+                        {"type": "text", "text": prompt},
+                        {
+                            "type": "image_url",
+                            "image_url": {
+                                "url": image_url
+                            }
+                        }
+                    ]
+                }
+            ],
+            max_tokens=1000
+        )
         
-        # Extract address
-        address_pattern = r'(\d+\s+[\w\s]+(?:Street|St|Avenue|Ave|Road|Rd|Drive|Dr)[\s,]+[\w\s,]+(?:[A-Z]{2})[\s,]+(?:\d{5}(?:-\d{4})?))'
-        addr_match = re.search(address_pattern, text, re.IGNORECASE)
-        if addr_match:
-            addr_str = addr_match.group(1)
-            parts = addr_str.split(',')
-            if len(parts) >= 2:
-                data['address_line1'] = parts[0].strip()
-                data['city'] = parts[1].strip()
-                if len(parts) >= 3:
-                    state_zip = parts[2].strip().split()
-                    if len(state_zip) >= 2:
-                        data['state'] = state_zip[0]
-                        data['zip_code'] = state_zip[1]
-        
-        # Extract specialty
-        specialty_keywords = ['Specialty', 'Specialization', 'Practice']
-        for keyword in specialty_keywords:
-            pattern = f'{keyword}[:\s]+([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)'
-            match = re.search(pattern, text)
-            if match:
-                data['specialty'] = match.group(1)
-                break
+        result_text = response.choices[0].message.content
         
-        # Extract license
-        license_pattern = r'License[:\s]*([A-Z0-9]+)'
-        license_match = re.search(license_pattern, text, re.IGNORECASE)
-        if license_match:
-            data['license_number'] = license_match.group(1)
+        # Try to extract JSON from response
+        json_match = JSON_OBJECT_PATTERN.search(result_text)
+        if json_match:
+            extracted_json = json.loads(json_match.group())
+            return extracted_json
         
-        return data
+        return None
+    
+    def _parse_ocr_text(self, text: str) -> Dict:
+        """Parse OCR text to extract provider information (one precompiled scan, see services/ocr_parser.py)"""
+        return parse_ocr_text(text)
     
     def extract_from_image(self, image_path: str, use_vlm: bool = True) -> Dict:
-        """Extract information from image file"""
+        """Extract information from image file, reusing the cached result for an identical file"""
+        return self._cached_extraction(image_path, use_vlm, self._extract_image, image_path, use_vlm)
+    
+    def _extract_image(self, image_path: str, use_vlm: bool = True) -> Dict:
+        """Run extraction on an image file"""
         try:
             image = Image.open(image_path)
             
@@ -228,7 +657,7 @@ class PDFExtractor:
                     'confidence': 0.85
                 }
             else:
-                text = pytesseract.image_to_string(image)
+                text = _ocr_image(image, self.ocr_options)['text']
                 extracted_data = self._parse_ocr_text(text)
                 return {
                     'success': True,
@@ -241,4 +670,61 @@ class PDFExtractor:
                 'error': str(e),
                 'data': {}
             }
-
+    
+    def _cached_extraction(self, path: str, use_vlm: bool, extract, *args) -> Dict:
+        """Return the cached result for this file and mode, or run extract(*args) and cache it if it succeeded
+        
+        Only complete results are cached: one with no data, or with a page whose VLM
+        request failed, is returned but extracted again next time, so a transient
+        outage does not stick to the file.
+        """
+        if self.cache is None:
+            return extract(*args)
+        
+        try:
+            cache_key = self._cache_key(path, use_vlm)
+        except OSError as e:
+            return {
+                'success': False,
+                'error': str(e),
+                'data': {}
+            }
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            cached['cached'] = True
+            return cached
+        
+        result = extract(*args)
+        if result.get('success') and result.get('data') and not result.get('vlm_failed_pages'):
+            try:
+                self.cache.set(cache_key, result)
+            except Exception as e:
+                print(f"Warning: Could not cache extraction result: {e}")
+        return result
+    
+    def _cache_key(self, path: str, use_vlm: bool) -> str:
+        """Content hash of the file plus every setting that changes the extraction result"""
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(self.HASH_CHUNK_SIZE), b''):
+                digest.update(chunk)
+        
+        if use_vlm and self.openai_client:
+            mode = (f'vlm:prompt={self.PROMPT_VERSION}:size={self.vlm_max_dimension}:'
+                    f'format={self.vlm_image_format}')
+            if self.vlm_image_format == 'JPEG':
+                mode += f':quality={self.vlm_jpeg_quality}'
+        else:
+            mode = 'ocr:' + ':'.join(f'{name}={value}' for name, value in sorted(self.ocr_options.items()))
+        early_exit = 'all'
+        if self.stop_when_complete:
+            early_exit = (f"{','.join(sorted(self.required_fields))}@{self.min_field_confidence}:"
+                          f"prioritize={int(self.prioritize_pages)}")
+        return (f"{digest.hexdigest()}:{mode}:dpi={self.dpi}:text_layer={int(self.use_text_layer)}:"
+                f"early_exit={early_exit}")
+    
+    def cache_stats(self) -> Dict:
+        """Return extraction cache statistics"""
+        if self.cache is None:
+            return {'enabled': False}
+        return self.cache.stats()
@@ -0,0 +1,188 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+class PersistentCache:
+    """
+    SQLite-backed key/value cache with TTL expiry and LRU eviction.
+
+    Values are stored as JSON. Several caches can share one database file by
+    using different namespaces, and the file can be shared across processes.
+    """
+
+    EVICTION_INTERVAL = 64  # writes between eviction passes
+
+    def __init__(self, path: str, namespace: str = 'default', ttl: Optional[float] = None,
+                 max_entries: Optional[int] = None, max_bytes: Optional[int] = None):
+        self.path = path
+        self.namespace = namespace
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._lock = threading.Lock()
+        self._writes_since_eviction = 0
+
+        dir_path = os.path.dirname(path)
+        if dir_path:
+            os.makedirs(dir_path, exist_ok=True)
+
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS cache_entries (
+                namespace TEXT NOT NULL,
+                key TEXT NOT NULL,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                PRIMARY KEY (namespace, key)
+            ) WITHOUT ROWID
+        ''')
+        self._conn.execute(
+            'CREATE INDEX IF NOT EXISTS ix_cache_entries_lru ON cache_entries (namespace, accessed_at)'
+        )
+        self._conn.commit()
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Return the cached value for key, or default if missing or expired"""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT value, created_at FROM cache_entries WHERE namespace = ? AND key = ?',
+                (self.namespace, key)
+            ).fetchone()
+
+            if row is None:
+                self.misses += 1
+                return default
+
+            value, created_at = row
+            if self.ttl is not None and now - created_at > self.ttl:
+                self._conn.execute(
+                    'DELETE FROM cache_entries WHERE namespace = ? AND key = ?',
+                    (self.namespace, key)
+                )
+                self._conn.commit()
+                self.misses += 1
+                return default
+
+            self._conn.execute(
+                'UPDATE cache_entries SET accessed_at = ? WHERE namespace = ? AND key = ?',
+                (now, self.namespace, key)
+            )
+            self._conn.commit()
+            self.hits += 1
+
+        return json.loads(value)
+
+    def set(self, key: str, value: Any):
+        """Store a JSON-serializable value under key"""
+        now = time.time()
+        payload = json.dumps(value)
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO cache_entries (namespace, key, value, size, created_at, accessed_at) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                (self.namespace, key, payload, len(payload), now, now)
+            )
+            self._conn.commit()
+
+            self._writes_since_eviction += 1
+            if self._writes_since_eviction >= self.EVICTION_INTERVAL:
+                self._evict()
+
+    def delete(self, key: str):
+        """Remove key from the cache"""
+        with self._lock:
+            self._conn.execute(
+                'DELETE FROM cache_entries WHERE namespace = ? AND key = ?',
+                (self.namespace, key)
+            )
+            self._conn.commit()
+
+    def clear(self):
+        """Remove every entry in this cache's namespace"""
+        with self._lock:
+            self._conn.execute('DELETE FROM cache_entries WHERE namespace = ?', (self.namespace,))
+            self._conn.commit()
+
+    def evict(self):
+        """Expire stale entries and trim the cache to its size bounds"""
+        with self._lock:
+            self._evict()
+
+    def _evict(self):
+        """Eviction pass; caller must hold the lock"""
+        self._writes_since_eviction = 0
+        removed = 0
+
+        if self.ttl is not None:
+            cursor = self._conn.execute(
+                'DELETE FROM cache_entries WHERE namespace = ? AND created_at < ?',
+                (self.namespace, time.time() - self.ttl)
+            )
+            removed += cursor.rowcount
+
+        if self.max_entries is not None:
+            count = self._conn.execute(
+                'SELECT COUNT(*) FROM cache_entries WHERE namespace = ?', (self.namespace,)
+            ).fetchone()[0]
+            if count > self.max_entries:
+                cursor = self._conn.execute(
+                    'DELETE FROM cache_entries WHERE namespace = ? AND key IN ('
+                    'SELECT key FROM cache_entries WHERE namespace = ? ORDER BY accessed_at LIMIT ?)',
+                    (self.namespace, self.namespace, count - self.max_entries)
+                )
+                removed += cursor.rowcount
+
+        if self.max_bytes is not None:
+            total = self._conn.execute(
+                'SELECT COALESCE(SUM(size), 0) FROM cache_entries WHERE namespace = ?', (self.namespace,)
+            ).fetchone()[0]
+            if total > self.max_bytes:
+                # Walk entries oldest-first until enough bytes are freed
+                excess = total - self.max_bytes
+                victims = []
+                for key, size in self._conn.execute(
+                    'SELECT key, size FROM cache_entries WHERE namespace = ? ORDER BY accessed_at',
+                    (self.namespace,)
+                ):
+                    victims.append((self.namespace, key))
+                    excess -= size
+                    if excess <= 0:
+                        break
+                self._conn.executemany(
+                    'DELETE FROM cache_entries WHERE namespace = ? AND key = ?', victims
+                )
+                removed += len(victims)
+
+        self._conn.commit()
+        self.evictions += removed
+
+    def stats(self) -> Dict:
+        """Return hit/miss counters and current size"""
+        with self._lock:
+            entries, size = self._conn.execute(
+                'SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache_entries WHERE namespace = ?',
+                (self.namespace,)
+            ).fetchone()
+        lookups = self.hits + self.misses
+        return {
+            'namespace': self.namespace,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': (self.hits / lookups) if lookups else 0.0,
+            'evictions': self.evictions,
+            'entries': entries,
+            'size_bytes': size
+        }
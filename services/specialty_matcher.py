@@ -0,0 +1,159 @@
+"""
+Multi-pattern specialty matching for provider website text.
+
+A SpecialtyMatcher compiles a taxonomy of specialty names into one
+Aho-Corasick automaton, so every mention of every term is found in a single
+linear pass over the page no matter how many terms the taxonomy has. Matches
+must start and end on word boundaries ("Urology" does not match inside
+"Neurology"). The pyahocorasick C extension is used when installed, with a
+pure-Python automaton as the fallback.
+
+The taxonomy is the 20 common specialties by default, or the Classification
+and Specialization names from the NUCC taxonomy CSV.
+"""
+import csv
+import threading
+from collections import deque
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
+DEFAULT_SPECIALTIES = [
+    'Cardiology', 'Dermatology', 'Endocrinology', 'Gastroenterology',
+    'Hematology', 'Infectious Disease', 'Nephrology', 'Neurology',
+    'Oncology', 'Pulmonology', 'Rheumatology', 'Urology',
+    'Family Medicine', 'Internal Medicine', 'Pediatrics', 'Psychiatry',
+    'Surgery', 'Orthopedics', 'Ophthalmology', 'Otolaryngology'
+]
+
+
+def load_nucc_specialties(nucc_csv_path: str) -> List[str]:
+    """Load the distinct Classification and Specialization names from the NUCC taxonomy CSV"""
+    terms = []
+    with open(nucc_csv_path, newline='', encoding='utf-8-sig', errors='replace') as f:
+        for row in csv.DictReader(f):
+            for column in ('Classification', 'Specialization'):
+                term = (row.get(column) or '').strip()
+                if term:
+                    terms.append(term)
+    return list(dict.fromkeys(terms))
+
+
+def _normalize(text: str) -> str:
+    """Lowercase and collapse whitespace so terms match across line breaks"""
+    return ' '.join(text.lower().split())
+
+
+class _PythonAutomaton:
+    """Aho-Corasick automaton over characters (goto/fail/output tables)"""
+
+    def __init__(self, keys: Iterable[str]):
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        self.output: List[List[int]] = [[]]
+        self.keys: List[str] = []
+
+        for key in keys:
+            node = 0
+            for char in key:
+                nxt = self.goto[node].get(char)
+                if nxt is None:
+                    nxt = len(self.goto)
+                    self.goto[node][char] = nxt
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.output.append([])
+                node = nxt
+            self.output[node].append(len(self.keys))
+            self.keys.append(key)
+
+        # Breadth-first fail links; each node inherits the outputs of its fail node
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self.goto[node].items():
+                queue.append(child)
+                fallback = self.fail[node]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                target = self.goto[fallback].get(char, 0)
+                self.fail[child] = target if target != child else 0
+                self.output[child] = self.output[child] + self.output[self.fail[child]]
+
+    def iter(self, text: str) -> Iterator[Tuple[int, str]]:
+        """Yield (end_index, key) for every occurrence of every key"""
+        goto, fail, output, keys = self.goto, self.fail, self.output, self.keys
+        root = goto[0]
+        node = 0
+        for index, char in enumerate(text):
+            if node == 0 and char not in root:
+                continue
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            for key_index in output[node]:
+                yield index, keys[key_index]
+
+
+class SpecialtyMatcher:
+    """
+    Finds every taxonomy term mentioned in a text in one linear pass
+    """
+
+    def __init__(self, terms: Optional[Iterable[str]] = None):
+        # Normalized term -> display name (first spelling wins)
+        self.terms: Dict[str, str] = {}
+        for term in terms or DEFAULT_SPECIALTIES:
+            key = _normalize(term)
+            if key:
+                self.terms.setdefault(key, term)
+
+        if AHOCORASICK_AVAILABLE:
+            self._automaton = ahocorasick.Automaton()
+            for key in self.terms:
+                self._automaton.add_word(key, key)
+            self._automaton.make_automaton()
+        else:
+            self._automaton = _PythonAutomaton(self.terms)
+
+    @classmethod
+    def from_nucc_csv(cls, nucc_csv_path: str) -> 'SpecialtyMatcher':
+        """Build a matcher over the full NUCC taxonomy"""
+        return cls(load_nucc_specialties(nucc_csv_path))
+
+    def mentions(self, text: str) -> Iterator[Tuple[int, int, str]]:
+        """Yield (start, end, term) for each whole-word mention in the normalized text"""
+        normalized = _normalize(text)
+        if not normalized or not self.terms:
+            return
+        length = len(normalized)
+        for end, key in self._automaton.iter(normalized):
+            start = end - len(key) + 1
+            if start > 0 and normalized[start - 1].isalnum():
+                continue
+            if end + 1 < length and normalized[end + 1].isalnum():
+                continue
+            yield start, end + 1, self.terms[key]
+
+    def find_all(self, text: str) -> List[str]:
+        """Distinct terms mentioned in text, in order of first mention"""
+        return list(dict.fromkeys(term for _, _, term in sorted(self.mentions(text))))
+
+
+_shared_matchers: Dict[str, SpecialtyMatcher] = {}
+_shared_lock = threading.Lock()
+
+
+def shared_matcher(nucc_csv_path: Optional[str] = None) -> SpecialtyMatcher:
+    """Process-wide matcher for a taxonomy, built on first use and reused by every scraper"""
+    key = nucc_csv_path or ''
+    with _shared_lock:
+        matcher = _shared_matchers.get(key)
+        if matcher is None:
+            matcher = SpecialtyMatcher.from_nucc_csv(nucc_csv_path) if nucc_csv_path else SpecialtyMatcher()
+            _shared_matchers[key] = matcher
+        return matcher
@@ -0,0 +1,91 @@
+"""
+Offline stand-in for the OpenAI client used by PDFExtractor.
+
+StubVLMClient answers client.chat.completions.create(...) like the real
+client, after a simulated latency, with a synthetic provider record in
+which each field is found on a page with probability fill_rate. It records
+request counts, image bytes received and peak concurrency, so the VLM
+pipeline can be benchmarked without network access or an API key:
+
+    extractor = PDFExtractor(openai_client=StubVLMClient(latency=(0.5, 1.5)))
+"""
+import json
+import random
+import threading
+import time
+from types import SimpleNamespace
+from typing import Dict, Optional, Tuple
+
+DEFAULT_RECORD = {
+    'first_name': 'Jane',
+    'last_name': 'Doe',
+    'middle_name': 'Marie',
+    'npi': '1234567893',
+    'phone': '(512) 555-0100',
+    'email': 'jane.doe@example.com',
+    'address_line1': '1200 Congress Avenue',
+    'address_line2': None,
+    'city': 'Austin',
+    'state': 'TX',
+    'zip_code': '78701',
+    'specialty': 'Internal Medicine',
+    'license_number': 'TX12345',
+    'license_state': 'TX',
+    'practice_name': 'Capitol Internal Medicine',
+    'board_certifications': ['American Board of Internal Medicine'],
+    'education': ['University of Texas Medical Branch'],
+}
+
+
+class StubVLMClient:
+    """Mimics openai.OpenAI's chat.completions.create with simulated latency"""
+
+    def __init__(self, record: Optional[Dict] = None, latency: Tuple[float, float] = (0.5, 1.5),
+                 fill_rate: float = 0.5, seed: int = 0):
+        self.record = record or DEFAULT_RECORD
+        self.latency = latency
+        self.fill_rate = fill_rate
+
+        self.requests = 0
+        self.bytes_received = 0
+        self.max_concurrent = 0
+        self._active = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, model: str, messages, max_tokens: Optional[int] = None, **kwargs):
+        image_bytes = sum(
+            len(part['image_url']['url'])
+            for message in messages
+            for part in message.get('content', [])
+            if isinstance(part, dict) and part.get('type') == 'image_url'
+        )
+        with self._lock:
+            self.requests += 1
+            self.bytes_received += image_bytes
+            self._active += 1
+            self.max_concurrent = max(self.max_concurrent, self._active)
+            delay = self._random.uniform(*self.latency)
+            page = {
+                field: value if self._random.random() < self.fill_rate else None
+                for field, value in self.record.items()
+            }
+
+        try:
+            time.sleep(delay)
+        finally:
+            with self._lock:
+                self._active -= 1
+
+        content = f"```json\n{json.dumps(page)}\n```"
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+    def stats(self) -> Dict:
+        """Return request counters"""
+        return {
+            'requests': self.requests,
+            'bytes_received': self.bytes_received,
+            'max_concurrent': self.max_concurrent
+        }
@@ -1,57 +1,117 @@
 import requests
-from bs4 import BeautifulSoup
-from typing import Dict, Optional, List
-import re
+import hashlib
+from typing import Callable, Dict, Iterable, Iterator, Optional, List, Tuple
 import time
-from urllib.parse import urljoin, urlparse
+from services.crawler import CrawlerEngine
+from services.html_extraction import HTMLExtractor
+from services.persistent_cache import PersistentCache
+from services.single_flight import SingleFlight
+from services.specialty_matcher import SpecialtyMatcher, shared_matcher
 
 class WebScraper:
     """
     Service for scraping provider information from websites
     """
     
-    def __init__(self):
-        self.session = requests.Session()
+    def __init__(self, crawler: Optional[CrawlerEngine] = None, page_cache: Optional[PersistentCache] = None,
+                 extractor: Optional[HTMLExtractor] = None, specialty_matcher: Optional[SpecialtyMatcher] = None):
+        self.session = crawler.session if crawler else requests.Session()
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
         })
+        self.crawler = crawler or CrawlerEngine(self.session)
+        self.single_flight = SingleFlight()
+        self.extractor = extractor or HTMLExtractor()
+        self.specialty_matcher = specialty_matcher or shared_matcher()
+        
+        # Validators (ETag, Last-Modified, body hash) and extracted data per URL
+        self.page_cache = page_cache
+        self.pages_not_modified = 0
+        self.pages_unchanged = 0
+        self.pages_parsed = 0
     
     def scrape_provider_website(self, url: str, provider_name: str) -> Dict:
         """Scrape provider information from their website"""
+        # Concurrent scrapes of the same URL share one download and parse
+        return self.single_flight.do(url, self._scrape, url, provider_name)
+    
+    def scrape_many(self, urls: Iterable[str],
+                    started: Optional[Callable[[str], None]] = None) -> Iterator[Tuple[str, Dict]]:
+        """Scrape many websites concurrently, yielding (url, scraped_data) as each finishes
+        
+        Duplicate URLs are fetched once and yielded once. started(url), if given, is
+        called as each download begins (after any wait for its host's limits).
+        """
+        unique_urls = list(dict.fromkeys(url for url in urls if url))
+        cached_pages = {url: self._cached_page(url) for url in unique_urls}
+        pages = self.crawler.fetch_many(
+            unique_urls,
+            headers_for=lambda url: self._conditional_headers(cached_pages[url]),
+            started=started
+        )
+        for url, page in pages:
+            yield url, self._scraped_from_page(url, page, cached_pages[url])
+    
+    def stats(self) -> Dict:
+        """Return scraper counters"""
+        return {
+            'single_flight': self.single_flight.stats(),
+            'crawler': self.crawler.stats(),
+            'page_cache': self.page_cache.stats() if self.page_cache else {'enabled': False},
+            'pages_not_modified': self.pages_not_modified,
+            'pages_unchanged': self.pages_unchanged,
+            'pages_parsed': self.pages_parsed
+        }
+    
+    def _scrape(self, url: str, provider_name: str) -> Dict:
+        """Download and parse one provider website"""
+        cached = self._cached_page(url)
+        page = self.crawler.fetch(url, headers=self._conditional_headers(cached))
+        return self._scraped_from_page(url, page, cached)
+    
+    def _cached_page(self, url: str) -> Optional[Dict]:
+        return self.page_cache.get(url) if self.page_cache else None
+    
+    def _conditional_headers(self, cached: Optional[Dict]) -> Optional[Dict[str, str]]:
+        """Build If-None-Match / If-Modified-Since headers from a cached page's validators"""
+        if not cached:
+            return None
+        headers = {}
+        if cached.get('etag'):
+            headers['If-None-Match'] = cached['etag']
+        if cached.get('last_modified'):
+            headers['If-Modified-Since'] = cached['last_modified']
+        return headers or None
+    
+    def _scraped_from_page(self, url: str, page: Dict, cached: Optional[Dict] = None) -> Dict:
+        """Turn a crawler fetch result into scraped provider data, reusing cached extraction when unchanged"""
         try:
-            response = self.session.get(url, timeout=10)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Extract contact information
-            phone_pattern = re.compile(r'(\+?1?[-.\s]?\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4})')
-            email_pattern = re.compile(r'[\w\.-]+@[\w\.-]+\.\w+')
-            
-            text = soup.get_text()
+            if page.get('status') == 304 and cached:
+                self.pages_not_modified += 1
+                return cached['extracted']
+            if page.get('error'):
+                raise requests.RequestException(page['error'])
             
-            # Find phone numbers
-            phones = phone_pattern.findall(text)
-            phone = phones[0] if phones else None
-            
-            # Find email
-            emails = email_pattern.findall(text)
-            email = emails[0] if emails else None
-            
-            # Try to find address in structured format
-            address = self._extract_address(soup, text)
-            
-            # Extract specialties/services
-            specialties = self._extract_specialties(soup, text)
+            content = page['content']
+            content_hash = hashlib.sha256(content).hexdigest()
+            if cached and cached.get('content_hash') == content_hash:
+                # Server ignored the validators but the page is identical
+                self.pages_unchanged += 1
+                extracted = cached['extracted']
+            else:
+                self.pages_parsed += 1
+                extracted = self._parse_page(url, content)
             
-            return {
-                'phone': phone,
-                'email': email,
-                'address': address,
-                'specialties': specialties,
-                'website_url': url,
-                'confidence': 0.7 if phone or email else 0.4
-            }
+            if self.page_cache is not None and not page.get('truncated'):
+                headers = {k.lower(): v for k, v in page.get('headers', {}).items()}
+                self.page_cache.set(url, {
+                    'etag': headers.get('etag'),
+                    'last_modified': headers.get('last-modified'),
+                    'content_hash': content_hash,
+                    'extracted': extracted,
+                    'fetched_at': time.time()
+                })
+            return extracted
         except Exception as e:
             print(f"Error scraping {url}: {str(e)}")
             return {
@@ -64,48 +124,27 @@ class WebScraper:
                 'error': str(e)
             }
     
-    def _extract_address(self, soup: BeautifulSoup, text: str) -> Optional[Dict]:
-        """Extract address from webpage"""
-        # Look for common address patterns
-        address_patterns = [
-            r'(\d+\s+[\w\s]+(?:Street|St|Avenue|Ave|Road|Rd|Drive|Dr|Lane|Ln|Boulevard|Blvd|Court|Ct|Way|Circle|Cir)[\s,]+[\w\s,]+(?:CA|NY|TX|FL|IL|PA|OH|GA|NC|MI|NJ|VA|WA|AZ|MA|TN|IN|MO|MD|WI|CO|MN|SC|AL|LA|KY|OR|OK|CT|IA|AR|UT|NV|MS|KS|NM|NE|WV|ID|HI|NH|ME|RI|MT|DE|SD|ND|AK|VT|WY|DC)[\s,]+(?:\d{5}(?:-\d{4})?))',
-        ]
+    def _parse_page(self, url: str, content: bytes) -> Dict:
+        """Extract contact details and specialties from page HTML"""
+        page = self.extractor.extract(content)
+        phone = page['phone']
+        email = page['email']
         
-        for pattern in address_patterns:
-            matches = re.findall(pattern, text, re.IGNORECASE)
-            if matches:
-                # Parse the address
-                addr_str = matches[0]
-                parts = addr_str.split(',')
-                if len(parts) >= 2:
-                    return {
-                        'line1': parts[0].strip(),
-                        'city': parts[1].strip() if len(parts) > 1 else '',
-                        'state': parts[2].strip()[:2] if len(parts) > 2 else '',
-                        'zip_code': parts[2].strip().split()[-1] if len(parts) > 2 else ''
-                    }
+        # Extract specialties/services
+        specialties = self._extract_specialties(page['text'])
         
-        return None
+        return {
+            'phone': phone,
+            'email': email,
+            'address': page['address'],
+            'specialties': specialties,
+            'website_url': url,
+            'confidence': 0.7 if phone or email else 0.4
+        }
     
-    def _extract_specialties(self, soup: BeautifulSoup, text: str) -> List[str]:
+    def _extract_specialties(self, text: str) -> List[str]:
         """Extract medical specialties from webpage"""
-        # Common medical specialties to look for
-        common_specialties = [
-            'Cardiology', 'Dermatology', 'Endocrinology', 'Gastroenterology',
-            'Hematology', 'Infectious Disease', 'Nephrology', 'Neurology',
-            'Oncology', 'Pulmonology', 'Rheumatology', 'Urology',
-            'Family Medicine', 'Internal Medicine', 'Pediatrics', 'Psychiatry',
-            'Surgery', 'Orthopedics', 'Ophthalmology', 'Otolaryngology'
-        ]
-        
-        found_specialties = []
-        text_lower = text.lower()
-        
-        for specialty in common_specialties:
-            if specialty.lower() in text_lower:
-                found_specialties.append(specialty)
-        
-        return found_specialties
+        return self.specialty_matcher.find_all(text)
     
     def search_google_business(self, provider_name: str, city: str = None, state: str = None) -> Optional[Dict]:
         """Search for provider on Google Business (simulated - would use Google Maps API in production)"""
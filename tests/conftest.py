@@ -0,0 +1,78 @@
+import os
+import tempfile
+
+import pytest
+from flask import Flask
+
+# app.routes builds its caches from Config at import; keep them out of the source tree
+os.environ.setdefault('INSTANCE_PATH', tempfile.mkdtemp(prefix='provider-directory-tests-'))
+
+from app import db  # noqa: E402
+from services.npi_service import NPIService  # noqa: E402
+
+
+@pytest.fixture
+def app(tmp_path):
+    """Bare Flask app with the models on a temporary SQLite file (no routes, services or workers)"""
+    app = Flask(__name__, instance_path=str(tmp_path))
+    app.config.update(
+        SQLALCHEMY_DATABASE_URI=f"sqlite:///{tmp_path / 'test.db'}",
+        SQLALCHEMY_TRACK_MODIFICATIONS=False
+    )
+    db.init_app(app)
+    with app.app_context():
+        from app import models  # noqa: F401  (registers the tables)
+        db.create_all()
+        yield app
+        db.session.remove()
+
+
+@pytest.fixture
+def make_providers(app):
+    """Insert count synthetic providers (seeded, about 40% with data errors) and return them"""
+    import random
+
+    from faker import Faker
+
+    from app.models import Provider
+    from services.synthetic_data import generate_provider_dataset
+
+    def make(count: int, seed: int = 0, error_rate: float = 0.4):
+        Faker.seed(seed)
+        random.seed(seed)
+        columns = {column.name for column in Provider.__table__.columns}
+        providers = [
+            Provider(**{name: value for name, value in data.items() if name in columns}, status='pending')
+            for data in generate_provider_dataset(count, error_rate)
+        ]
+        db.session.add_all(providers)
+        db.session.commit()
+        return providers
+
+    return make
+
+
+class OfflineNPIService(NPIService):
+    """NPIService that reports every provider as not found in the registry"""
+
+    def validate_provider(self, provider_data):
+        return {'valid': False, 'confidence': 0.0, 'message': 'Provider not found in NPI registry'}
+
+
+class OfflineScraper:
+    def scrape_provider_website(self, url, provider_name):
+        return {}
+
+
+@pytest.fixture
+def client(app, monkeypatch):
+    """Test client for the API routes, with registry lookups and scraping stubbed out"""
+    from app import routes
+    from services.evidence import EvidenceGatherer
+
+    gatherer = EvidenceGatherer(OfflineNPIService(), OfflineScraper(), max_concurrency=4, timeout=30)
+    monkeypatch.setattr(routes, 'evidence_gatherer', gatherer)
+    monkeypatch.setattr(routes.data_validation_agent, 'evidence', gatherer)
+    monkeypatch.setattr(routes.enrichment_agent, 'evidence', gatherer)
+    app.register_blueprint(routes.bp)
+    return app.test_client()
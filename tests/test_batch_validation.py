@@ -0,0 +1,47 @@
+from app import db
+from app.models import Provider, ValidationBatch, ValidationResult
+from app.persistence import ValidationResultWriter
+from config import Config
+
+
+def test_batch_validates_and_persists_every_provider(client, make_providers):
+    providers = make_providers(12)
+
+    response = client.post('/api/batch/validate', json={'provider_ids': [p.id for p in providers]})
+    body = response.get_json()
+    assert response.status_code == 200
+    assert body['processed'] == 12
+    assert body['errors'] == []
+
+    db.session.expire_all()
+    assert {p.status for p in Provider.query} <= {'validated', 'needs_review'}
+    assert db.session.query(ValidationResult.provider_id).distinct().count() == 12
+    assert db.session.get(ValidationBatch, body['batch_id']).status == 'completed'
+
+
+def test_failed_chunk_write_fails_the_batch(client, make_providers, monkeypatch):
+    providers = make_providers(6)
+    monkeypatch.setattr(Config, 'VALIDATION_WRITE_CHUNK_SIZE', 2)
+    flush = ValidationResultWriter.flush
+    flushes = []
+
+    def flaky_flush(writer):
+        flushes.append(writer.pending)
+        if len(flushes) == 2:
+            raise RuntimeError('database is locked')
+        flush(writer)
+
+    monkeypatch.setattr(ValidationResultWriter, 'flush', flaky_flush)
+    response = client.post('/api/batch/validate', json={'provider_ids': [p.id for p in providers]})
+    body = response.get_json()
+    assert response.status_code == 500
+    assert 'database is locked' in body['error']
+    # The batch stops at the failed chunk instead of carrying on past it
+    assert flushes == [2, 2]
+
+    db.session.expire_all()
+    assert db.session.get(ValidationBatch, body['batch_id']).status == 'failed'
+    written = {provider_id for (provider_id,) in db.session.query(ValidationResult.provider_id).distinct()}
+    assert len(written) == 2
+    pending = {p.id for p in Provider.query.filter_by(status='pending')}
+    assert pending == {p.id for p in providers} - written
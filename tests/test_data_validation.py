@@ -0,0 +1,84 @@
+import random
+import time
+
+from agents.data_validation_agent import DataValidationAgent
+from services.crawler import CrawlerEngine
+from services.evidence import EvidenceGatherer
+from services.npi_service import NPIRegistryUnavailable, NPIService
+from services.web_scraper import WebScraper
+
+
+class FakeRegistry:
+    """NPIService backend: NPPES-shaped records that match, contradict or are missing, after a random delay"""
+
+    def __init__(self, providers):
+        self.records = {}
+        for index, provider in enumerate(providers):
+            if provider.npi and index % 5 != 4:
+                self.records[provider.npi] = self.record(provider, matching=index % 2 == 0)
+        self.unavailable = {provider.npi for index, provider in enumerate(providers) if index % 7 == 3}
+
+    def record(self, provider, matching):
+        return {
+            'number': provider.npi,
+            'basic': {'first_name': provider.first_name.upper(), 'last_name': provider.last_name.upper()},
+            'addresses': [{
+                'address_purpose': 'LOCATION',
+                'address_1': provider.address_line1 if matching else '99 Elsewhere Rd',
+                'city': provider.city,
+                'state': provider.state,
+                'postal_code': provider.zip_code,
+                'telephone_number': provider.phone if matching else '512-555-0000'
+            }],
+            'taxonomies': [{'desc': provider.specialty}]
+        }
+
+    def search_by_npi(self, npi):
+        time.sleep(random.random() / 200)
+        if npi in self.unavailable:
+            raise NPIRegistryUnavailable('503 from registry')
+        return self.records.get(npi)
+
+    def search_by_name(self, first_name, last_name, state=None):
+        time.sleep(random.random() / 200)
+        return []
+
+
+class PracticeSites(CrawlerEngine):
+    """CrawlerEngine serving a practice page per URL after a random delay (no network)"""
+
+    def __init__(self):
+        super().__init__(per_host_delay=0)
+
+    def _download(self, url, headers=None):
+        time.sleep(random.random() / 200)
+        number = int(url.rstrip('/').split('/')[-1])
+        phone = '<p>Call us at (512) 555-0101</p>' if number % 2 else ''
+        html = f'<html><body><h1>Family Practice</h1>{phone}<p>office{number}@example.com</p></body></html>'
+        return {'url': url, 'status': 200, 'headers': {}, 'content': html.encode(), 'truncated': False, 'error': None}
+
+
+class WebsiteGatherer(EvidenceGatherer):
+    def find_website_url(self, provider):
+        return f'https://practice.example/{provider.id}' if provider.id % 3 else None
+
+
+def test_validate_providers_matches_per_provider_validation(app, make_providers):
+    providers = make_providers(60)
+    random.seed(1)
+    npi_service = NPIService(backend=FakeRegistry(providers))
+    scraper = WebScraper(crawler=PracticeSites())
+    agent = DataValidationAgent(
+        npi_service=npi_service, web_scraper=scraper,
+        evidence_gatherer=WebsiteGatherer(npi_service, scraper, max_concurrency=8, timeout=30)
+    )
+
+    expected = {provider.id: agent.validate_provider_contact(provider) for provider in providers}
+    results = list(agent.validate_providers(providers))
+
+    assert sorted(provider.id for provider, _ in results) == sorted(expected)
+    assert {provider.id: validation for provider, validation in results} == expected
+    # The fakes exercise every evidence path
+    sources = {v['source'] for validation in expected.values() for v in validation['validations']}
+    assert {'npi', 'web_scrape'} <= sources
+    assert any(validation['unavailable_sources'] == ['npi'] for validation in expected.values())
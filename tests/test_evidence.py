@@ -0,0 +1,151 @@
+import threading
+import time
+
+from services.crawler import CrawlerEngine
+from services.evidence import EvidenceGatherer
+from services.npi_service import NPIService
+from services.web_scraper import WebScraper
+
+
+class SlowRegistry(NPIService):
+    """NPIService whose lookups take delays[npi] seconds (0 by default)"""
+
+    def __init__(self, delays=None):
+        super().__init__()
+        self.delays = delays or {}
+        self.started = {}
+
+    def validate_provider(self, provider_data):
+        self.started[provider_data['npi']] = time.time()
+        time.sleep(self.delays.get(provider_data['npi'], 0))
+        return {'valid': False, 'confidence': 0.0, 'message': 'Provider not found in NPI registry'}
+
+
+class SlowCrawler(CrawlerEngine):
+    """CrawlerEngine whose pages take delays[url] seconds to 'download' (no network)"""
+
+    def __init__(self, delays=None):
+        super().__init__(per_host_delay=0)
+        self.delays = delays or {}
+
+    def _download(self, url, headers=None):
+        time.sleep(self.delays.get(url, 0))
+        return {'url': url, 'status': 200, 'headers': {}, 'content': b'<html><body>Welcome</body></html>',
+                'truncated': False, 'error': None}
+
+
+def SlowScraper(delays=None):
+    return WebScraper(crawler=SlowCrawler(delays))
+
+
+class WebsiteGatherer(EvidenceGatherer):
+    def find_website_url(self, provider):
+        return f'https://practice{provider.npi}.example/' if provider.practice_name else None
+
+
+def with_practices(providers):
+    for provider in providers:
+        provider.practice_name = provider.practice_name or 'Family Practice Associates'
+    return providers
+
+
+def test_lookups_queued_behind_a_hung_provider_are_not_charged_for_it(app, make_providers):
+    hung, *others = with_practices(make_providers(4))
+    registry = SlowRegistry({hung.npi: 1.0})
+    scraper = SlowScraper({f'https://practice{hung.npi}.example/': 1.0})
+    gatherer = WebsiteGatherer(registry, scraper, max_concurrency=1, timeout=0.3)
+
+    start = time.time()
+    evidence = {provider.id: found for provider, found in gatherer.gather_many([hung] + others)}
+
+    assert evidence[hung.id].unavailable_sources == ('npi', 'website')
+    # The only registry worker was held by the hung lookup, so the next one started when it returned
+    assert all(evidence[provider.id].unavailable_sources == () for provider in others)
+    assert registry.started[others[0].npi] - start >= 0.9
+    assert len(evidence) == 4
+
+
+def test_timeout_runs_from_when_each_lookup_starts(app, make_providers):
+    providers = make_providers(6)
+    # Each lookup takes most of the timeout; with one provider at a time, later ones would
+    # time out if their clock started when the batch did
+    registry = SlowRegistry({provider.npi: 0.2 for provider in providers})
+    gatherer = EvidenceGatherer(registry, SlowScraper(), max_concurrency=1, timeout=0.35)
+
+    results = list(gatherer.gather_many(providers))
+
+    assert [provider.id for provider, _ in results] == [provider.id for provider in providers]
+    assert all(found.unavailable_sources == () for _, found in results)
+
+
+def test_at_most_max_concurrency_providers_in_flight(app, make_providers):
+    providers = make_providers(12)
+    active = []
+    peak = []
+    lock = threading.Lock()
+
+    class CountingRegistry(SlowRegistry):
+        def validate_provider(self, provider_data):
+            with lock:
+                active.append(1)
+                peak.append(len(active))
+            try:
+                return super().validate_provider(provider_data)
+            finally:
+                with lock:
+                    active.pop()
+
+    registry = CountingRegistry({provider.npi: 0.02 for provider in providers})
+    results = list(EvidenceGatherer(registry, SlowScraper(), max_concurrency=3, timeout=5).gather_many(providers))
+
+    assert len(results) == 12
+    assert max(peak) == 3
+
+
+def test_registry_lookups_go_through_validate_many(app, make_providers):
+    providers = make_providers(10)
+    calls = []
+
+    class BulkRegistry(SlowRegistry):
+        def validate_many(self, providers_data, max_workers=None):
+            calls.append(max_workers)
+            return super().validate_many(providers_data, max_workers)
+
+        def validate_provider(self, provider_data):
+            if provider_data['npi'] == providers[4].npi:
+                raise ValueError('malformed registry record')
+            return super().validate_provider(provider_data)
+
+    results = dict(EvidenceGatherer(BulkRegistry(), SlowScraper(), max_concurrency=4, timeout=5).gather_many(providers))
+
+    assert calls == [4]
+    assert len(results) == 10
+    # A lookup that raises leaves that provider without registry evidence, as gather does
+    assert dict(results[providers[4]].npi_validation) == {}
+    assert all(results[provider].npi_validation['message'] == 'Provider not found in NPI registry'
+               for provider in providers if provider is not providers[4])
+
+
+def test_websites_are_scraped_through_the_crawler_in_bulk(app, make_providers):
+    providers = with_practices(make_providers(4))
+    crawler = SlowCrawler({f'https://group.example/{provider.npi}/': 0.25 for provider in providers})
+    crawler.per_host_concurrency = 1
+    bulk = []
+
+    class SharedHostGatherer(EvidenceGatherer):
+        def find_website_url(self, provider):
+            # One practice group: every page is on the same host, fetched one at a time
+            return f'https://group.example/{provider.npi}/'
+
+    class BulkScraper(WebScraper):
+        def scrape_many(self, urls, started=None):
+            bulk.append(len(urls))
+            return super().scrape_many(urls, started)
+
+    gatherer = SharedHostGatherer(SlowRegistry(), BulkScraper(crawler=crawler), max_concurrency=4, timeout=0.35)
+    results = dict(gatherer.gather_many(providers))
+
+    assert bulk == [4]
+    # Queued behind the host limit for up to 0.75s, but each page is only timed from its own start
+    assert all(found.unavailable_sources == () for found in results.values())
+    assert {found.scraped_data['website_url'] for found in results.values()} == set(crawler.delays)
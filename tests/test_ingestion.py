@@ -0,0 +1,135 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import db
+from app.ingestion import IngestionManager
+from app.models import IngestionJob, Provider
+from config import Config
+
+RECORD = {'first_name': 'Jane', 'last_name': 'Doe', 'npi': '1234567893', 'state': 'TX'}
+
+
+class FakeExtractor:
+    def __init__(self, result=None, error=None):
+        self.result = result or {'success': True, 'data': dict(RECORD)}
+        self.error = error
+
+    def extract_from_pdf(self, path, use_vlm=True):
+        if self.error:
+            raise self.error
+        return self.result
+
+    extract_from_image = extract_from_pdf
+
+
+def queue_job(manager, tmp_path, auto_stage=False) -> IngestionJob:
+    stored_path = tmp_path / 'ingest' / 'doc.pdf'
+    stored_path.parent.mkdir(exist_ok=True)
+    stored_path.write_bytes(b'%PDF-1.4')
+    _, jobs = manager.enqueue([('doc.pdf', str(stored_path))], 'upload', use_vlm=False, auto_stage=auto_stage)
+    return jobs[0]
+
+
+def test_completed_job_stages_provider(app, tmp_path):
+    manager = IngestionManager(FakeExtractor(), str(tmp_path / 'ingest'))
+    job = queue_job(manager, tmp_path, auto_stage=True)
+
+    manager._process(job.id)
+    job = db.session.get(IngestionJob, job.id)
+    assert job.status == 'completed'
+    assert db.session.get(Provider, job.provider_id).npi == RECORD['npi']
+    assert not (tmp_path / 'ingest' / 'doc.pdf').exists()
+
+
+def test_staging_error_marks_job_failed(app, tmp_path, monkeypatch):
+    manager = IngestionManager(FakeExtractor(), str(tmp_path / 'ingest'))
+    job = queue_job(manager, tmp_path, auto_stage=True)
+
+    def broken_stage(data):
+        raise RuntimeError('database is locked')
+
+    monkeypatch.setattr(manager, '_stage_provider', broken_stage)
+    manager._process(job.id)
+    db.session.expire_all()
+    job = db.session.get(IngestionJob, job.id)
+    assert job.status == 'failed'
+    assert job.error == 'database is locked'
+    assert job.completed_at is not None
+    assert not (tmp_path / 'ingest' / 'doc.pdf').exists()
+
+
+def test_commit_error_marks_job_failed(app, tmp_path, monkeypatch):
+    # A value the JSON column cannot serialize makes the final commit raise
+    manager = IngestionManager(FakeExtractor({'success': True, 'data': {'when': datetime.utcnow()}}),
+                               str(tmp_path / 'ingest'))
+    job = queue_job(manager, tmp_path)
+
+    manager._process(job.id)
+    db.session.expire_all()
+    job = db.session.get(IngestionJob, job.id)
+    assert job.status == 'failed'
+    assert job.result is None
+    assert not (tmp_path / 'ingest' / 'doc.pdf').exists()
+
+
+def test_extractor_exception_marks_job_failed(app, tmp_path):
+    manager = IngestionManager(FakeExtractor(error=ValueError('corrupt PDF')), str(tmp_path / 'ingest'))
+    job = queue_job(manager, tmp_path)
+
+    manager._process(job.id)
+    job = db.session.get(IngestionJob, job.id)
+    assert job.status == 'failed'
+    assert job.error == 'corrupt PDF'
+
+
+@pytest.mark.parametrize('stale_after, requeued', [(0, True), (3600, False)])
+def test_orphaned_processing_jobs_are_requeued(app, tmp_path, stale_after, requeued):
+    manager = IngestionManager(FakeExtractor(), str(tmp_path / 'ingest'), stale_after=stale_after)
+    orphan = queue_job(manager, tmp_path)
+    assert manager._claim(orphan.id)
+    waiting = queue_job(manager, tmp_path)
+
+    recovered = manager.recover_jobs()
+    db.session.expire_all()
+    assert (db.session.get(IngestionJob, orphan.id).status == 'queued') is requeued
+    assert recovered == ([orphan.id, waiting.id] if requeued else [waiting.id])
+
+
+def test_long_running_jobs_are_requeued_once_stale(app, tmp_path):
+    manager = IngestionManager(FakeExtractor(), str(tmp_path / 'ingest'), stale_after=3600)
+    job = queue_job(manager, tmp_path)
+    manager._claim(job.id)
+    IngestionJob.query.filter_by(id=job.id).update({'started_at': datetime.utcnow() - timedelta(hours=2)})
+    db.session.commit()
+
+    assert manager.recover_jobs() == [job.id]
+    manager._process(job.id)
+    assert db.session.get(IngestionJob, job.id).status == 'completed'
+
+
+def test_default_stale_window_leaves_running_jobs_alone(app, tmp_path):
+    # A job another process (or the reloader's other half) claimed a minute ago is still its own
+    running = IngestionManager(FakeExtractor(), str(tmp_path / 'ingest'), stale_after=Config.INGEST_STALE_AFTER)
+    job = queue_job(running, tmp_path)
+    running._claim(job.id)
+    IngestionJob.query.filter_by(id=job.id).update({'started_at': datetime.utcnow() - timedelta(minutes=1)})
+    db.session.commit()
+
+    assert IngestionManager(FakeExtractor(), str(tmp_path / 'ingest')).recover_jobs() == []
+    assert db.session.get(IngestionJob, job.id).status == 'processing'
+
+
+def test_create_app_can_leave_ingestion_workers_stopped(tmp_path, monkeypatch):
+    from app import create_app, routes
+
+    class TestConfig(Config):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'app.db'}"
+        INSTANCE_PATH = str(tmp_path)
+
+    started = []
+    monkeypatch.setattr(routes.ingestion_manager, 'start', started.append)
+    create_app(TestConfig, start_ingestion=False)
+    assert started == []
+    app = create_app(TestConfig)
+    assert started == [app]
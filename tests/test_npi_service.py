@@ -0,0 +1,131 @@
+import pytest
+import requests
+
+from services import npi_service as npi_module
+from services.npi_service import NPIRegistryUnavailable, NPIService
+from services.throttling import CircuitBreaker, CircuitOpenError, TokenBucket
+
+
+class FakeResponse:
+    def __init__(self, status_code=200, body=None, text=None):
+        self.status_code = status_code
+        self.ok = status_code < 400
+        self.headers = {}
+        self._body = body
+        self._text = text
+
+    def json(self):
+        if self._text is not None:
+            raise requests.exceptions.JSONDecodeError('Expecting value', self._text, 0)
+        return self._body
+
+    def raise_for_status(self):
+        if not self.ok:
+            raise requests.HTTPError(f'{self.status_code} error', response=self)
+
+
+class FakeSession:
+    """Returns (or raises) the given outcomes in order, one per GET"""
+
+    def __init__(self, *outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = 0
+
+    def get(self, url, params=None, timeout=None):
+        self.calls += 1
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, BaseException):
+            raise outcome
+        return outcome
+
+
+@pytest.fixture(autouse=True)
+def no_sleep(monkeypatch):
+    monkeypatch.setattr(npi_module.time, 'sleep', lambda seconds: None)
+
+
+def make_service(session, breaker=None, max_retries=0):
+    service = NPIService(
+        rate_limiter=TokenBucket(1000.0),
+        circuit_breaker=breaker or CircuitBreaker(failure_threshold=1, reset_timeout=60),
+        max_retries=max_retries
+    )
+    service.session = session
+    return service
+
+
+def half_open_breaker():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    breaker.record_failure()
+    return breaker
+
+
+@pytest.mark.parametrize('error', [
+    requests.exceptions.ChunkedEncodingError('connection broken'),
+    requests.exceptions.ContentDecodingError('bad gzip'),
+    requests.exceptions.TooManyRedirects('redirect loop'),
+    requests.Timeout('timed out'),
+    requests.ConnectionError('refused'),
+])
+def test_transport_errors_fail_the_half_open_trial(error):
+    breaker = half_open_breaker()
+    service = make_service(FakeSession(error), breaker)
+
+    with pytest.raises(NPIRegistryUnavailable):
+        service._get({'number': '1234567893'})
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+def test_unreadable_success_body_fails_the_half_open_trial():
+    breaker = half_open_breaker()
+    service = make_service(FakeSession(FakeResponse(200, text='<html>maintenance</html>')), breaker)
+
+    with pytest.raises(NPIRegistryUnavailable):
+        service._get({'number': '1234567893'})
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+def test_transport_errors_are_retried():
+    session = FakeSession(requests.exceptions.ChunkedEncodingError('broken'), FakeResponse(200, {'result_count': 0}))
+    service = make_service(session, max_retries=2)
+
+    assert service._get({'number': '1234567893'}) == {'result_count': 0}
+    assert session.calls == 2
+    assert service.retries == 1
+    assert service.circuit_breaker.state == CircuitBreaker.CLOSED
+
+
+def test_client_error_counts_as_an_answer():
+    breaker = half_open_breaker()
+    service = make_service(FakeSession(FakeResponse(400, {'Errors': []})), breaker)
+
+    with pytest.raises(requests.HTTPError):
+        service._get({'number': 'bad'})
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_lookups_recover_after_a_failed_trial():
+    breaker = half_open_breaker()
+    session = FakeSession(
+        requests.exceptions.ChunkedEncodingError('broken'),
+        FakeResponse(200, {'result_count': 1, 'results': [{'number': '1234567893'}]})
+    )
+    service = make_service(session, breaker)
+
+    with pytest.raises(NPIRegistryUnavailable):
+        service.search_by_npi('1234567893')
+    # reset_timeout=0: the next call is the next trial rather than failing fast for good
+    assert service.search_by_npi('1234567893') == {'number': '1234567893'}
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_open_circuit_fails_fast_without_a_request():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+    breaker.record_failure()
+    session = FakeSession()
+    service = make_service(session, breaker)
+
+    with pytest.raises(NPIRegistryUnavailable) as excinfo:
+        service._get({'number': '1234567893'})
+    assert isinstance(excinfo.value.__cause__, CircuitOpenError)
+    assert session.calls == 0
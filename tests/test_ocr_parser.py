@@ -0,0 +1,114 @@
+import random
+import re
+
+import pytest
+
+from services.ocr_parser import best_candidates, parse_ocr_text, scan, select
+
+
+def reference_parse(text: str) -> dict:
+    """PDFExtractor._parse_ocr_text as it was before the single-pass parser (one search per field)"""
+    data = {}
+    phones = re.findall(r'(\+?1?[-.\s]?\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4})', text)
+    if phones:
+        data['phone'] = phones[0]
+    emails = re.findall(r'[\w\.-]+@[\w\.-]+\.\w+', text)
+    if emails:
+        data['email'] = emails[0]
+    npi_match = re.search(r'NPI[:\s]*(\d{10})', text, re.IGNORECASE)
+    if npi_match:
+        data['npi'] = npi_match.group(1)
+    for pattern in [r'Name[:\s]+([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)', r'Provider[:\s]+([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)',
+                    r'Dr\.\s+([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)']:
+        match = re.search(pattern, text)
+        if match:
+            name_parts = match.group(1).split()
+            if len(name_parts) >= 2:
+                data['first_name'] = name_parts[0]
+                data['last_name'] = name_parts[-1]
+                if len(name_parts) > 2:
+                    data['middle_name'] = ' '.join(name_parts[1:-1])
+            break
+    addr_match = re.search(r'(\d+\s+[\w\s]+(?:Street|St|Avenue|Ave|Road|Rd|Drive|Dr)[\s,]+[\w\s,]+(?:[A-Z]{2})[\s,]+'
+                           r'(?:\d{5}(?:-\d{4})?))', text, re.IGNORECASE)
+    if addr_match:
+        parts = addr_match.group(1).split(',')
+        if len(parts) >= 2:
+            data['address_line1'] = parts[0].strip()
+            data['city'] = parts[1].strip()
+            if len(parts) >= 3:
+                state_zip = parts[2].strip().split()
+                if len(state_zip) >= 2:
+                    data['state'] = state_zip[0]
+                    data['zip_code'] = state_zip[1]
+    for keyword in ['Specialty', 'Specialization', 'Practice']:
+        match = re.search(keyword + r'[:\s]+([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)', text)
+        if match:
+            data['specialty'] = match.group(1)
+            break
+    license_match = re.search(r'License[:\s]*([A-Z0-9]+)', text, re.IGNORECASE)
+    if license_match:
+        data['license_number'] = license_match.group(1)
+    return data
+
+
+def random_page(rng: random.Random) -> str:
+    """OCR-like text: boilerplate with provider fields, near-misses and label clashes scattered through"""
+    words = ('the patient provider credentialing form page section board certified hospital '
+             'Dr. Name Practice license npi street 78701 TX').split()
+    fragments = [
+        lambda: f"Phone: ({rng.randint(200, 999)}) 555-{rng.randint(1000, 9999)}",
+        lambda: f"+1 {rng.randint(200, 999)}.555.{rng.randint(1000, 9999)}",
+        lambda: f"{rng.randint(1, 9999)} {rng.choice(['Main', 'Oak', 'Congress'])} "
+                f"{rng.choice(['Street', 'St', 'Ave', 'Road', 'Dr', 'drive'])}, {rng.choice(['Austin', 'Round Rock'])}, "
+                f"{rng.choice(['TX', 'tx', 'CA'])} {rng.randint(10000, 99999)}{rng.choice(['', '-1234'])}",
+        lambda: f"{rng.choice(['NPI', 'npi', 'Npi'])}{rng.choice([':', ' ', ': ', ''])}{rng.randint(10 ** 9, 10 ** 10 - 1)}",
+        lambda: f"{rng.choice(['Name', 'Provider', 'Dr.', 'Provider Name'])}{rng.choice([':', ' ', ': '])}"
+                f"{rng.choice(['Jane', 'John', 'jane'])} {rng.choice(['Marie ', ''])}{rng.choice(['Doe', 'Smith'])}",
+        lambda: f"{rng.choice(['Specialty', 'Specialization', 'Practice'])}: "
+                f"{rng.choice(['Internal Medicine', 'Cardiology', 'general'])}",
+        lambda: f"{rng.choice(['License', 'LICENSE', 'license'])}{rng.choice([':', ' ', '#'])}TX{rng.randint(1000, 99999)}",
+        lambda: f"provider{rng.randint(1, 99)}@example.{rng.choice(['com', 'org'])}",
+    ]
+    lines = []
+    for _ in range(rng.randint(1, 40)):
+        if rng.random() < 0.3:
+            lines.append(rng.choice(fragments)())
+        else:
+            lines.append(' '.join(rng.choice(words + [str(rng.randint(1, 99999))]) for _ in range(rng.randint(1, 12))))
+    return rng.choice(['\n', ' ', '\n\f']).join(lines)
+
+
+@pytest.mark.parametrize('text', [
+    '',
+    'no fields here at all',
+    'Name: Jane Marie Doe\nNPI: 1234567893\nPhone: (512) 555-0100\nEmail: jane.doe@example.com',
+    'Provider: John Smith\nDr. Jane Doe\nName: Ann Lee',
+    'Dr. Jane Doe signed\nProvider: John Smith',
+    'Name: Jane\nProvider: John Smith',
+    'NPI:1234567893 npi 9876543210',
+    '1200 Congress Avenue, Austin, TX 78701\n55 Main St, Round Rock, tx 78664-1234',
+    '1200 Congress Avenue Austin TX 78701',
+    'Practice: Family Medicine\nSpecialty: Cardiology\nSpecialization: Oncology',
+    'License: TX12345 license ca999',
+    'Phone 512.555.0100 and +1 (737) 555-0199',
+    'NPI: 1234567893',  # the phone pattern also matches the NPI digits
+    'a@b.co x@y.org',
+    '1 ' + 'word ' * 2000 + 'Street, Austin, TX 78701',
+])
+def test_matches_reference(text):
+    assert parse_ocr_text(text) == reference_parse(text)
+
+
+def test_matches_reference_on_random_pages():
+    rng = random.Random(19)
+    pages = [random_page(rng) for _ in range(500)]
+    for text in pages + ['\n\f'.join(pages[:50])]:
+        assert parse_ocr_text(text) == reference_parse(text), text
+
+
+def test_pruned_scan_selects_like_the_full_scan():
+    rng = random.Random(7)
+    for _ in range(200):
+        text = random_page(rng)
+        assert best_candidates(text) == select(list(scan(text)))
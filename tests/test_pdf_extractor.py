@@ -0,0 +1,307 @@
+import threading
+
+import pytest
+from PIL import Image, ImageDraw
+
+from services.pdf_extractor import PDFExtractor
+from services.vlm_stub import StubVLMClient
+
+
+def page_image() -> Image.Image:
+    image = Image.new('RGB', (200, 100), 'white')
+    ImageDraw.Draw(image).rectangle([20, 20, 180, 80], fill='black')
+    return image
+
+
+def pages(count: int):
+    for page_number in range(1, count + 1):
+        yield page_number, page_image()
+
+
+def run_with_timeout(func, timeout: float = 10.0):
+    """Run func on a thread and fail the test instead of hanging if it blocks"""
+    outcome = {}
+
+    def target():
+        try:
+            outcome['result'] = func()
+        except BaseException as e:
+            outcome['error'] = e
+
+    thread = threading.Thread(target=target, daemon=True)
+    thread.start()
+    thread.join(timeout)
+    assert not thread.is_alive(), 'extraction blocked waiting for a VLM permit'
+    if 'error' in outcome:
+        raise outcome['error']
+    return outcome['result']
+
+
+def make_extractor(**kwargs) -> PDFExtractor:
+    options = dict(openai_client=StubVLMClient(latency=(0.0, 0.0), fill_rate=1.0), vlm_concurrency=2,
+                   stop_when_complete=False, skip_blank_pages=True)
+    options.update(kwargs)
+    return PDFExtractor(**options)
+
+
+def test_encoding_failures_return_their_permits(monkeypatch):
+    extractor = make_extractor()
+    encode = extractor._encode_for_vlm
+
+    def broken_encode(image):
+        raise OSError('cannot encode page')
+
+    monkeypatch.setattr(extractor, '_encode_for_vlm', broken_encode)
+    for _ in range(extractor.vlm_concurrency + 1):
+        with pytest.raises(OSError):
+            run_with_timeout(lambda: extractor._extract_pages_with_vlm(pages(3)))
+
+    monkeypatch.setattr(extractor, '_encode_for_vlm', encode)
+    results, page_stats = run_with_timeout(lambda: extractor._extract_pages_with_vlm(pages(3)))
+    assert sorted(results) == [1, 2, 3]
+    assert [page['page'] for page in page_stats] == [1, 2, 3]
+
+
+def test_rasterizing_failures_return_their_permits():
+    extractor = make_extractor()
+
+    def failing_pages():
+        yield 1, page_image()
+        raise RuntimeError('pdftoppm failed')
+
+    for _ in range(extractor.vlm_concurrency + 1):
+        with pytest.raises(RuntimeError):
+            run_with_timeout(lambda: extractor._extract_pages_with_vlm(failing_pages()))
+
+    results, _ = run_with_timeout(lambda: extractor._extract_pages_with_vlm(pages(2)))
+    assert sorted(results) == [1, 2]
+
+
+def test_blank_pages_and_early_exit_return_their_permits():
+    extractor = make_extractor(stop_when_complete=True)
+    blank = [(1, Image.new('RGB', (200, 100), 'white')), (2, Image.new('RGB', (200, 100), 'white'))]
+
+    for _ in range(extractor.vlm_concurrency + 1):
+        results, page_stats = run_with_timeout(lambda: extractor._extract_pages_with_vlm(iter(blank + list(pages(5))[2:])))
+        assert [page['page'] for page in page_stats if page.get('blank')] == [1, 2]
+        # fill_rate=1.0: the first non-blank page fills every required field, so at most
+        # the pages already in flight (one per permit) are sent
+        assert 3 in results
+        assert set(results) <= {3, 4}
+
+    # Every permit is back: all of them can be taken without blocking
+    for _ in range(extractor.vlm_concurrency):
+        assert extractor._vlm_semaphore.acquire(timeout=1)
+
+
+class FakeDocument:
+    """Stands in for poppler and Tesseract: page n is an image n pixels wide whose OCR text is texts[n]"""
+
+    def __init__(self, texts, delays=None, rasterized_pages=None):
+        self.texts = texts
+        self.delays = delays or {}
+        self.rasterized_pages = rasterized_pages or len(texts)
+
+    def install(self, monkeypatch):
+        from services import pdf_extractor
+        monkeypatch.setattr(pdf_extractor, 'pdfinfo_from_path', lambda path: {'Pages': len(self.texts)})
+        monkeypatch.setattr(pdf_extractor, 'convert_from_path', self.convert_from_path)
+        monkeypatch.setattr(pdf_extractor, '_ocr_image', self.ocr_image)
+        monkeypatch.setattr(pdf_extractor, '_ocr_page', self.ocr_page)
+
+    def convert_from_path(self, path, dpi=None, first_page=1, last_page=None, **kwargs):
+        last_page = min(last_page or self.rasterized_pages, self.rasterized_pages)
+        return [Image.new('L', (page_number, 1), 255) for page_number in range(first_page, last_page + 1)]
+
+    def ocr_image(self, image, options):
+        return {'text': self.texts[image.width], 'seconds': 0.0, 'blank': False}
+
+    def ocr_page(self, pdf_path, page_number, dpi, options):
+        import time
+        time.sleep(self.delays.get(page_number, 0.0))
+        return self.ocr_image(Image.new('L', (page_number, 1), 255), options)
+
+
+def thread_pool_extractor(**kwargs) -> PDFExtractor:
+    """OCR 'process pool' backed by threads so the fake document is visible to the workers"""
+    from concurrent.futures import ThreadPoolExecutor
+    extractor = PDFExtractor(use_text_layer=False, prioritize_pages=False, **kwargs)
+    pool = ThreadPoolExecutor(max_workers=extractor.ocr_workers)
+    extractor._pool = lambda: pool
+    return extractor
+
+
+def test_pool_stops_on_the_same_page_as_serial(monkeypatch):
+    texts = {page_number: f'Page {page_number} notes' for page_number in range(1, 9)}
+    texts[3] = 'NPI: 1234567893'
+    # Later pages finish first, so pages 4-6 complete before page 3
+    document = FakeDocument(texts, delays={1: 0.05, 2: 0.1, 3: 0.3, 4: 0.0, 5: 0.0, 6: 0.0})
+    document.install(monkeypatch)
+
+    def stop_on_npi(page_number, text):
+        return 'NPI' in text
+
+    serial = thread_pool_extractor(ocr_workers=1)._ocr_pages('doc.pdf', list(texts), on_page=stop_on_npi)
+    pooled = thread_pool_extractor(ocr_workers=3)._ocr_pages('doc.pdf', list(texts), on_page=stop_on_npi)
+    assert sorted(serial) == [1, 2, 3]
+    assert pooled == serial
+
+
+def test_pool_and_serial_extractions_match_with_early_exit(monkeypatch):
+    texts = {page_number: f'Page {page_number} notes' for page_number in range(1, 9)}
+    texts[2] = 'Name: Jane Doe\nNPI: 1234567893\nPhone: (512) 555-0100'
+    texts[5] = 'Address: 1200 Congress Avenue, Austin, TX 78701\nLicense: TX12345'
+    texts[7] = 'Specialty: Internal Medicine'
+    document = FakeDocument(texts, delays={1: 0.05, 2: 0.1, 5: 0.2})
+    document.install(monkeypatch)
+
+    serial = thread_pool_extractor(ocr_workers=1)._extract_pdf('doc.pdf', use_vlm=False)
+    pooled = thread_pool_extractor(ocr_workers=4)._extract_pdf('doc.pdf', use_vlm=False)
+    assert serial['success'] and pooled['success']
+    assert serial['page_paths'] == ['ocr'] * 5 + ['skipped'] * 3
+    assert pooled['data'] == serial['data']
+    assert pooled['page_paths'] == serial['page_paths']
+
+
+def test_short_rasterization_is_not_reported_as_cancelled(monkeypatch):
+    texts = {page_number: f'Page {page_number} notes' for page_number in range(1, 5)}
+    FakeDocument(texts, rasterized_pages=2).install(monkeypatch)
+
+    result = thread_pool_extractor(ocr_workers=1, stop_when_complete=False)._extract_pdf('doc.pdf', use_vlm=False)
+    assert result['success']
+    assert 'cancelled' not in result
+    assert result['page_paths'] == ['ocr', 'ocr', 'skipped', 'skipped']
+
+
+def test_cancel_event_is_reported(monkeypatch):
+    texts = {page_number: f'Page {page_number} notes' for page_number in range(1, 5)}
+    FakeDocument(texts).install(monkeypatch)
+    cancel_event = threading.Event()
+    extractor = thread_pool_extractor(ocr_workers=1, stop_when_complete=False, page_window=1)
+
+    def cancel_after_first_page(page_number, text):
+        cancel_event.set()
+        return False
+
+    monkeypatch.setattr(extractor, '_parse_ocr_text', lambda text: {})
+    original = extractor._ocr_pages
+    monkeypatch.setattr(extractor, '_ocr_pages', lambda path, pages, event, on_page: original(
+        path, pages, event, cancel_after_first_page))
+    result = extractor._extract_pdf('doc.pdf', use_vlm=False, cancel_event=cancel_event)
+    assert result['cancelled'] is True
+    assert result['pages_processed'] == 1
+
+
+@pytest.mark.parametrize('use_vlm', [True, False])
+def test_complete_text_layer_skips_image_pages(monkeypatch, use_vlm):
+    texts = {page_number: f'Page {page_number} notes' for page_number in range(1, 5)}
+    document = FakeDocument(texts)
+    document.install(monkeypatch)
+    rasterized = []
+    monkeypatch.setattr('services.pdf_extractor.convert_from_path',
+                        lambda path, **kwargs: rasterized.append(kwargs) or document.convert_from_path(path, **kwargs))
+    extractor = make_extractor(stop_when_complete=True, prioritize_pages=True)
+    monkeypatch.setattr(extractor, '_text_layer', lambda path: {1: (
+        'Name: Jane Doe\nNPI: 1234567893\nPhone: (512) 555-0100\n'
+        'Address: 1200 Congress Avenue, Austin, TX 78701\nLicense: TX12345'
+    )})
+    monkeypatch.setattr(extractor, '_page_order', lambda *args: pytest.fail('image pages were ordered'))
+
+    result = extractor._extract_pdf('doc.pdf', use_vlm=use_vlm)
+    assert result['success']
+    assert result['page_paths'] == ['text', 'skipped', 'skipped', 'skipped']
+    assert rasterized == []
+
+
+def test_cache_key_includes_page_prioritization(tmp_path):
+    path = tmp_path / 'doc.pdf'
+    path.write_bytes(b'%PDF-1.4 test')
+    prioritized = PDFExtractor(prioritize_pages=True)._cache_key(str(path), use_vlm=False)
+    in_order = PDFExtractor(prioritize_pages=False)._cache_key(str(path), use_vlm=False)
+    assert prioritized != in_order
+    # Without early exit every page is read, so page order does not change the result
+    assert (PDFExtractor(stop_when_complete=False, prioritize_pages=True)._cache_key(str(path), use_vlm=False)
+            == PDFExtractor(stop_when_complete=False, prioritize_pages=False)._cache_key(str(path), use_vlm=False))
+
+
+class FlakyVLMClient(StubVLMClient):
+    """StubVLMClient whose requests fail (as in an outage or rate limit) while failing is set"""
+
+    def __init__(self, **kwargs):
+        super().__init__(latency=(0.0, 0.0), fill_rate=1.0, **kwargs)
+        self.failing = set()
+        self._stub_create = self.chat.completions.create
+        self.chat.completions.create = self._flaky_create
+
+    def _flaky_create(self, **kwargs):
+        if self.requests + 1 in self.failing:
+            self.requests += 1
+            raise RuntimeError('429 Too Many Requests')
+        return self._stub_create(**kwargs)
+
+
+def cached_vlm_extractor(tmp_path, client):
+    from services.persistent_cache import PersistentCache
+    return PDFExtractor(openai_client=client, use_text_layer=False, stop_when_complete=False,
+                        skip_blank_pages=False, cache=PersistentCache(str(tmp_path / 'cache.db'), 'pdf'))
+
+
+def test_failed_vlm_pages_are_reported_and_not_cached(tmp_path, monkeypatch):
+    FakeDocument({1: '', 2: '', 3: ''}).install(monkeypatch)
+    path = tmp_path / 'doc.pdf'
+    path.write_bytes(b'%PDF-1.4 three pages')
+    client = FlakyVLMClient()
+    client.failing = {2}
+    extractor = cached_vlm_extractor(tmp_path, client)
+
+    partial = extractor.extract_from_pdf(str(path))
+    assert partial['success'] is True
+    assert partial['data']  # the other pages still came back
+    assert len(partial['vlm_failed_pages']) == 1
+    assert [page for page in partial['vlm_pages'] if page.get('error')][0]['error'] == '429 Too Many Requests'
+
+    client.failing = set()
+    retried = extractor.extract_from_pdf(str(path))
+    assert 'cached' not in retried
+    assert retried['vlm_failed_pages'] == []
+    assert client.requests == 6
+
+    assert extractor.extract_from_pdf(str(path))['cached'] is True
+    assert client.requests == 6
+
+
+def test_empty_results_are_not_cached(tmp_path, monkeypatch):
+    FakeDocument({1: ''}).install(monkeypatch)
+    path = tmp_path / 'doc.pdf'
+    path.write_bytes(b'%PDF-1.4 one page')
+    client = StubVLMClient(latency=(0.0, 0.0), fill_rate=0.0)
+    extractor = cached_vlm_extractor(tmp_path, client)
+    monkeypatch.setattr(extractor, '_vlm_request', lambda image_url: None)
+
+    assert extractor.extract_from_pdf(str(path))['data'] == {}
+    assert 'cached' not in extractor.extract_from_pdf(str(path))
+
+
+def test_failed_image_request_is_not_a_success(tmp_path):
+    path = tmp_path / 'card.png'
+    page_image().save(path)
+    client = FlakyVLMClient()
+    client.failing = {1}
+    extractor = cached_vlm_extractor(tmp_path, client)
+
+    result = extractor.extract_from_image(str(path))
+    assert result['success'] is False
+    assert '429' in result['error']
+    assert extractor.extract_from_image(str(path))['success'] is True
+
+
+def test_cache_key_includes_jpeg_quality(tmp_path):
+    path = tmp_path / 'doc.pdf'
+    path.write_bytes(b'%PDF-1.4 test')
+    client = StubVLMClient()
+
+    def key(**kwargs):
+        return PDFExtractor(openai_client=client, **kwargs)._cache_key(str(path), use_vlm=True)
+
+    assert key(vlm_jpeg_quality=60) != key(vlm_jpeg_quality=90)
+    assert key(vlm_image_format='PNG', vlm_jpeg_quality=60) == key(vlm_image_format='PNG', vlm_jpeg_quality=90)
@@ -0,0 +1,153 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy import event
+
+from agents.data_validation_agent import DataValidationAgent
+from app import db
+from app.models import Provider, ProviderFingerprint, ValidationResult
+from app.persistence import ValidationResultWriter, provider_status
+
+
+def quality_results(agent, provider):
+    """Offline validation result for a provider (format and completeness checks only)"""
+    validations = agent._validate_data_quality(provider)
+    return {
+        'provider_id': provider.id,
+        'validations': validations,
+        'overall_confidence': sum(v['confidence_score'] for v in validations) / len(validations),
+        'discrepancies': [],
+        'unavailable_sources': []
+    }
+
+
+def stored_state():
+    statuses = sorted(db.session.query(Provider.id, Provider.status).all())
+    rows = db.session.query(ValidationResult.provider_id, ValidationResult.validation_type, ValidationResult.field_name,
+                            ValidationResult.original_value, ValidationResult.validated_value,
+                            ValidationResult.confidence_score, ValidationResult.source, ValidationResult.status,
+                            ValidationResult.discrepancy_reason)
+    return statuses, sorted(rows.all(), key=repr)
+
+
+def reset():
+    ValidationResult.query.delete()
+    Provider.query.update({'status': 'pending'})
+    db.session.commit()
+
+
+def test_chunked_writes_match_per_provider_saves(app, make_providers):
+    providers = make_providers(40)
+    agent = DataValidationAgent()
+    results = [(provider, quality_results(agent, provider)) for provider in providers]
+
+    for provider, result in results:
+        agent.save_validation_results(provider, result)
+    expected = stored_state()
+    assert {status for _, status in expected[0]} >= {'validated', 'needs_review'}
+
+    reset()
+    with ValidationResultWriter(chunk_size=7) as writer:
+        for provider, result in results:
+            writer.add(provider, result)
+    assert stored_state() == expected
+    assert writer.transactions == 6  # five full chunks of 7, then the last 5 on exit
+    assert writer.providers_written == 40
+    assert writer.rows_written == len(expected[1])
+
+
+def test_each_chunk_is_one_transaction(app, make_providers):
+    providers = make_providers(10)
+    agent = DataValidationAgent()
+    commits = []
+    event.listen(db.session, 'after_commit', lambda session: commits.append(writer.pending))
+    progress = []
+
+    writer = ValidationResultWriter(chunk_size=4, before_commit=lambda: progress.append(writer.pending))
+    for index, provider in enumerate(providers, start=1):
+        writer.add(provider, quality_results(agent, provider))
+        assert writer.pending == index % 4
+    writer.flush()
+
+    assert progress == [4, 4, 2]
+    assert commits == [4, 4, 2]
+
+
+def test_case_update_sets_each_provider_status(app, make_providers):
+    providers = make_providers(650)  # more than two UPDATE slices
+    statuses = ['validated', 'needs_review', 'rejected']
+    untouched = providers[-1]
+
+    writer = ValidationResultWriter(chunk_size=len(providers))
+    for index, provider in enumerate(providers[:-1]):
+        writer.add(provider, {'validations': []}, status=statuses[index % 3])
+    writer.flush()
+
+    db.session.expire_all()
+    stored = dict(db.session.query(Provider.id, Provider.status).all())
+    assert all(stored[provider.id] == statuses[index % 3] for index, provider in enumerate(providers[:-1]))
+    assert stored[untouched.id] == 'pending'
+
+
+def test_add_returns_the_implied_status(app, make_providers):
+    provider = make_providers(1)[0]
+    result = quality_results(DataValidationAgent(), provider)
+    with ValidationResultWriter() as writer:
+        assert writer.add(provider, result) == provider_status(result)
+
+
+def test_fingerprints_are_replaced(app, make_providers):
+    provider = make_providers(1)[0]
+    row = {'provider_id': provider.id, 'fingerprint': 'a' * 64, 'source_versions': {'rules': '1'},
+           'validated_at': datetime.utcnow(), 'has_website': False, 'status': 'validated', 'has_discrepancy': False}
+    for fingerprint in ('a' * 64, 'b' * 64):
+        with ValidationResultWriter() as writer:
+            writer.add(provider, {'validations': []}, 'validated', dict(row, fingerprint=fingerprint))
+
+    db.session.expire_all()
+    assert [f.fingerprint for f in ProviderFingerprint.query.all()] == ['b' * 64]
+
+
+def test_failed_flush_rolls_back_the_chunk(app, make_providers):
+    providers = make_providers(3)
+    agent = DataValidationAgent()
+    writer = ValidationResultWriter(chunk_size=10)
+    for provider in providers:
+        writer.add(provider, quality_results(agent, provider))
+    providers[0].city = 'Enriched City'  # pending enrichment change in the same session
+
+    def fail():
+        raise RuntimeError('disk I/O error')
+
+    writer.before_commit = fail
+    with pytest.raises(RuntimeError):
+        writer.flush()
+
+    db.session.expire_all()
+    assert ValidationResult.query.count() == 0
+    assert db.session.get(Provider, providers[0].id).city != 'Enriched City'
+    assert {provider.status for provider in Provider.query} == {'pending'}
+    assert writer.pending == 3  # still buffered; the caller decides whether to retry or discard
+
+    writer.discard()
+    assert writer.pending == 0
+
+
+def test_each_chunk_inserts_with_one_statement_per_table(app, make_providers):
+    providers = make_providers(40)
+    agent = DataValidationAgent()
+    now = datetime.utcnow()
+    inserts = []
+    event.listen(db.engine, 'before_cursor_execute',
+                 lambda conn, cursor, statement, *args: inserts.append(statement.split('(')[0].strip())
+                 if statement.startswith('INSERT') else None)
+
+    with ValidationResultWriter(chunk_size=20) as writer:
+        for index, provider in enumerate(providers):
+            # Rows and fingerprints leave different columns empty
+            row = {'provider_id': provider.id, 'fingerprint': 'a' * 64, 'source_versions': {'rules': '1'},
+                   'validated_at': now, 'npi_checked_at': now if index % 2 else None,
+                   'website_checked_at': now if index % 3 else None}
+            writer.add(provider, quality_results(agent, provider), fingerprint=row)
+
+    assert inserts == ['INSERT INTO validation_results', 'INSERT INTO provider_fingerprints'] * 2
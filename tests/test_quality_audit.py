@@ -0,0 +1,64 @@
+import pytest
+
+from agents.data_validation_agent import DataValidationAgent
+from app import db
+from app.models import Provider
+from app.quality_audit import iter_quality_records, run_format_audit
+
+SUMMARY_KEYS = ('providers', 'records', 'providers_needing_review', 'fields', 'required_fields_present')
+
+
+def per_provider_records():
+    agent = DataValidationAgent()
+    return [(provider.id, agent._validate_data_quality(provider)) for provider in Provider.query.order_by(Provider.id)]
+
+
+def add_edge_cases():
+    """Values the vectorized checks must treat exactly as the per-provider regexes do"""
+    db.session.add_all([
+        Provider(first_name='Empty', last_name='Strings', phone='', email='', zip_code='', city='', state=''),
+        Provider(first_name='All', last_name='Missing'),
+        Provider(first_name='Trailing', last_name='Newline', phone='5125550100\n', email='a@b.co\n', zip_code='78701\n'),
+        Provider(first_name='Separators', last_name='Only', phone='(512) 555.0100', email='no-at-sign.example.com',
+                 zip_code='78701-1234', address_line1='1 Main St', city='Austin', state='TX', npi='1234567893'),
+        Provider(first_name='Short', last_name='Phone', phone='555-0100', email='x@y', zip_code='7870'),
+    ])
+    db.session.commit()
+
+
+@pytest.mark.parametrize('chunk_size', [1, 7, 50000])
+def test_columnar_records_match_per_provider_checks(app, make_providers, chunk_size):
+    make_providers(60)
+    add_edge_cases()
+    expected = per_provider_records()
+    db.session.expunge_all()
+
+    assert list(iter_quality_records(chunk_size)) == expected
+
+
+@pytest.mark.parametrize('chunk_size', [3, 50000])
+def test_columnar_summary_matches_per_provider_summary(app, make_providers, chunk_size):
+    make_providers(60)
+    add_edge_cases()
+
+    columnar = run_format_audit(chunk_size, columnar=True)
+    per_provider = run_format_audit(chunk_size, columnar=False)
+    assert columnar['engine'] == 'columnar'
+    assert per_provider['engine'] == 'per_provider'
+    assert {key: columnar[key] for key in SUMMARY_KEYS} == {key: per_provider[key] for key in SUMMARY_KEYS}
+    assert columnar['providers'] == 65
+    assert 0 < columnar['providers_needing_review'] < 65
+
+
+def test_summary_counts_records(app, make_providers):
+    make_providers(20)
+    summary = run_format_audit(columnar=True)
+    assert summary['records'] == sum(len(validations) for _, validations in per_provider_records())
+
+
+def test_empty_directory(app):
+    assert list(iter_quality_records()) == []
+    summary = run_format_audit(columnar=True)
+    assert summary['providers'] == 0
+    assert summary == dict(run_format_audit(columnar=False), engine='columnar',
+                           processing_time_seconds=summary['processing_time_seconds'])
@@ -0,0 +1,109 @@
+import random
+
+import pytest
+from sqlalchemy import event
+
+from agents.quality_assurance_agent import QualityAssuranceAgent
+from app import db
+from app.models import Provider, ValidationResult
+
+# Scores whose means land on, or a rounding error away from, the status thresholds
+SCORES = [0.1, 0.2, 0.3, 0.55, 0.6, 0.7, 0.75, 0.8, 0.85, 0.9, 0.95, 1.0]
+
+
+def add_validations(providers, seed=0):
+    """Random validation rows for all but every fifth provider (left unvalidated)"""
+    rng = random.Random(seed)
+    rows = []
+    for index, provider in enumerate(providers):
+        if index % 5 == 0:
+            continue
+        for field_name in rng.sample(['npi', 'phone', 'address', 'email', 'license'], rng.randint(1, 5)):
+            status = rng.choice(['validated', 'validated', 'validated', 'discrepancy'])
+            rows.append(ValidationResult(provider_id=provider.id, validation_type='contact', field_name=field_name,
+                                         confidence_score=rng.choice(SCORES), status=status,
+                                         discrepancy_reason='Does not match registry' if status == 'discrepancy' else None))
+    db.session.add_all(rows)
+    db.session.commit()
+
+
+def add_edge_cases():
+    """Empty strings count as missing in both paths; equal means must give equal statuses"""
+    edge = [
+        Provider(first_name='Empty', last_name='Strings', phone='', email='', address_line1='', city='', state=''),
+        Provider(first_name='Threshold', last_name='Mean', phone='5125550100', address_line1='1 Main St',
+                 city='Austin', state='TX'),
+        Provider(first_name='No', last_name='Validations'),
+    ]
+    db.session.add_all(edge)
+    db.session.flush()
+    db.session.add_all(
+        [ValidationResult(provider_id=edge[0].id, validation_type='contact', field_name='phone', confidence_score=0.3, status='validated')]
+        + [ValidationResult(provider_id=edge[1].id, validation_type='contact', field_name=f'f{i}',
+                            confidence_score=score, status='validated')
+           for i, score in enumerate([0.7, 0.9, 0.8, 0.75, 0.85])]
+    )
+    db.session.commit()
+
+
+def assert_same_report(report, expected):
+    """Counts equal, averages equal up to SQL AVG rounding"""
+    averages = ('validation_rate', 'average_confidence', 'average_quality_score')
+    assert {k: v for k, v in report.items() if k not in averages} == {k: v for k, v in expected.items() if k not in averages}
+    assert {k: report[k] for k in averages} == pytest.approx({k: expected[k] for k in averages})
+
+
+def count_statements():
+    statements = []
+    event.listen(db.engine, 'before_cursor_execute', lambda conn, cursor, statement, *args: statements.append(statement))
+    return statements
+
+
+@pytest.mark.parametrize('threshold', [0.80, 0.75])
+def test_directory_report_matches_per_provider_report(app, make_providers, threshold):
+    add_validations(make_providers(150))
+    add_edge_cases()
+    agent = QualityAssuranceAgent(confidence_threshold=threshold)
+
+    expected = agent.generate_quality_report(Provider.query.all())
+    db.session.expunge_all()
+    report = agent.generate_directory_report()
+
+    assert_same_report(report, expected)
+    assert expected['providers_by_status']['needs_validation'] > 0
+    assert expected['total_discrepancies'] > 0
+
+
+def test_directory_report_is_one_query(app, make_providers):
+    add_validations(make_providers(50))
+    db.session.expunge_all()
+    statements = count_statements()
+
+    report = QualityAssuranceAgent().generate_directory_report()
+
+    assert report['total_providers'] == 50
+    assert len(statements) == 1
+
+
+def test_provider_reports_load_validations_in_one_query(app, make_providers):
+    providers = make_providers(50)
+    add_validations(providers)
+    providers = Provider.query.all()
+    agent = QualityAssuranceAgent()
+    statements = count_statements()
+
+    report = agent.generate_quality_report(providers)
+    prioritized = agent.prioritize_providers_for_review(providers, limit=10)
+
+    assert report['total_providers'] == 50
+    assert len(prioritized) == 10
+    assert len(statements) == 2
+    for item in prioritized:
+        provider = db.session.get(Provider, item['provider']['id'])
+        assert item['assessment'] == agent.assess_provider_quality(provider)
+
+
+def test_empty_directory(app):
+    agent = QualityAssuranceAgent()
+    assert agent.generate_directory_report() == agent.generate_quality_report([])
+    assert agent.generate_directory_report()['total_providers'] == 0
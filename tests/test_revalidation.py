@@ -0,0 +1,153 @@
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import event
+
+from app import db
+from app.models import ProviderFingerprint
+from app.revalidation import RevalidationPlanner, source_versions
+
+NOW = datetime(2026, 1, 15, 12, 0, 0)
+VALIDATED = {'validations': [{'field_name': 'phone', 'status': 'validated'}], 'discrepancies': []}
+
+
+def evidence(website=False, unavailable=()):
+    return SimpleNamespace(scraped_data={'website_url': 'https://example.com'} if website else None,
+                           unavailable_sources=tuple(unavailable))
+
+
+def planner(rules='1'):
+    return RevalidationPlanner(source_versions(rules), npi_ttl_days=30, website_ttl_days=7)
+
+
+def record(planner, provider, results=VALIDATED, website=False, unavailable=(), at=NOW):
+    db.session.merge(ProviderFingerprint(**planner.fingerprint_row(
+        provider, results, evidence(website, unavailable), 'validated', now=at)))
+    db.session.commit()
+
+
+def reasons(planner, providers, at=NOW):
+    return planner.plan(providers, now=at).reasons
+
+
+def test_never_validated(app, make_providers):
+    provider = make_providers(1)[0]
+    assert reasons(planner(), [provider]) == {provider.id: ['never_validated']}
+
+
+def test_unchanged_provider_is_skipped(app, make_providers):
+    provider = make_providers(1)[0]
+    record(planner(), provider)
+    plan = planner().plan([provider], now=NOW + timedelta(days=29))
+    assert plan.due == []
+    assert plan.skipped == 1
+
+
+def test_data_change(app, make_providers):
+    provider = make_providers(1)[0]
+    record(planner(), provider)
+    provider.phone = '(512) 555-0199'
+    assert reasons(planner(), [provider]) == {provider.id: ['data_changed']}
+
+
+def test_unvalidated_field_change_is_ignored(app, make_providers):
+    provider = make_providers(1)[0]
+    record(planner(), provider)
+    provider.board_certifications = ['American Board of Surgery']
+    assert reasons(planner(), [provider]) == {}
+
+
+def test_source_version_change(app, make_providers):
+    provider = make_providers(1)[0]
+    record(planner('1'), provider)
+    provider.phone = '(512) 555-0199'
+    # A new rules version makes everyone due; the data change is subsumed by it
+    assert reasons(planner('2'), [provider]) == {provider.id: ['source_versions_changed']}
+
+
+def test_npi_ttl(app, make_providers):
+    provider = make_providers(1)[0]
+    record(planner(), provider)
+    assert reasons(planner(), [provider], NOW + timedelta(days=30)) == {}
+    assert reasons(planner(), [provider], NOW + timedelta(days=31)) == {provider.id: ['npi_stale']}
+
+
+def test_unavailable_npi_counts_as_never_read(app, make_providers):
+    provider = make_providers(1)[0]
+    record(planner(), provider, unavailable=['npi'])
+    assert reasons(planner(), [provider]) == {provider.id: ['npi_stale']}
+
+
+def test_website_ttl_only_applies_to_providers_with_a_website(app, make_providers):
+    with_site, without_site = make_providers(2)
+    record(planner(), with_site, website=True)
+    record(planner(), without_site)
+    assert reasons(planner(), [with_site, without_site], NOW + timedelta(days=8)) == {with_site.id: ['website_stale']}
+
+
+def test_unavailable_website_counts_as_never_read(app, make_providers):
+    provider = make_providers(1)[0]
+    record(planner(), provider, website=True, unavailable=['website'])
+    assert reasons(planner(), [provider]) == {provider.id: ['website_stale']}
+
+
+def test_discrepancy_is_always_due(app, make_providers):
+    provider = make_providers(1)[0]
+    record(planner(), provider, results={'validations': [], 'discrepancies': [{'field_name': 'phone'}]})
+    assert reasons(planner(), [provider]) == {provider.id: ['discrepancy']}
+
+
+def test_reasons_combine(app, make_providers):
+    provider = make_providers(1)[0]
+    record(planner(), provider, results={'validations': [], 'discrepancies': [{'field_name': 'phone'}]}, website=True)
+    provider.city = 'Round Rock'
+    assert reasons(planner(), [provider], NOW + timedelta(days=60)) == {
+        provider.id: ['data_changed', 'npi_stale', 'website_stale', 'discrepancy']
+    }
+
+
+def test_plan_keeps_order_and_summarizes(app, make_providers):
+    providers = make_providers(1200)  # more than two fingerprint query slices
+    for provider in providers[::2]:
+        record(planner(), provider)
+    providers[0].phone = '(512) 555-0199'
+
+    shuffled = providers[::-1]
+    plan = planner().plan(shuffled, now=NOW)
+    assert plan.due == [p for p in shuffled if p.id % 2 == 0 or p is providers[0]]
+    assert plan.skipped == 599
+    assert plan.summary() == {'due': 601, 'skipped': 599, 'reasons': {'never_validated': 600, 'data_changed': 1}}
+
+
+@pytest.fixture
+def count_selects():
+    counts = []
+
+    def before(conn, cursor, statement, *args):
+        if statement.lstrip().upper().startswith('SELECT'):
+            counts.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', before)
+    yield counts
+    event.remove(db.engine, 'before_cursor_execute', before)
+
+
+def test_incremental_batch_loads_providers_in_slices(client, make_providers, count_selects):
+    providers = make_providers(1100)
+    provider_ids = [p.id for p in providers]
+    db.session.expunge_all()
+    del count_selects[:]
+
+    first = client.post('/api/batch/validate', json={'provider_ids': provider_ids, 'incremental': True}).get_json()
+    assert first['revalidation']['due'] == 1100
+    assert first['processed'] == 1100
+    # Three provider slices and three fingerprint slices, however many chunks are committed
+    assert len(count_selects) <= 8
+
+    del count_selects[:]
+    db.session.expunge_all()
+    second = client.post('/api/batch/validate', json={'provider_ids': provider_ids, 'incremental': True}).get_json()
+    assert second['batch_id'] is None
+    assert second['revalidation'] == {'due': 0, 'skipped': 1100, 'reasons': {}}
+    assert len(count_selects) == 6